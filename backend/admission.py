@@ -0,0 +1,147 @@
+"""
+ADMISSION CONTROL
+Per-endpoint concurrency limits for the expensive endpoints (DB + model work),
+enforced on the event loop before a request takes a threadpool thread or a
+pooled DB connection. Requests beyond the limit wait in a bounded FIFO queue;
+a request is shed with 503 + Retry-After when the queue is full or its expected
+wait exceeds its deadline, so queueing delay stays bounded instead of growing
+for every endpoint during a spike.
+"""
+
+import os
+import math
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+
+# Upper bound a client can ask for with X-Request-Timeout (seconds)
+MAX_REQUEST_TIMEOUT = 30.0
+WAIT_SAMPLES = 1024
+
+def _env_limits(name, concurrency, queue, wait_seconds):
+    prefix = f"ADMIT_{name.upper()}_"
+    return (
+        int(os.getenv(prefix + "CONCURRENCY", str(concurrency))),
+        int(os.getenv(prefix + "QUEUE", str(queue))),
+        float(os.getenv(prefix + "MAX_WAIT", str(wait_seconds))),
+    )
+
+class Overloaded(Exception):
+    """A request was shed; retry_after is a whole number of seconds"""
+
+    def __init__(self, limiter, reason, retry_after):
+        super().__init__(f"{limiter} is overloaded ({reason})")
+        self.limiter = limiter
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionLimiter:
+    """At most max_concurrent requests run; up to max_queue wait at most max_wait_seconds"""
+
+    def __init__(self, name, max_concurrent, max_queue, max_wait_seconds, initial_service_seconds=0.05):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.active = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.admitted = 0
+        self.shed = {"queue_full": 0, "deadline": 0}
+        self.degraded = 0
+        # EWMA of time spent holding a slot, for wait estimates and Retry-After
+        self.service_seconds = initial_service_seconds
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self._waiters = deque()
+
+    @classmethod
+    def from_env(cls, name, concurrency, queue, wait_seconds):
+        """Limiter whose defaults can be overridden with ADMIT_<NAME>_CONCURRENCY / _QUEUE / _MAX_WAIT"""
+        return cls(name, *_env_limits(name, concurrency, queue, wait_seconds))
+
+    def expected_wait(self, position):
+        """Seconds until the request at queue position (1-based) gets a slot"""
+        return position * self.service_seconds / self.max_concurrent
+
+    def retry_after(self):
+        return max(1, math.ceil(self.expected_wait(self.queued + self.active)))
+
+    def _reject(self, reason):
+        self.shed[reason] += 1
+        raise Overloaded(self.name, reason, self.retry_after())
+
+    @asynccontextmanager
+    async def slot(self, timeout=None):
+        """Hold one of the concurrency slots; raises Overloaded instead of queueing past the deadline"""
+        budget = self.max_wait_seconds if timeout is None else min(timeout, self.max_wait_seconds)
+        enqueued = time.perf_counter()
+        if self.active >= self.max_concurrent or self._waiters:
+            if self.queued >= self.max_queue:
+                self._reject("queue_full")
+            # Reject now rather than after waiting out a deadline it can't meet
+            if self.expected_wait(self.queued + 1) > budget:
+                self._reject("deadline")
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+            try:
+                await asyncio.wait_for(waiter, timeout=budget)
+            except asyncio.TimeoutError:
+                self._reject("deadline")
+            except BaseException:
+                # Cancelled (client went away) after being handed a slot: pass it on
+                if waiter.done() and not waiter.cancelled():
+                    self._release()
+                raise
+            finally:
+                self.queued -= 1
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            # The releasing request handed its slot over, so active is unchanged
+        else:
+            self.active += 1
+        self.admitted += 1
+        self._waits.append(time.perf_counter() - enqueued)
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.service_seconds += 0.1 * (time.perf_counter() - started - self.service_seconds)
+            self._release()
+
+    def _release(self):
+        # Hand the slot straight to the oldest waiter still waiting
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self):
+        waits = sorted(self._waits)
+        percentile = lambda p: round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 2) if waits else 0.0
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "max_wait_seconds": self.max_wait_seconds,
+            "active": self.active,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+            "degraded": self.degraded,
+            "service_ms": round(self.service_seconds * 1000, 2),
+            "queue_wait_ms": {"p50": percentile(0.5), "p99": percentile(0.99)},
+        }
+
+def request_timeout(request):
+    """Client deadline from the X-Request-Timeout header (seconds), if any"""
+    value = request.headers.get("x-request-timeout")
+    try:
+        return min(max(float(value), 0.0), MAX_REQUEST_TIMEOUT) if value else None
+    except ValueError:
+        return None
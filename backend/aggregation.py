@@ -0,0 +1,118 @@
+"""
+SPATIAL AGGREGATION
+Rolls predictions up over a bounding box or administrative polygon: zones are
+selected through the zones GiST index, predictions come from the materialized
+predictions table where batch_score.py has run and are batch-scored for the
+rest, and the result is total demand plus the risk level distribution.
+"""
+
+import hashlib
+import numpy as np
+import orjson
+import pandas as pd
+from sqlalchemy import text
+from batch_score import (
+    RISK_LEVELS, load_latest_zone_attributes, build_scoring_frame, score_routed, classify_risk
+)
+from zone_import import validate_polygon
+
+# Zones whose centroid lies in the region; `&&` lets the planner use idx_zones_geometry
+ZONES_IN_REGION_QUERY = text("""
+    WITH region AS (SELECT ST_SetSRID(ST_GeomFromGeoJSON(:region), 4326) AS geom)
+    SELECT z.zone_id, z.zone_name
+    FROM zones z, region r
+    WHERE z.geometry && r.geom
+      AND ST_Contains(r.geom, COALESCE(z.centroid, ST_Centroid(z.geometry)))
+    ORDER BY z.zone_id
+""")
+
+MATERIALIZED_QUERY = text("""
+    SELECT zone_id, model_version, mld
+    FROM predictions
+    WHERE target_date = :target_date AND zone_id = ANY(:zone_ids)
+""")
+
+def parse_bbox(bbox):
+    """GeoJSON Polygon for a 'min_lon,min_lat,max_lon,max_lat' string, or raise ValueError"""
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise ValueError("bbox must be min_lon,min_lat,max_lon,max_lat")
+    if not (-180 <= min_lon < max_lon <= 180 and -90 <= min_lat < max_lat <= 90):
+        raise ValueError("bbox must be a non-empty WGS84 box")
+    ring = [[min_lon, min_lat], [max_lon, min_lat], [max_lon, max_lat], [min_lon, max_lat], [min_lon, min_lat]]
+    return {"type": "Polygon", "coordinates": [ring]}
+
+def parse_region(geometry):
+    """Validated region geometry from a GeoJSON Polygon/MultiPolygon or a Feature wrapping one"""
+    if isinstance(geometry, dict) and geometry.get("type") == "Feature":
+        geometry = geometry.get("geometry")
+    return validate_polygon(geometry, allow_multi=True)
+
+def region_key(region):
+    """Stable cache key for a region geometry"""
+    return hashlib.sha1(orjson.dumps(region, option=orjson.OPT_SORT_KEYS)).hexdigest()[:16]
+
+def expected_versions(zone_ids, registry, default_version):
+    """zone_id -> version of the model that serves it"""
+    region_versions = {region: entry["model_version"] for region, entry in registry.regions.items()}
+    return {
+        zone_id: region_versions[registry.routes[zone_id]] if zone_id in registry.routes else default_version
+        for zone_id in zone_ids
+    }
+
+def zone_predictions(conn, zone_ids, target_date, forecast, default_model, registry):
+    """Per-zone predictions: materialized rows of the serving model, batch-scored otherwise"""
+    versions = expected_versions(zone_ids, registry, default_model[2])
+    try:
+        rows = conn.execute(MATERIALIZED_QUERY, {"target_date": target_date, "zone_ids": zone_ids}).fetchall()
+    except Exception:
+        # predictions table not created yet
+        conn.rollback()
+        rows = []
+    materialized = {zone_id: mld for zone_id, version, mld in rows if versions.get(zone_id) == version}
+
+    missing = [zone_id for zone_id in zone_ids if zone_id not in materialized]
+    scored = {}
+    if missing:
+        zones = load_latest_zone_attributes(conn, missing)
+        frame = build_scoring_frame(zones, pd.DatetimeIndex([pd.Timestamp(target_date)]), forecast)
+        predictions, _ = score_routed(frame, default_model, registry)
+        scored = dict(zip(frame['zone_id'].astype(int), predictions))
+
+    mld = np.array([materialized.get(zone_id, scored.get(zone_id)) for zone_id in zone_ids], dtype=float)
+    return mld, len(materialized), len(scored), sorted(set(versions.values()))
+
+def aggregate_region(conn, region, target_date, forecast, default_model, registry):
+    """Total demand, risk distribution and worst risk level over the zones in region"""
+    zones = conn.execute(ZONES_IN_REGION_QUERY, {"region": orjson.dumps(region).decode()}).fetchall()
+    distribution = {str(level): 0 for level in RISK_LEVELS}
+    if not zones:
+        return {"target_date": target_date, "zone_count": 0, "total_predicted_mld": 0.0,
+                "risk_distribution": distribution, "worst_risk_level": None, "zones": []}
+
+    zone_ids = [zone_id for zone_id, _ in zones]
+    mld, n_materialized, n_scored, versions = zone_predictions(
+        conn, zone_ids, target_date, forecast, default_model, registry
+    )
+    risk = classify_risk(mld)
+    levels, counts = np.unique(risk, return_counts=True)
+    distribution.update({str(level): int(count) for level, count in zip(levels, counts)})
+    worst = next(str(level) for level in RISK_LEVELS[::-1] if distribution[str(level)])
+    peak = int(np.argmax(mld))
+
+    return {
+        "target_date": target_date,
+        "zone_count": len(zone_ids),
+        "total_predicted_mld": round(float(mld.sum()), 2),
+        "mean_predicted_mld": round(float(mld.mean()), 2),
+        "peak_zone": {"zone_id": zone_ids[peak], "zone_name": zones[peak][1], "predicted_mld": round(float(mld[peak]), 2)},
+        "risk_distribution": distribution,
+        "worst_risk_level": worst,
+        "sources": {"materialized": n_materialized, "scored": n_scored},
+        "model_versions": versions,
+        "zones": [
+            {"zone_id": zone_id, "zone_name": name, "predicted_mld": round(float(value), 2), "risk_level": str(level)}
+            for (zone_id, name), value, level in zip(zones, mld, risk)
+        ]
+    }
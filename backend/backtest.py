@@ -0,0 +1,238 @@
+"""
+ROLLING-ORIGIN BACKTEST
+Time-ordered evaluation of the training setup. The feature matrix is loaded
+once, sorted by day and placed in shared memory. Each fold trains on the days
+before its origin (all of them, or a sliding window) and scores the following
+horizon days, so no future day leaks into training. Because rows are sorted by
+day, a fold's train and test sets are contiguous slices of the shared arrays;
+folds run in a process pool and cost one fit each, with no data copied. Reports
+error per fold, per lead day (days after the origin) and per zone.
+
+    python backtest.py --folds 8 --horizon 28
+    python backtest.py --parquet synthetic/water_data.parquet --window 730 --workers 4 --output backtest.json
+"""
+
+import os
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from setup_and_train import WATER_DATA_COLUMNS, prepare_training_frame, fit_forest, engine
+
+MIN_TRAIN_DAYS = 365
+TOP_ZONES = 10
+
+def load_frame(parquet=None):
+    """water_data from a parquet file (e.g. synthetic_data.py output) or the database, oldest day first"""
+    if parquet:
+        df = pd.read_parquet(parquet, columns=WATER_DATA_COLUMNS)
+    elif engine is None:
+        raise RuntimeError("DATABASE_URL is not set; set it or read a parquet file instead")
+    else:
+        with engine.connect() as conn:
+            df = pd.read_sql(f'SELECT {", ".join(WATER_DATA_COLUMNS)} FROM water_data ORDER BY "timestamp", zone_id', conn)
+    return df.sort_values(['timestamp', 'zone_id'], kind='stable', ignore_index=True)
+
+def build_arrays(df):
+    """Day-sorted feature matrix, target, day number and zone index arrays, plus features and zone ids"""
+    df, features = prepare_training_frame(df)
+    zone_ids, zone_index = np.unique(df['zone_id'].to_numpy(), return_inverse=True)
+    arrays = {
+        "X": np.ascontiguousarray(df[features].to_numpy(dtype=np.float32)),  # the dtype trees are fit on
+        "y": df['water_consumption_mld'].to_numpy(dtype=np.float64),
+        "day": df['timestamp'].to_numpy().astype('datetime64[D]').astype(np.int64),
+        "zone": zone_index.astype(np.int32),
+    }
+    return arrays, features, zone_ids
+
+class SharedArrays:
+    """Copies arrays into shared memory blocks; workers attach by name instead of receiving copies"""
+
+    def __init__(self, arrays):
+        self.blocks = []
+        self.specs = {}
+        for name, array in arrays.items():
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+            self.blocks.append(block)
+            self.specs[name] = (block.name, array.shape, array.dtype.str)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+
+# Worker-side views of the shared arrays, set by _attach
+_shared = {}
+_blocks = []
+
+def _attach(specs):
+    for name, (block_name, shape, dtype) in specs.items():
+        # Pool workers share the parent's resource tracker, which unlinks the block once, on the parent's exit
+        block = shared_memory.SharedMemory(name=block_name)
+        _blocks.append(block)
+        _shared[name] = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+
+def plan_folds(days, n_folds, horizon, step=None, window=None, min_train_days=MIN_TRAIN_DAYS):
+    """Fold origins (as day numbers) ending at the last day, step days apart, oldest first.
+
+    Each fold trains on [origin - window, origin) (or everything before origin)
+    and tests on [origin, origin + horizon). Folds with fewer than
+    min_train_days of training days are dropped.
+    """
+    step = step or horizon
+    first, last = int(days[0]), int(days[-1])
+    folds = []
+    for k in range(n_folds):
+        origin = last - horizon + 1 - step * (n_folds - 1 - k)
+        train_start = max(first, origin - window) if window else first
+        if origin - train_start < min_train_days:
+            continue
+        folds.append({"fold": len(folds), "origin": origin, "train_start": train_start, "horizon": horizon})
+    return folds
+
+def run_fold(fold, n_jobs, n_zones):
+    """Fit on the fold's training slice and score its horizon (runs in a pool worker)"""
+    started = time.perf_counter()
+    X, y, day, zone = _shared["X"], _shared["y"], _shared["day"], _shared["zone"]
+    origin, horizon = fold["origin"], fold["horizon"]
+    lo, mid, hi = np.searchsorted(day, [fold["train_start"], origin, origin + horizon])
+
+    model = fit_forest(X[lo:mid], y[lo:mid], n_jobs)
+    fitted = time.perf_counter()
+    prediction = model.predict(X[mid:hi])
+    error = prediction - y[mid:hi]
+    absolute = np.abs(error)
+    lead = day[mid:hi] - origin
+    test_zones = zone[mid:hi]
+    return {
+        **fold,
+        "train_rows": int(mid - lo),
+        "test_rows": int(hi - mid),
+        "mae": float(absolute.mean()),
+        "rmse": float(np.sqrt((error ** 2).mean())),
+        "bias": float(error.mean()),
+        "lead_abs": np.bincount(lead, absolute, minlength=horizon),
+        "lead_rows": np.bincount(lead, minlength=horizon),
+        "zone_abs": np.bincount(test_zones, absolute, minlength=n_zones),
+        "zone_rows": np.bincount(test_zones, minlength=n_zones),
+        "fit_seconds": fitted - started,
+        "predict_seconds": time.perf_counter() - fitted,
+        "wall_seconds": time.perf_counter() - started,
+    }
+
+def run_backtest(arrays, folds, n_zones, workers=None):
+    """Run every fold in a process pool over shared memory; results in fold order"""
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(workers or cpus, len(folds)))
+    n_jobs = max(1, cpus // workers)
+    results = []
+    with SharedArrays(arrays) as shared, ProcessPoolExecutor(
+        max_workers=workers, initializer=_attach, initargs=(shared.specs,)
+    ) as pool:
+        futures = [pool.submit(run_fold, fold, n_jobs, n_zones) for fold in folds]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"  fold {result['fold']}: origin {day_to_date(result['origin'])}, "
+                  f"MAE {result['mae']:.3f}, {result['wall_seconds']:.1f}s")
+    return sorted(results, key=lambda r: r["fold"]), workers
+
+def day_to_date(day):
+    return str(np.datetime64(int(day), 'D'))
+
+def summarize(results, zone_ids, top=TOP_ZONES):
+    """Overall, per-lead-day and per-zone MAE across folds"""
+    rows = sum(r["test_rows"] for r in results)
+    lead_abs = sum(r["lead_abs"] for r in results)
+    lead_rows = sum(r["lead_rows"] for r in results)
+    zone_abs = sum(r["zone_abs"] for r in results)
+    zone_rows = sum(r["zone_rows"] for r in results)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        lead_mae = lead_abs / lead_rows
+        zone_mae = zone_abs / zone_rows
+    scored = np.flatnonzero(zone_rows)
+    worst = scored[np.argsort(zone_mae[scored])[::-1][:top]]
+    return {
+        "mae": float(zone_abs.sum() / rows),
+        "test_rows": int(rows),
+        "mae_by_lead_day": [round(float(v), 4) if lead_rows[i] else None for i, v in enumerate(lead_mae)],
+        "zone_mae": {int(zone_ids[i]): round(float(zone_mae[i]), 4) for i in scored},
+        "worst_zones": [{"zone_id": int(zone_ids[i]), "mae": round(float(zone_mae[i]), 4)} for i in worst],
+        "folds": [
+            {key: (day_to_date(value) if key in ("origin", "train_start") else value)
+             for key, value in r.items() if not isinstance(value, np.ndarray)}
+            for r in results
+        ],
+    }
+
+def print_report(summary, wall, workers):
+    fit_total = sum(f["wall_seconds"] for f in summary["folds"])
+    print("=" * 78)
+    print(f"📈 ROLLING-ORIGIN BACKTEST: {len(summary['folds'])} folds, MAE {summary['mae']:.3f} MLD "
+          f"over {summary['test_rows']:,} rows")
+    print(f"   {wall:.1f}s wall on {workers} workers ({fit_total:.1f}s of fold time, {fit_total / wall:.1f}x)")
+    print("=" * 78)
+    print(f"{'Fold':>4} {'Origin':>11} {'Train from':>11} {'Train rows':>11} {'Test rows':>10} "
+          f"{'MAE':>7} {'RMSE':>7} {'Bias':>7} {'Wall s':>7}")
+    for f in summary["folds"]:
+        print(f"{f['fold']:>4} {f['origin']:>11} {f['train_start']:>11} {f['train_rows']:>11,} {f['test_rows']:>10,} "
+              f"{f['mae']:>7.3f} {f['rmse']:>7.3f} {f['bias']:>+7.3f} {f['wall_seconds']:>7.1f}")
+
+    leads = summary["mae_by_lead_day"]
+    print("\nMAE by lead day (days after the origin):")
+    for start in range(0, len(leads), 7):
+        week = [f"{v:.3f}" if v is not None else "-" for v in leads[start:start + 7]]
+        print(f"  day {start + 1:>3}-{min(start + 7, len(leads)):<3} " + "  ".join(week))
+
+    print("\nWorst zones:")
+    for zone in summary["worst_zones"]:
+        print(f"  zone {zone['zone_id']}: MAE {zone['mae']:.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the water consumption model")
+    parser.add_argument("--folds", type=int, default=6)
+    parser.add_argument("--horizon", type=int, default=28, help="Days scored after each origin")
+    parser.add_argument("--step", type=int, help="Days between origins (default: horizon)")
+    parser.add_argument("--window", type=int, help="Sliding training window in days (default: all earlier days)")
+    parser.add_argument("--min-train-days", type=int, default=MIN_TRAIN_DAYS)
+    parser.add_argument("--workers", type=int, help="Processes (default: one per CPU, at most one per fold)")
+    parser.add_argument("--parquet", help="Read water_data from this parquet file instead of the database")
+    parser.add_argument("--top-zones", type=int, default=TOP_ZONES)
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    if not args.parquet and engine is None:
+        raise SystemExit("DATABASE_URL is not set; set it, or pass --parquet to backtest offline.")
+    started = time.perf_counter()
+    try:
+        df = load_frame(args.parquet)
+    except ImportError:  # pyarrow is optional; only --parquet needs it
+        raise SystemExit("--parquet needs pyarrow: pip install pyarrow")
+    if df.empty:
+        raise SystemExit("No data in water_data.")
+    arrays, features, zone_ids = build_arrays(df)
+    del df
+    print(f"Loaded {len(arrays['y']):,} rows x {len(features)} features for {len(zone_ids)} zones "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    folds = plan_folds(arrays["day"], args.folds, args.horizon, args.step, args.window, args.min_train_days)
+    if not folds:
+        raise SystemExit(f"No fold has {args.min_train_days} days of training data; lower --min-train-days or --folds.")
+    backtest_started = time.perf_counter()
+    results, workers = run_backtest(arrays, folds, len(zone_ids), args.workers)
+    wall = time.perf_counter() - backtest_started
+
+    summary = summarize(results, zone_ids, args.top_zones)
+    print_report(summary, wall, workers)
+    if args.output:
+        report = {"features": features, "wall_seconds": wall, "workers": workers, **summary}
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to '{args.output}'.")
@@ -0,0 +1,223 @@
+"""
+BATCH SCORING
+Scores every zone across the forecast horizon and materializes the results into
+the predictions table, so /api/predict/live can serve them without running the model.
+"""
+
+import os
+import io
+import argparse
+import joblib
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+from model_registry import ModelRegistry, get_model_version
+from feature_engine import BASIC_FEATURES, compute_features, feature_frame
+from model_compaction import COMPACT_MODEL_FILENAME
+
+load_dotenv()
+
+# --- Configuration ---
+MODEL_FILENAME = "water_model.joblib"
+# "compact" serves the compacted forest when setup_and_train.py produced one; "full" never does
+MODEL_VARIANT = os.getenv("MODEL_VARIANT", "compact")
+FEATURES_FILENAME = "model_features.joblib"
+HORIZON_DAYS = 7
+# Days of past target dates kept in predictions; older rows are deleted on each run
+PREDICTION_RETENTION_DAYS = int(os.getenv("PREDICTION_RETENTION_DAYS", "0"))
+CHUNK_SIZE = 50000
+
+# Placeholder forecast (until a weather forecast API is wired in)
+FORECAST_DEFAULTS = {
+    'avg_temp_celsius': 35.0,
+    'rainfall_mm': 0.5,
+    'humidity': 65.0,
+    'wind_speed': 3.2,
+    'solar_radiation': 18.5
+}
+
+# Latest known zone attributes, and the fallback used for zones without history
+ZONE_ATTRIBUTE_COLUMNS = [
+    'population', 'gdp_per_capita', 'literacy_rate', 'urban_density',
+    'infrastructure_score', 'monsoon_dependency', 'groundwater_level',
+    'industrial_demand', 'agricultural_demand', 'water_recycling_rate'
+]
+FALLBACK_ZONE_ATTRIBUTES = (55000, 2500, 75.0, 4000, 5.5, 0.65, 15.0, 5.0, 8.0, 20.0)
+
+# Indian water scarcity thresholds (MLD)
+RISK_THRESHOLDS = [18, 25, 35, 50]
+RISK_LEVELS = np.array(["Low", "Moderate", "High", "Severe", "Critical"])
+
+def load_feature_order():
+    """Feature order saved alongside the model"""
+    try:
+        return joblib.load(FEATURES_FILENAME)
+    except Exception:
+        # Fallback to basic features if enhanced model not available
+        return BASIC_FEATURES
+
+def classify_risk(predictions):
+    """Map predicted consumption (MLD) to risk levels, vectorized"""
+    return RISK_LEVELS[np.digitize(predictions, RISK_THRESHOLDS, right=True)]
+
+def ensure_predictions_table(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS predictions (
+            zone_id INTEGER NOT NULL,
+            target_date DATE NOT NULL,
+            model_version VARCHAR(32) NOT NULL,
+            mld FLOAT NOT NULL,
+            risk_level VARCHAR(16) NOT NULL,
+            created_at TIMESTAMP NOT NULL DEFAULT now(),
+            PRIMARY KEY (zone_id, target_date, model_version)
+        )
+    """))
+
+def load_latest_zone_attributes(conn, zone_ids=None):
+    """Latest attributes for every zone (or just zone_ids) in a single query"""
+    columns = ', '.join(f"wd.{col}" for col in ZONE_ATTRIBUTE_COLUMNS)
+    query = text(f"""
+        SELECT z.zone_id, {columns}
+        FROM zones z
+        LEFT JOIN LATERAL (
+            SELECT {', '.join(ZONE_ATTRIBUTE_COLUMNS)}
+            FROM water_data w
+            WHERE w.zone_id = z.zone_id
+            ORDER BY w.timestamp DESC LIMIT 1
+        ) wd ON TRUE
+        {"WHERE z.zone_id = ANY(:zone_ids)" if zone_ids is not None else ""}
+        ORDER BY z.zone_id
+    """)
+    params = {"zone_ids": [int(z) for z in zone_ids]} if zone_ids is not None else {}
+    zones = pd.DataFrame(conn.execute(query, params).fetchall(), columns=['zone_id'] + ZONE_ATTRIBUTE_COLUMNS)
+    return zones.fillna(dict(zip(ZONE_ATTRIBUTE_COLUMNS, FALLBACK_ZONE_ATTRIBUTES)))
+
+def build_scoring_frame(zones, target_dates, forecast=FORECAST_DEFAULTS):
+    """Cartesian product of zones x target dates with all model features"""
+    n_zones, n_dates = len(zones), len(target_dates)
+    zone_rows = np.repeat(np.arange(n_zones), n_dates)
+    dates = np.tile(target_dates.values.astype('datetime64[D]'), n_zones)
+
+    columns = {column: zones[column].to_numpy()[zone_rows] for column in zones.columns}
+    for column, value in forecast.items():
+        columns[column] = np.full(len(zone_rows), value)
+    frame = pd.DataFrame(compute_features(columns, dates=dates))
+    frame['target_date'] = dates.astype(object)
+    return frame
+
+def score_frame(model, frame, features_order, chunk_size=CHUNK_SIZE):
+    """Predict in fixed-size chunks to bound peak memory"""
+    predictions = np.empty(len(frame))
+    for start in range(0, len(frame), chunk_size):
+        chunk = frame.iloc[start:start + chunk_size]
+        predictions[start:start + chunk_size] = model.predict(feature_frame(chunk, features_order))
+    return predictions
+
+def score_routed(frame, default_model, registry, chunk_size=CHUNK_SIZE):
+    """Predictions and model versions for frame rows, scoring each zone with its region model.
+
+    default_model is the (model, features, version) used for zones no region model covers.
+    """
+    predictions = np.empty(len(frame))
+    versions = np.full(len(frame), default_model[2], dtype=object)
+    routed = np.zeros(len(frame), dtype=bool)
+    for region, entry in registry.regions.items():
+        mask = frame['zone_id'].isin(entry['zone_ids']).to_numpy()
+        if mask.any():
+            region_model, region_features, region_version = registry.region_model(region)
+            predictions[mask] = score_frame(region_model, frame[mask], region_features, chunk_size)
+            versions[mask] = region_version
+            routed |= mask
+    if (~routed).any():
+        model, features_order, _ = default_model
+        predictions[~routed] = score_frame(model, frame[~routed], features_order, chunk_size)
+    return predictions, versions
+
+def copy_predictions(engine, rows, model_versions, first_date, last_date, retention_days=PREDICTION_RETENTION_DAYS):
+    """Replace these model versions' predictions for the horizon via COPY, in one transaction.
+
+    Retention runs in the same transaction: rows of other (no longer routed) model
+    versions, and target dates more than retention_days before today, are deleted.
+    Returns the number of rows retention removed.
+    """
+    buffer = io.StringIO()
+    rows.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+
+    raw_conn = engine.raw_connection()
+    try:
+        cursor = raw_conn.cursor()
+        cursor.execute(
+            "DELETE FROM predictions WHERE model_version = ANY(%s) AND target_date BETWEEN %s AND %s",
+            (list(model_versions), first_date, last_date)
+        )
+        cursor.execute(
+            "DELETE FROM predictions WHERE NOT (model_version = ANY(%s)) OR target_date < CURRENT_DATE - %s",
+            (list(model_versions), retention_days)
+        )
+        removed = cursor.rowcount
+        cursor.copy_expert(
+            "COPY predictions (zone_id, target_date, model_version, mld, risk_level) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+        raw_conn.commit()
+        return removed
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
+
+def serving_model_path():
+    """Artifact to serve and materialize predictions with, per MODEL_VARIANT"""
+    if MODEL_VARIANT == "compact" and os.path.exists(COMPACT_MODEL_FILENAME):
+        return COMPACT_MODEL_FILENAME
+    return MODEL_FILENAME
+
+def run_batch_scoring(horizon_days=HORIZON_DAYS, chunk_size=CHUNK_SIZE):
+    print("Starting batch scoring of all zones...")
+    engine = create_engine(os.getenv("DATABASE_URL"))
+    model_path = serving_model_path()
+    model = joblib.load(model_path)
+    model_version = get_model_version(model_path)
+    features_order = load_feature_order()
+
+    with engine.connect() as conn:
+        ensure_predictions_table(conn)
+        conn.commit()
+        zones = load_latest_zone_attributes(conn)
+
+    if zones.empty:
+        print("No zones found. Aborting batch scoring.")
+        return
+
+    tomorrow = pd.to_datetime('today').normalize() + pd.Timedelta(days=1)
+    target_dates = pd.date_range(tomorrow, periods=horizon_days, freq='D')
+    frame = build_scoring_frame(zones, target_dates)
+    print(f"Scoring {len(zones)} zones x {horizon_days} days = {len(frame)} rows (model {model_version})")
+
+    # Zones covered by a region model are scored by it, the rest by the global model
+    predictions, versions = score_routed(
+        frame, (model, features_order, model_version), ModelRegistry.load(), chunk_size
+    )
+
+    rows = pd.DataFrame({
+        'zone_id': frame['zone_id'].astype(int),
+        'target_date': frame['target_date'],
+        'model_version': versions,
+        'mld': predictions.round(2),
+        'risk_level': classify_risk(predictions)
+    })
+
+    removed = copy_predictions(engine, rows, set(versions), target_dates[0].date(), target_dates[-1].date())
+    print(f"Materialized {len(rows)} predictions for {target_dates[0].date()} to {target_dates[-1].date()}; "
+          f"removed {removed} past or retired-model rows.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score all zones and materialize the predictions table")
+    parser.add_argument("--horizon-days", type=int, default=HORIZON_DAYS)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    run_batch_scoring(args.horizon_days, args.chunk_size)
+    print("✅ Batch scoring complete!")
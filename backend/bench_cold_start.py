@@ -0,0 +1,122 @@
+"""
+COLD START BENCHMARK
+Measures API start-up in fresh interpreters: `import main`, time to the first
+response (/api/health) and time until /api/ready reports the model loaded, all
+from process launch. Runs the ASGI app in-process through Starlette's test
+client, so no server or open port is needed.
+
+Before timing, a smoke check starts the app from an empty directory with no
+DATABASE_URL and no model file: it must import, answer /api/health, and report
+not-ready (503) on /api/ready and the model endpoints. Exits 1 if it doesn't.
+
+    python bench_cold_start.py --trials 5
+    python bench_cold_start.py --model-dir /srv/models --output cold_start.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ("pandas", "sklearn", "scipy")
+
+def child(timeout):
+    """Runs in the spawned interpreter; prints one JSON line of timings"""
+    launched = float(os.environ["COLD_START_T0"])
+    started = time.time()
+    sys.path.insert(0, BACKEND_DIR)
+    import main
+    imported = time.time()
+    heavy_on_import = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    from fastapi.testclient import TestClient
+    result = {"interpreter_s": started - launched, "import_s": imported - started,
+              "heavy_modules_on_import": heavy_on_import}
+    with TestClient(main.app) as client:
+        health = client.get("/api/health")
+        result["first_response_s"] = time.time() - launched
+        result["health_status"] = health.status_code
+        deadline = time.time() + timeout
+        while True:
+            ready = client.get("/api/ready")
+            if ready.status_code == 200 or ready.json().get("status") == "failed" or time.time() > deadline:
+                break
+            time.sleep(0.01)
+        result["ready_status"] = ready.status_code
+        result["ready"] = ready.json()
+        result["ready_s"] = time.time() - launched if ready.status_code == 200 else None
+        result["predict_status"] = client.get("/api/predict/live/1").status_code if ready.status_code != 200 else None
+    print(json.dumps(result))
+
+def spawn(workdir, env, timeout):
+    env = {**env, "COLD_START_T0": repr(time.time())}
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", "--timeout", str(timeout)],
+        cwd=workdir, env=env, capture_output=True, text=True, timeout=timeout + 60
+    )
+    lines = [line for line in completed.stdout.splitlines() if line.startswith("{")]
+    if completed.returncode != 0 or not lines:
+        raise RuntimeError(f"Child failed ({completed.returncode}):\n{completed.stderr[-2000:]}")
+    return json.loads(lines[-1])
+
+def smoke_check(timeout):
+    """App starts without a database or model file, and reports itself not ready"""
+    env = {k: v for k, v in os.environ.items() if k != "DATABASE_URL"}
+    with tempfile.TemporaryDirectory() as empty:
+        # load_dotenv() searches upward from main.py, so blank out a .env DATABASE_URL too
+        result = spawn(empty, {**env, "DATABASE_URL": ""}, timeout)
+    failures = []
+    if result["health_status"] != 200:
+        failures.append(f"/api/health returned {result['health_status']}")
+    if result["ready_status"] != 503 or result["ready"].get("status") != "failed":
+        failures.append(f"/api/ready returned {result['ready_status']} {result['ready']}")
+    if result["predict_status"] != 503:
+        failures.append(f"/api/predict/live returned {result['predict_status']} without a model")
+    return result, failures
+
+def run(trials, model_dir, timeout):
+    results = [spawn(model_dir, dict(os.environ), timeout) for _ in range(trials)]
+    summary = {}
+    for key in ("interpreter_s", "import_s", "first_response_s", "ready_s"):
+        values = [r[key] for r in results if r[key] is not None]
+        summary[key] = {"median": statistics.median(values), "min": min(values), "max": max(values)} if values else None
+    return results, summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure API import-to-first-response and import-to-ready time")
+    parser.add_argument("--trials", type=int, default=5)
+    parser.add_argument("--model-dir", default=BACKEND_DIR, help="Directory with the trained model files")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for readiness")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.timeout)
+        raise SystemExit(0)
+
+    smoke, failures = smoke_check(args.timeout)
+    print(f"Smoke check (no DATABASE_URL, no model file): "
+          f"{'FAILED: ' + '; '.join(failures) if failures else 'ok'}; "
+          f"heavy modules on import: {smoke['heavy_modules_on_import'] or 'none'}")
+    if failures:
+        raise SystemExit(1)
+
+    results, summary = run(args.trials, args.model_dir, args.timeout)
+    print(f"{'Milestone (from launch)':<26} {'median s':>9} {'min s':>8} {'max s':>8}")
+    for key, label in (("interpreter_s", "interpreter up"), ("import_s", "import main (alone)"),
+                       ("first_response_s", "first response"), ("ready_s", "model ready")):
+        stats = summary[key]
+        if stats is None:
+            print(f"{label:<26} {'-':>9}   (not ready: {results[-1]['ready']})")
+            continue
+        print(f"{label:<26} {stats['median']:>9.3f} {stats['min']:>8.3f} {stats['max']:>8.3f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"smoke": smoke, "trials": results, "summary": summary}, f, indent=2)
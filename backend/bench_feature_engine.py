@@ -0,0 +1,147 @@
+"""
+FEATURE ENGINE CHECK & BENCHMARK
+Checks that feature_engine.py reproduces the derived features exactly as they
+were computed before it existed (pandas in training, scalar Python in
+/api/predict/live), then measures feature throughput in rows per second.
+Exits non-zero if any parity check fails.
+
+    python bench_feature_engine.py --rows 1000 100000 1000000
+"""
+
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from feature_engine import MODEL_FEATURES, compute_features, feature_matrix, drought_risk_index
+
+SEASON_MAP = {12: 0, 1: 0, 2: 0, 3: 1, 4: 1, 5: 1, 6: 2, 7: 2, 8: 2, 9: 2, 10: 3, 11: 3}
+
+def synthetic_columns(n_rows, seed=42):
+    """Raw (non-derived) model inputs and dates spanning several years"""
+    rng = np.random.default_rng(seed)
+    columns = {
+        'zone_id': rng.integers(1, 5000, n_rows),
+        'rainfall_mm': rng.gamma(0.7, 10, n_rows).round(2),
+        'avg_temp_celsius': rng.uniform(10, 48, n_rows).round(2),
+        'population': rng.integers(10000, 2000000, n_rows),
+        'gdp_per_capita': rng.uniform(1500, 6000, n_rows),
+        'literacy_rate': rng.uniform(60, 95, n_rows),
+        'urban_density': rng.uniform(500, 30000, n_rows),
+        'infrastructure_score': rng.uniform(3, 9, n_rows),
+        'monsoon_dependency': rng.choice([0.6, 0.65, 0.7, 0.75, 0.85], n_rows),
+        'groundwater_level': rng.uniform(2, 40, n_rows),
+        'industrial_demand': rng.uniform(1, 20, n_rows),
+        'agricultural_demand': rng.uniform(1, 25, n_rows),
+        'water_recycling_rate': rng.uniform(5, 40, n_rows),
+        'humidity': rng.uniform(10, 100, n_rows).round(2),
+        'wind_speed': rng.uniform(0.2, 8, n_rows).round(2),
+        'solar_radiation': rng.uniform(4, 30, n_rows).round(2),
+    }
+    dates = np.datetime64('2020-01-01') + rng.integers(0, 365 * 5, n_rows)
+    return columns, dates
+
+def training_reference(columns, dates):
+    """Derived features as setup_and_train.py computed them with pandas"""
+    df = pd.DataFrame(columns)
+    df['timestamp'] = pd.to_datetime(dates)
+    df['month'] = df['timestamp'].dt.month
+    df['day_of_year'] = df['timestamp'].dt.dayofyear
+    df['season'] = df['month'].map(SEASON_MAP)
+    df['drought_risk_index'] = (
+        (df['avg_temp_celsius'] - 25) * 0.1 +
+        (40 - df['rainfall_mm']) * 0.02 +
+        df['monsoon_dependency'] * 2 +
+        (100 - df['humidity']) * 0.01
+    ).clip(0, 10)
+    return df
+
+def serving_reference(row, date):
+    """Derived features as /api/predict/live computed them for a single zone"""
+    date = pd.Timestamp(date)
+    drought_risk = max(0, min(10,
+        (row['avg_temp_celsius'] - 25) * 0.1 +
+        (40 - row['rainfall_mm']) * 0.02 +
+        row['monsoon_dependency'] * 2 +
+        (100 - row['humidity']) * 0.01
+    ))
+    return {
+        'month': date.month,
+        'day_of_year': date.dayofyear,
+        'season': SEASON_MAP[date.month],
+        'drought_risk_index': drought_risk,
+    }
+
+def check_parity(n_rows=20000, n_scalar=500):
+    """List of failed checks (empty when training, serving and the engine agree)"""
+    columns, dates = synthetic_columns(n_rows)
+    engine = compute_features(columns, dates=dates)
+    reference = training_reference(columns, dates)
+    failures = []
+
+    for name in ('month', 'day_of_year', 'season'):
+        if not np.array_equal(engine[name], reference[name].to_numpy()):
+            failures.append(f"training parity: {name}")
+    if not np.allclose(engine['drought_risk_index'], reference['drought_risk_index'].to_numpy(), rtol=0, atol=1e-12):
+        failures.append("training parity: drought_risk_index")
+    if not np.array_equal(feature_matrix(engine, MODEL_FEATURES), reference[MODEL_FEATURES].to_numpy(dtype=float)):
+        failures.append("training parity: feature matrix order/values")
+
+    # Serving computes one row at a time; check it against the same engine
+    for i in range(n_scalar):
+        row = {name: values[i] for name, values in columns.items()}
+        single = compute_features({name: [value] for name, value in row.items()}, dates=[dates[i]])
+        expected = serving_reference(row, dates[i])
+        for name, value in expected.items():
+            if abs(float(single[name][0]) - value) > 1e-12:
+                failures.append(f"serving parity: {name} row {i}")
+                break
+
+    # Leap years and year boundaries
+    edges = np.array(['2024-02-29', '2024-12-31', '2023-12-31', '2024-01-01', '2024-03-01'], dtype='datetime64[D]')
+    edge_frame = training_reference({'avg_temp_celsius': np.zeros(5), 'rainfall_mm': np.zeros(5),
+                                     'monsoon_dependency': np.zeros(5), 'humidity': np.zeros(5)}, edges)
+    edge_engine = compute_features({'drought_risk_index': np.zeros(5)}, dates=edges)
+    if not np.array_equal(edge_engine['day_of_year'], edge_frame['day_of_year'].to_numpy()):
+        failures.append("calendar edge cases: day_of_year")
+
+    # Clipping at both ends
+    clipped = drought_risk_index(np.array([120.0, -20.0]), np.array([0.0, 500.0]), np.array([1.0, 0.0]), np.array([0.0, 100.0]))
+    if clipped.tolist() != [10.0, 0.0]:
+        failures.append("drought_risk_index clipping")
+    return failures
+
+def rows_per_second(fn, n_rows, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return n_rows * repeat / (time.perf_counter() - started)
+
+def benchmark(row_counts, repeat=5):
+    print(f"{'rows':>10}  {'pandas (training)':>18}  {'feature engine':>15}  {'engine + matrix':>16}  {'scalar (serving)':>17}")
+    for n_rows in row_counts:
+        columns, dates = synthetic_columns(n_rows)
+        pandas_rate = rows_per_second(lambda: training_reference(columns, dates), n_rows, repeat)
+        engine_rate = rows_per_second(lambda: compute_features(columns, dates=dates), n_rows, repeat)
+        matrix_rate = rows_per_second(
+            lambda: feature_matrix(compute_features(columns, dates=dates), MODEL_FEATURES), n_rows, repeat)
+
+        n_scalar = min(n_rows, 2000)
+        rows = [{name: values[i] for name, values in columns.items()} for i in range(n_scalar)]
+        scalar_rate = rows_per_second(lambda: [serving_reference(row, dates[i]) for i, row in enumerate(rows)], n_scalar, 1)
+        print(f"{n_rows:>10,}  {pandas_rate:>16,.0f}/s  {engine_rate:>13,.0f}/s  {matrix_rate:>14,.0f}/s  {scalar_rate:>15,.0f}/s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check feature engine parity and measure rows/sec")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    failures = check_parity()
+    if failures:
+        print("❌ Parity checks failed:")
+        for failure in failures:
+            print(f"   - {failure}")
+        sys.exit(1)
+    print("✅ Training/serving parity checks passed.")
+    benchmark(args.rows, args.repeat)
@@ -0,0 +1,105 @@
+"""
+PREDICTION INTERVAL BENCHMARK
+Times batch prediction (model.predict on a zones x horizon scoring frame) against
+predict_with_uncertainty on the same frame, checks that both give the same point
+estimates and that quantiles/band probabilities match NumPy's reference
+computation, and reports the interval overhead. Exits non-zero if the overhead
+exceeds --max-overhead.
+
+    python bench_intervals.py --zones 1000 7000 --model water_model.joblib
+"""
+
+import sys
+import time
+import argparse
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from batch_score import RISK_THRESHOLDS, HORIZON_DAYS, FORECAST_DEFAULTS, ZONE_ATTRIBUTE_COLUMNS, build_scoring_frame
+from feature_engine import MODEL_FEATURES, compute_features, feature_frame
+from forest_intervals import DEFAULT_QUANTILES, tree_predictions, summarize_trees, predict_with_uncertainty
+from bench_feature_engine import synthetic_columns
+
+def synthetic_model(n_rows=20000, seed=42):
+    """Forest with the production hyperparameters, fit on synthetic rows"""
+    columns, dates = synthetic_columns(n_rows, seed)
+    X = feature_frame(compute_features(columns, dates=dates), MODEL_FEATURES)
+    y = (X['population'] / 10000 * (1 + X['drought_risk_index'] / 10) + X['industrial_demand']
+         + X['agricultural_demand'] * (1 - X['rainfall_mm'] / 100) + np.random.default_rng(seed).normal(0, 2, n_rows))
+    return RandomForestRegressor(
+        n_estimators=200, max_depth=15, min_samples_split=5, min_samples_leaf=2, random_state=42, n_jobs=-1
+    ).fit(X, y)
+
+def synthetic_zones(n_zones, seed=42):
+    columns, _ = synthetic_columns(n_zones, seed)
+    zones = pd.DataFrame({name: columns[name] for name in ZONE_ATTRIBUTE_COLUMNS})
+    zones.insert(0, 'zone_id', np.arange(1, n_zones + 1))
+    return zones
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+def check_summary(model, X):
+    """Failed checks of the single-pass statistics against reference computations"""
+    failures = []
+    per_tree = tree_predictions(model, X)
+    summary = summarize_trees(per_tree, RISK_THRESHOLDS)
+    if not np.allclose(summary["mean"], model.predict(X)):
+        failures.append("mean of trees differs from model.predict")
+    if not np.allclose(summary["quantiles"], np.quantile(per_tree, DEFAULT_QUANTILES, axis=1).T):
+        failures.append("quantiles differ from np.quantile")
+    codes = np.digitize(per_tree, RISK_THRESHOLDS, right=True)
+    reference = np.stack([(codes == band).mean(axis=1) for band in range(len(RISK_THRESHOLDS) + 1)], axis=1)
+    if not np.allclose(summary["band_probabilities"], reference):
+        failures.append("band probabilities differ from per-tree classify_risk")
+    return failures
+
+def run(zone_counts, model, features, repeat):
+    target_dates = pd.date_range(pd.Timestamp.today().normalize(), periods=HORIZON_DAYS, freq='D')
+    print(f"{'rows':>10}  {'predict':>10}  {'+intervals':>11}  {'overhead':>9}")
+    worst = 0.0
+    for n_zones in zone_counts:
+        X = feature_frame(build_scoring_frame(synthetic_zones(n_zones), target_dates, FORECAST_DEFAULTS), features)
+        model.predict(X[:10])  # warm up the thread pool
+        predict_s, _ = best_of(lambda: model.predict(X), repeat)
+        interval_s, _ = best_of(lambda: predict_with_uncertainty(model, X, RISK_THRESHOLDS), repeat)
+        overhead = interval_s / predict_s - 1
+        worst = max(worst, overhead)
+        print(f"{len(X):>10,}  {predict_s * 1000:>8.0f}ms  {interval_s * 1000:>9.0f}ms  {overhead:>8.1%}")
+    return worst
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the cost of forest prediction intervals")
+    parser.add_argument("--zones", type=int, nargs="+", default=[1000, 7000])
+    parser.add_argument("--model", help="Trained model (default: synthetic forest with production settings)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-overhead", type=float, default=0.20)
+    args = parser.parse_args()
+
+    if args.model:
+        model, features = joblib.load(args.model), MODEL_FEATURES
+    else:
+        print("Fitting synthetic forest (200 trees, depth 15)...")
+        model, features = synthetic_model(), MODEL_FEATURES
+
+    target_dates = pd.date_range(pd.Timestamp.today().normalize(), periods=HORIZON_DAYS, freq='D')
+    sample = feature_frame(build_scoring_frame(synthetic_zones(200), target_dates, FORECAST_DEFAULTS), features)
+    failures = check_summary(model, sample)
+    if failures:
+        print("❌ Interval checks failed:")
+        for failure in failures:
+            print(f"   - {failure}")
+        sys.exit(1)
+    print("✅ Point estimates, quantiles and band probabilities match the reference computations.")
+
+    worst = run(args.zones, model, features, args.repeat)
+    if worst > args.max_overhead:
+        print(f"❌ Interval overhead {worst:.1%} exceeds {args.max_overhead:.0%}.")
+        sys.exit(1)
+    print(f"✅ Interval overhead at most {worst:.1%} (limit {args.max_overhead:.0%}).")
@@ -0,0 +1,105 @@
+"""
+SERIALIZATION BENCHMARK
+Compares the default FastAPI encoding path (jsonable_encoder + json.dumps) with
+orjson / pre-serialized bytes for the /api/zones and multi-year /api/history
+responses, and reports payload sizes with gzip and brotli.
+
+    python bench_serialization.py --zones 53 700 10000 --years 1 4 10
+"""
+
+import json
+import gzip
+import time
+import random
+import argparse
+import datetime
+from fastapi.encoders import jsonable_encoder
+from fast_responses import dumps, brotli, GZIP_LEVEL, BROTLI_QUALITY
+
+def synthetic_zones(n_zones):
+    """FeatureCollection shaped like the /api/zones response"""
+    features = []
+    for zone_id in range(1, n_zones + 1):
+        lon, lat = random.uniform(68, 97), random.uniform(8, 35)
+        ring = [[round(lon, 6), round(lat, 6)], [round(lon + 0.02, 6), round(lat, 6)],
+                [round(lon + 0.02, 6), round(lat + 0.02, 6)], [round(lon, 6), round(lat + 0.02, 6)],
+                [round(lon, 6), round(lat, 6)]]
+        features.append({
+            "type": "Feature",
+            "id": zone_id,
+            "properties": {"name": f"Zone {zone_id}"},
+            "geometry": {"type": "Polygon", "coordinates": [ring]}
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+def synthetic_history(n_days):
+    """Rows shaped like the /api/history response"""
+    start = datetime.date(2024, 12, 31)
+    return [
+        {"timestamp": start - datetime.timedelta(days=i),
+         "rainfall": round(random.uniform(0, 40), 2),
+         "temperature": round(random.uniform(15, 42), 2)}
+        for i in range(n_days)
+    ]
+
+def fastapi_default(content):
+    """What JSONResponse does for a returned dict/list"""
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+def cpu_ms(fn, repeat):
+    started = time.process_time()
+    for _ in range(repeat):
+        result = fn()
+    return (time.process_time() - started) * 1000 / repeat, result
+
+def measure(name, content, pre_serialized=None, repeat=20):
+    default_ms, default_body = cpu_ms(lambda: fastapi_default(content), repeat)
+    if pre_serialized is not None:
+        # /api/zones: PostGIS returns JSON text, so only the bytes conversion remains
+        fast_ms, fast_body = cpu_ms(lambda: pre_serialized.encode(), repeat)
+    else:
+        fast_ms, fast_body = cpu_ms(lambda: dumps(content), repeat)
+    gzip_ms, gzip_body = cpu_ms(lambda: gzip.compress(fast_body, compresslevel=GZIP_LEVEL), max(1, repeat // 4))
+    result = {
+        "response": name,
+        "default_ms": round(default_ms, 3),
+        "fast_ms": round(fast_ms, 3),
+        "speedup": round(default_ms / fast_ms, 1) if fast_ms else None,
+        "raw_bytes": len(fast_body),
+        "default_bytes": len(default_body),
+        "gzip_bytes": len(gzip_body),
+        "gzip_ms": round(gzip_ms, 3),
+    }
+    if brotli is not None:
+        br_ms, br_body = cpu_ms(lambda: brotli.compress(fast_body, quality=BROTLI_QUALITY), max(1, repeat // 4))
+        result.update({"br_bytes": len(br_body), "br_ms": round(br_ms, 3)})
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark JSON serialization and compression")
+    parser.add_argument("--zones", type=int, nargs="+", default=[53, 700, 10000])
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 4, 10])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    random.seed(42)
+
+    results = []
+    for n_zones in args.zones:
+        zones = synthetic_zones(n_zones)
+        results.append(measure(f"zones x{n_zones}", zones, json.dumps(zones), args.repeat))
+    for years in args.years:
+        results.append(measure(f"history {years}y", synthetic_history(365 * years), repeat=args.repeat))
+
+    print(f"{'Response':<16} {'default ms':>11} {'fast ms':>9} {'speedup':>8} {'raw KB':>9} {'gzip KB':>9} {'br KB':>9}")
+    print("-" * 80)
+    for r in results:
+        br_kb = f"{r['br_bytes'] / 1024:.1f}" if "br_bytes" in r else "-"
+        print(f"{r['response']:<16} {r['default_ms']:>11} {r['fast_ms']:>9} {str(r['speedup']) + 'x':>8} "
+              f"{r['raw_bytes'] / 1024:>9.1f} {r['gzip_bytes'] / 1024:>9.1f} {br_kb:>9}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
@@ -0,0 +1,60 @@
+"""
+DATABASE ENGINES
+Sync engine for the model paths and an asyncio-native (asyncpg) engine for the
+read endpoints, both with pool size, overflow, pre-ping and statement timeout
+configured from the environment, plus a small sync write engine with no statement
+timeout for zone creation and bulk imports, which may legitimately run long.
+"""
+
+import os
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- Pool Configuration ---
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000"))
+DB_WRITE_POOL_SIZE = int(os.getenv("DB_WRITE_POOL_SIZE", "2"))
+# asyncpg prepares each distinct SQL string once per connection and caches it
+DB_PREPARED_STATEMENT_CACHE = int(os.getenv("DB_PREPARED_STATEMENT_CACHE", "100"))
+
+def _pool_options(pool_size=DB_POOL_SIZE):
+    return {
+        "pool_size": pool_size,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+def async_database_url(url):
+    """Rewrite a postgresql:// or postgresql+psycopg2:// URL for asyncpg"""
+    scheme, rest = url.split("://", 1)
+    return f"postgresql+asyncpg://{rest}" if scheme.startswith("postgres") else url
+
+def create_sync_engine(url=None):
+    return create_engine(
+        url or os.getenv("DATABASE_URL"),
+        connect_args={"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"},
+        **_pool_options()
+    )
+
+def create_write_engine(url=None):
+    """Sync engine for writes and imports: no statement timeout, small pool"""
+    return create_engine(url or os.getenv("DATABASE_URL"), **_pool_options(DB_WRITE_POOL_SIZE))
+
+def create_read_engine(url=None):
+    return create_async_engine(
+        async_database_url(url or os.getenv("DATABASE_URL")),
+        connect_args={
+            "server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)},
+            "prepared_statement_cache_size": DB_PREPARED_STATEMENT_CACHE,
+        },
+        **_pool_options()
+    )
@@ -0,0 +1,77 @@
+"""
+FAST RESPONSES
+orjson serialization and Accept-Encoding negotiation (brotli, gzip) for the large
+API responses, plus a holder for pre-serialized payloads whose compressed variants
+are computed once and reused.
+"""
+
+import os
+import gzip
+import threading
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+def dumps(content):
+    """Serialize to JSON bytes (dates, datetimes and numpy arrays handled natively)"""
+    return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+def negotiate_encoding(request: Request, size):
+    """Best content encoding the client accepts, or None for small bodies"""
+    if size < COMPRESSION_MIN_BYTES:
+        return None
+    accepted = {
+        part.split(";")[0].strip().lower()
+        for part in request.headers.get("accept-encoding", "").split(",")
+        if not part.strip().endswith(";q=0")
+    }
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+def _response(body, encoding):
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def json_response(request: Request, content=None, body=None):
+    """JSON response from a Python object (or already-serialized bytes), compressed when worthwhile"""
+    if body is None:
+        body = dumps(content)
+    encoding = negotiate_encoding(request, len(body))
+    return _response(compress(body, encoding), encoding)
+
+class SerializedPayload:
+    """Pre-serialized JSON bytes with lazily computed, cached compressed variants"""
+
+    def __init__(self, body):
+        self.body = body
+        self._encoded = {None: body}
+        self._lock = threading.Lock()
+
+    def response(self, request: Request):
+        encoding = negotiate_encoding(request, len(self.body))
+        with self._lock:
+            if encoding not in self._encoded:
+                self._encoded[encoding] = compress(self.body, encoding)
+            encoded = self._encoded[encoding]
+        return _response(encoded, encoding)
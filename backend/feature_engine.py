@@ -0,0 +1,78 @@
+"""
+FEATURE ENGINE
+Single definition of the derived model features (calendar features, season and
+drought_risk_index) and of the model's feature order. Works on NumPy column
+arrays of any length, so training, live predictions, batch scoring and what-if
+scenarios all compute features with the same code.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Enhanced feature set with real Indian factors, in model input order
+MODEL_FEATURES = [
+    'zone_id', 'rainfall_mm', 'avg_temp_celsius', 'population', 'month', 'day_of_year', 'season',
+    'gdp_per_capita', 'literacy_rate', 'urban_density', 'infrastructure_score',
+    'monsoon_dependency', 'groundwater_level', 'industrial_demand', 'agricultural_demand',
+    'water_recycling_rate', 'drought_risk_index', 'humidity', 'wind_speed', 'solar_radiation'
+]
+
+# Feature set of models trained before the enhanced factors existed
+BASIC_FEATURES = ['zone_id', 'rainfall_mm', 'avg_temp_celsius', 'population', 'month', 'day_of_year']
+
+# Season by month (index 1-12): 0 Winter, 1 Summer, 2 Monsoon, 3 Post-monsoon
+SEASON_BY_MONTH = np.array([-1, 0, 0, 1, 1, 1, 2, 2, 2, 2, 3, 3, 0])
+
+def season(month):
+    return SEASON_BY_MONTH[month]
+
+def drought_risk_index(avg_temp_celsius, rainfall_mm, monsoon_dependency, humidity):
+    """Multi-factor drought risk (0-10) from temperature, rain, monsoon dependency and humidity"""
+    return np.clip(
+        (avg_temp_celsius - 25) * 0.1 +
+        (40 - rainfall_mm) * 0.02 +
+        monsoon_dependency * 2 +
+        (100 - humidity) * 0.01,
+        0, 10
+    )
+
+def calendar_features(dates):
+    """month, day_of_year and season for an array of dates"""
+    days = np.asarray(dates, dtype='datetime64[D]')
+    month = days.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    day_of_year = (days - days.astype('datetime64[Y]')).astype(np.int64) + 1
+    return {'month': month, 'day_of_year': day_of_year, 'season': season(month)}
+
+def compute_features(columns, dates=None):
+    """Add the derived features to a dict of equal-length column arrays.
+
+    `dates` (anything convertible to datetime64) fills month/day_of_year/season;
+    drought_risk_index is computed from the weather and monsoon columns unless present.
+    """
+    columns = {name: np.asarray(values) for name, values in columns.items()}
+    if dates is not None:
+        columns.update(calendar_features(dates))
+    if 'drought_risk_index' not in columns:
+        columns['drought_risk_index'] = drought_risk_index(
+            columns['avg_temp_celsius'], columns['rainfall_mm'],
+            columns['monsoon_dependency'], columns['humidity']
+        )
+    return columns
+
+def available_features(columns, features):
+    """Features of `features` present in `columns`, in model order"""
+    return [f for f in features if f in columns]
+
+def feature_matrix(columns, features):
+    """(n_rows, n_features) float64 matrix in model order"""
+    names = available_features(columns, features)
+    n_rows = max(np.size(columns[name]) for name in names)
+    matrix = np.empty((n_rows, len(names)))
+    for j, name in enumerate(names):
+        matrix[:, j] = columns[name]
+    return matrix
+
+def feature_frame(columns, features):
+    """Model input as a DataFrame (models are fit with feature names)"""
+    names = available_features(columns, features)
+    return pd.DataFrame(feature_matrix(columns, names), columns=names)
@@ -0,0 +1,122 @@
+"""
+API LOAD TEST
+Drives the read endpoints with N concurrent clients and reports throughput and
+latency percentiles. Run it against two servers (e.g. the current build and a
+baseline checkout on another port) with --compare to get a side-by-side result.
+
+    python load_test.py --url http://localhost:8000 --clients 500 --duration 30
+    python load_test.py --url http://localhost:8000 --compare http://localhost:8001
+"""
+
+import time
+import json
+import random
+import asyncio
+import argparse
+import numpy as np
+import httpx
+
+DEFAULT_ENDPOINTS = [
+    "/api/zones",
+    "/api/history/{zone_id}",
+    "/api/zone-factors/{zone_id}",
+    "/api/predict/live/{zone_id}",
+]
+
+def summarize(latencies, errors, elapsed):
+    """Throughput and latency percentiles (ms) for one endpoint or a whole run"""
+    latencies_ms = np.asarray(latencies) * 1000
+    completed = len(latencies_ms)
+    summary = {
+        "requests": completed + errors,
+        "errors": errors,
+        "throughput_rps": round(completed / elapsed, 1) if elapsed else 0.0,
+    }
+    if completed:
+        p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+        summary.update({
+            "mean_ms": round(float(latencies_ms.mean()), 2),
+            "p50_ms": round(float(p50), 2),
+            "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2),
+            "max_ms": round(float(latencies_ms.max()), 2),
+        })
+    return summary
+
+async def _client(client, endpoints, zone_ids, deadline, results):
+    while time.perf_counter() < deadline:
+        endpoint = random.choice(endpoints)
+        path = endpoint.format(zone_id=random.choice(zone_ids))
+        started = time.perf_counter()
+        try:
+            response = await client.get(path)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        latency = time.perf_counter() - started
+        record = results.setdefault(endpoint, {"latencies": [], "errors": 0})
+        if ok:
+            record["latencies"].append(latency)
+        else:
+            record["errors"] += 1
+
+async def run_load(url, clients=500, duration=30.0, endpoints=None, zone_ids=None, timeout=30.0):
+    """Run `clients` concurrent request loops for `duration` seconds"""
+    endpoints = endpoints or DEFAULT_ENDPOINTS
+    zone_ids = zone_ids or list(range(1, 54))
+    results = {}
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=timeout) as client:
+        # Warm up connections, caches and prepared statements before measuring
+        await asyncio.gather(*(client.get(e.format(zone_id=zone_ids[0])) for e in endpoints), return_exceptions=True)
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(_client(client, endpoints, zone_ids, deadline, results) for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    report = {
+        "url": url,
+        "clients": clients,
+        "duration_s": round(elapsed, 2),
+        "endpoints": {e: summarize(r["latencies"], r["errors"], elapsed) for e, r in results.items()},
+    }
+    all_latencies = [l for r in results.values() for l in r["latencies"]]
+    report["overall"] = summarize(all_latencies, sum(r["errors"] for r in results.values()), elapsed)
+    return report
+
+def print_report(report):
+    print(f"\n{report['url']}  ({report['clients']} clients, {report['duration_s']}s)")
+    print(f"{'Endpoint':<32} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    print("-" * 80)
+    rows = list(report["endpoints"].items()) + [("overall", report["overall"])]
+    for name, s in rows:
+        print(f"{name:<32} {s['throughput_rps']:>9} {s.get('p50_ms', '-'):>9} "
+              f"{s.get('p95_ms', '-'):>9} {s.get('p99_ms', '-'):>9} {s['errors']:>7}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent load test for the water scarcity API")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--compare", help="Baseline server URL to run the same load against")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--endpoint", action="append", dest="endpoints", help="Endpoint path (repeatable)")
+    parser.add_argument("--zones", type=int, default=53, help="Zone ids 1..N to sample from")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    zone_ids = list(range(1, args.zones + 1))
+    reports = []
+    for url in filter(None, [args.url, args.compare]):
+        report = asyncio.run(run_load(url, args.clients, args.duration, args.endpoints, zone_ids))
+        print_report(report)
+        reports.append(report)
+
+    if len(reports) == 2:
+        current, baseline = reports[0]["overall"], reports[1]["overall"]
+        print(f"\nThroughput: {current['throughput_rps']} vs {baseline['throughput_rps']} req/s (baseline)")
+        print(f"p99:        {current.get('p99_ms')} vs {baseline.get('p99_ms')} ms (baseline)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports if len(reports) > 1 else reports[0], f, indent=2)
+        print(f"\nReport written to {args.output}")
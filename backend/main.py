@@ -1,20 +1,157 @@
 import os
+import time
+import asyncio
 import joblib
-import pandas as pd
 import json
-from fastapi import FastAPI, HTTPException
+import orjson
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, text
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import text
 from dotenv import load_dotenv
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+import datetime
+from prediction_cache import PredictionCache, forecast_key
+from model_registry import ModelRegistry, get_model_version
+from db import create_sync_engine, create_read_engine, create_write_engine
+from fast_responses import SerializedPayload, json_response
+from zone_import import (
+    BulkImportError, check_content_length, read_body, parse_feature_collection, read_ndjson, import_features
+)
+from risk_stream import MAX_STREAM_ZONES, RiskBroadcaster
+from admission import AdmissionLimiter, Overloaded, request_timeout
+# The scoring stack (batch_score, feature_engine, forest_intervals, scenarios,
+# aggregation: pandas, numpy and sklearn through the model) is imported where it
+# is used; warm_up() imports it and loads the models in the background at startup
 
 
 load_dotenv()
 
-# --- App, DB, and Model Setup ---
-app = FastAPI(title="REAL TIME WATER SCARCITY PREDICTION")
-engine = create_engine(os.getenv("DATABASE_URL"))
-model = joblib.load("water_model.joblib")
+# --- DB and Model State ---
+# Created by the lifespan hook, so importing this module needs no database or model file
+engine = None
+read_engine = None
+write_engine = None
+model = None
+model_path = None
+model_version = None
+features_order = None
+registry = ModelRegistry()
+# "background" serves requests while the model loads; "blocking" finishes loading before startup completes
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "background")
+# How long a request needing the model waits for the warm-up before a 503
+MODEL_WAIT_SECONDS = float(os.getenv("MODEL_WAIT_SECONDS", "10"))
+warmup = {"status": "starting", "error": None, "seconds": None}
+warmup_task = None
+schema_task = None
+prediction_cache = PredictionCache(
+    maxsize=int(os.getenv("PREDICTION_CACHE_SIZE", "4096")),
+    ttl_seconds=float(os.getenv("PREDICTION_CACHE_TTL", "3600"))
+)
+# Region rollups, keyed by region, date, forecast and serving model versions
+aggregate_cache = PredictionCache(
+    maxsize=int(os.getenv("AGGREGATE_CACHE_SIZE", "256")),
+    ttl_seconds=float(os.getenv("PREDICTION_CACHE_TTL", "3600"))
+)
+# Pre-serialized /api/zones body as (expires_at, payload); dropped when zones change or
+# /api/cache/invalidate is called, and expires like the other response caches so zones
+# written outside the API (seed_zones.sql, synthetic_data.py, another worker) show up
+zones_payload = None
+ZONES_PAYLOAD_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "3600"))
+MAX_HISTORY_DAYS = 3660
+# Largest |start| / |stop| accepted for a scenario adjustment axis
+SCENARIO_AXIS_BOUND = 1000.0
+# Concurrency limits and bounded queues in front of the DB + model endpoints;
+# cached answers bypass them, shed requests get 503 + Retry-After
+admission = {
+    "predict": AdmissionLimiter.from_env("predict", 16, 64, 2.0),
+    "scenarios": AdmissionLimiter.from_env("scenarios", 2, 8, 5.0),
+    "aggregate": AdmissionLimiter.from_env("aggregate", 4, 16, 5.0),
+}
+# Serve the last cached/materialized result to shed requests when there is one
+ADMISSION_DEGRADED = os.getenv("ADMISSION_DEGRADED", "true").lower() in ("1", "true", "yes")
+DEGRADED_LOOKUP_SECONDS = 0.5
+NDJSON_CONTENT_TYPES = {"application/x-ndjson", "application/geo+json-seq", "application/jsonl"}
+
+def load_models():
+    """Load the serving model, its feature order and the region registry from disk"""
+    global model, model_path, model_version, features_order, registry
+    from batch_score import load_feature_order, serving_model_path
+    path = serving_model_path()
+    loaded = joblib.load(path)
+    version = get_model_version(path)
+    order = load_feature_order()
+    region_registry = ModelRegistry.load()
+    model, model_path, model_version, features_order, registry = loaded, path, version, order, region_registry
+
+def check_zone_schema():
+    """Add zones.centroid if the database predates it; zone creation and bulk import write it"""
+    from schema import ensure_zone_centroid
+    try:
+        with engine.connect() as conn:
+            if not ensure_zone_centroid(conn):
+                print("WARNING: no zones table; run `python schema.py` before creating zones.")
+    except Exception as e:
+        print(f"WARNING: could not check the zones schema ({e}); zone creation may fail.")
+
+def warm_up():
+    """Import the scoring stack and load the models (runs in the threadpool at startup)"""
+    started = time.perf_counter()
+    warmup["status"] = "loading"
+    try:
+        import batch_score, feature_engine, forest_intervals, scenarios, aggregation  # noqa: F401
+        load_models()
+    except Exception as e:
+        warmup.update(status="failed", error=f"{type(e).__name__}: {e}")
+        print(f"WARNING: Model warm-up failed: {warmup['error']}")
+    else:
+        warmup["status"] = "ready"
+    warmup["seconds"] = round(time.perf_counter() - started, 3)
+
+async def require_model():
+    """Wait (bounded) for the warm-up to load the model, or fail with 503"""
+    if model is not None:
+        return
+    if warmup_task is not None and not warmup_task.done():
+        try:
+            await asyncio.wait_for(asyncio.shield(warmup_task), timeout=MODEL_WAIT_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+    if model is None:
+        raise HTTPException(
+            status_code=503, detail=f"Model not loaded ({warmup['error'] or 'warming up'}).", headers={"Retry-After": "5"}
+        )
+
+def require_database():
+    """Fail with 503 when the API runs without DATABASE_URL"""
+    if engine is None:
+        raise HTTPException(status_code=503, detail="Database not configured (DATABASE_URL is not set).")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global engine, read_engine, write_engine, warmup_task, schema_task
+    if os.getenv("DATABASE_URL"):
+        engine = create_sync_engine()
+        read_engine = create_read_engine()
+        write_engine = create_write_engine()
+        schema_task = asyncio.create_task(run_in_threadpool(check_zone_schema))
+    else:
+        print("WARNING: DATABASE_URL is not set; database endpoints are unavailable.")
+    warmup_task = asyncio.create_task(run_in_threadpool(warm_up))
+    if MODEL_WARMUP == "blocking":
+        await warmup_task
+    risk_broadcaster.start()
+    yield
+    await risk_broadcaster.stop()
+    if engine is not None:
+        await read_engine.dispose()
+        engine.dispose()
+        write_engine.dispose()
+
+app = FastAPI(title="REAL TIME WATER SCARCITY PREDICTION", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -24,6 +161,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def current_risk(zone_ids, target_date):
+    """{zone_id: (predicted_mld, risk_level)} for the risk stream, materialized or batch-scored"""
+    from batch_score import FORECAST_DEFAULTS, classify_risk
+    from aggregation import zone_predictions
+    with engine.connect() as conn:
+        mld, *_ = zone_predictions(
+            conn, zone_ids, target_date, FORECAST_DEFAULTS, (model, features_order, model_version), registry
+        )
+    return {
+        int(zone_id): (round(float(value), 2), str(level))
+        for zone_id, value, level in zip(zone_ids, mld, classify_risk(mld))
+    }
+
+risk_broadcaster = RiskBroadcaster(current_risk)
+
 # --- Pydantic Models ---
 class ZoneInput(BaseModel):
     name: str
@@ -32,68 +184,150 @@ class ZoneInput(BaseModel):
 class PredictionOutput(BaseModel):
     predicted_consumption_mld: float
     risk_level: str
+    # Only with ?intervals=true: spread of the forest's trees
+    std_mld: Optional[float] = None
+    quantiles_mld: Optional[Dict[str, float]] = None
+    risk_probabilities: Optional[Dict[str, float]] = None
+    # Only when shed under load: where the answer came from ("cache" or "materialized")
+    # and, for a materialized row, the date it was scored for
+    degraded: Optional[str] = None
+    target_date: Optional[datetime.date] = None
+
+class ScenarioRange(BaseModel):
+    start: float = Field(0.0, ge=-SCENARIO_AXIS_BOUND, le=SCENARIO_AXIS_BOUND)
+    stop: float = Field(0.0, ge=-SCENARIO_AXIS_BOUND, le=SCENARIO_AXIS_BOUND)
+    step: float = Field(1.0, gt=0)
+
+class ScenarioInput(BaseModel):
+    zone_ids: List[int] = Field(..., min_length=1)
+    target_date: Optional[datetime.date] = None
+    temperature_delta: ScenarioRange = ScenarioRange()   # °C added to the forecast
+    rainfall_pct: ScenarioRange = ScenarioRange()        # % change of forecast rainfall
+    humidity_delta: ScenarioRange = ScenarioRange()      # points added to forecast humidity
+    groundwater_delta: ScenarioRange = ScenarioRange()   # meters added to groundwater level
+
+class AggregateInput(BaseModel):
+    geometry: dict                      # GeoJSON Polygon/MultiPolygon, or a Feature with one
+    target_date: Optional[datetime.date] = None
+    include_zones: bool = False
+
+# --- Hot Read Queries ---
+# Fixed SQL text so asyncpg reuses one prepared statement per pooled connection
+ZONES_QUERY = text("SELECT json_build_object('type','FeatureCollection','features',json_agg(json_build_object('type','Feature','id',zone_id,'properties',json_build_object('name',zone_name),'geometry',ST_AsGeoJSON(geometry)::json)))::text FROM zones;")
+
+HISTORY_QUERY = text("""
+    SELECT "timestamp", rainfall_mm, avg_temp_celsius
+    FROM water_data
+    WHERE zone_id = :z_id
+    ORDER BY "timestamp" DESC
+    LIMIT :days;
+""")
+
+# Degraded mode: the zone's most recent materialized prediction, preferring the serving model's
+LATEST_PREDICTION_QUERY = text("""
+    SELECT mld, risk_level, target_date
+    FROM predictions
+    WHERE zone_id = :z_id AND target_date <= :target_date
+    ORDER BY target_date DESC, (model_version = :version) DESC
+    LIMIT 1
+""")
+
+EXISTING_ZONES_QUERY = text("SELECT zone_id FROM zones WHERE zone_id = ANY(:zone_ids) ORDER BY zone_id")
+
+ZONE_FACTORS_QUERY = text("""
+    SELECT zone_name, 
+           AVG(population) as avg_population,
+           AVG(gdp_per_capita) as avg_gdp_per_capita,
+           AVG(literacy_rate) as avg_literacy_rate,
+           AVG(urban_density) as avg_urban_density,
+           AVG(infrastructure_score) as avg_infrastructure_score,
+           AVG(monsoon_dependency) as avg_monsoon_dependency,
+           AVG(groundwater_level) as avg_groundwater_level,
+           AVG(industrial_demand) as avg_industrial_demand,
+           AVG(agricultural_demand) as avg_agricultural_demand,
+           AVG(water_recycling_rate) as avg_water_recycling_rate,
+           AVG(drought_risk_index) as avg_drought_risk_index
+    FROM water_data wd
+    JOIN zones z ON wd.zone_id = z.zone_id
+    WHERE wd.zone_id = :z_id
+    GROUP BY zone_name
+""")
 
 # --- API Endpoints ---
 @app.get("/api/zones")
-def get_zones():
-    with engine.connect() as conn:
-        query = text("SELECT json_build_object('type','FeatureCollection','features',json_agg(json_build_object('type','Feature','id',zone_id,'properties',json_build_object('name',zone_name),'geometry',ST_AsGeoJSON(geometry)::json))) FROM zones;")
-        result = conn.execute(query).scalar_one_or_none()
-        return result or {"type": "FeatureCollection", "features": []}
+async def get_zones(request: Request):
+    global zones_payload
+    require_database()
+    cached = zones_payload
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1].response(request)
+    async with read_engine.connect() as conn:
+        result = (await conn.execute(ZONES_QUERY)).scalar_one_or_none()
+    # PostGIS already produced the JSON text, so it is sent as-is
+    body = result.encode() if result else b'{"type": "FeatureCollection", "features": []}'
+    payload = SerializedPayload(body)
+    zones_payload = (time.monotonic() + ZONES_PAYLOAD_TTL, payload)
+    return payload.response(request)
 
 @app.post("/api/zones", status_code=201)
 def create_zone(zone: ZoneInput):
+    global zones_payload
+    require_database()
     geometry_geojson = json.dumps(zone.geometry)
-    with engine.connect() as conn:
+    with write_engine.connect() as conn:
         try:
-            query = text("INSERT INTO zones (zone_name, geometry) VALUES (:name, ST_GeomFromGeoJSON(:geom))")
+            query = text("""
+                INSERT INTO zones (zone_name, geometry, centroid)
+                VALUES (:name, ST_GeomFromGeoJSON(:geom), ST_Centroid(ST_GeomFromGeoJSON(:geom)))
+            """)
             conn.execute(query, {"name": zone.name, "geom": geometry_geojson})
             conn.commit()
+            zones_payload = None
+            aggregate_cache.invalidate()
             return {"message": f"Zone '{zone.name}' created successfully."}
         except Exception as e:
             conn.rollback()
             raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/zones/bulk")
+async def create_zones_bulk(request: Request):
+    """Import a GeoJSON FeatureCollection, or NDJSON with one Feature per line, in one transaction"""
+    global zones_payload
+    require_database()
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    try:
+        check_content_length(request.headers.get("content-length"))
+        if content_type in NDJSON_CONTENT_TYPES:
+            features = await read_ndjson(request.stream())
+        else:
+            features = parse_feature_collection(await read_body(request.stream()))
+        summary = await run_in_threadpool(import_features, write_engine, features)
+    except BulkImportError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+    if summary["counts"].get("created"):
+        zones_payload = None
+        aggregate_cache.invalidate()
+    return json_response(request, summary)
+
 # --- NEW: Endpoint to get historical data for charts ---
 @app.get("/api/history/{zone_id}")
-def get_history(zone_id: int):
-    with engine.connect() as conn:
-        # Get the last 365 days of data for the specified zone
-        query = text("""
-            SELECT "timestamp", rainfall_mm, avg_temp_celsius
-            FROM water_data
-            WHERE zone_id = :z_id
-            ORDER BY "timestamp" DESC
-            LIMIT 365;
-        """)
-        result = conn.execute(query, {"z_id": zone_id})
-        # Fetch all rows and convert them into a list of dictionaries
-        history = [{"timestamp": row[0], "rainfall": row[1], "temperature": row[2]} for row in result.fetchall()]
-        return history
+async def get_history(request: Request, zone_id: int, days: int = Query(365, ge=1, le=MAX_HISTORY_DAYS)):
+    require_database()
+    async with read_engine.connect() as conn:
+        # Get the last `days` days of data (one year by default) for the specified zone
+        result = await conn.execute(HISTORY_QUERY, {"z_id": zone_id, "days": days})
+        rows = result.fetchall()
+    # orjson encodes the dates directly, skipping jsonable_encoder
+    history = [{"timestamp": row[0], "rainfall": row[1], "temperature": row[2]} for row in rows]
+    return json_response(request, history)
 
 @app.get("/api/zone-factors/{zone_id}")
-def get_zone_factors(zone_id: int):
+async def get_zone_factors(zone_id: int):
     """Get detailed Indian water scarcity factors for a zone"""
-    with engine.connect() as conn:
-        query = text("""
-            SELECT zone_name, 
-                   AVG(population) as avg_population,
-                   AVG(gdp_per_capita) as avg_gdp_per_capita,
-                   AVG(literacy_rate) as avg_literacy_rate,
-                   AVG(urban_density) as avg_urban_density,
-                   AVG(infrastructure_score) as avg_infrastructure_score,
-                   AVG(monsoon_dependency) as avg_monsoon_dependency,
-                   AVG(groundwater_level) as avg_groundwater_level,
-                   AVG(industrial_demand) as avg_industrial_demand,
-                   AVG(agricultural_demand) as avg_agricultural_demand,
-                   AVG(water_recycling_rate) as avg_water_recycling_rate,
-                   AVG(drought_risk_index) as avg_drought_risk_index
-            FROM water_data wd
-            JOIN zones z ON wd.zone_id = z.zone_id
-            WHERE wd.zone_id = :z_id
-            GROUP BY zone_name
-        """)
-        result = conn.execute(query, {"z_id": zone_id}).fetchone()
+    require_database()
+    async with read_engine.connect() as conn:
+        result = (await conn.execute(ZONE_FACTORS_QUERY, {"z_id": zone_id})).fetchone()
         
         if not result:
             raise HTTPException(status_code=404, detail="Zone not found")
@@ -121,18 +355,69 @@ def get_zone_factors(zone_id: int):
             }
         }
 
-@app.get("/api/predict/live/{zone_id}", response_model=PredictionOutput)
-def predict_live(zone_id: int):
-    """Enhanced prediction with real Indian factors"""
-    tomorrow = pd.to_datetime('today') + pd.Timedelta(days=1)
-    
-    # Get real weather forecast (placeholder - in production use weather API)
-    forecast_temp = 35.0 
-    forecast_rain = 0.5
-    forecast_humidity = 65.0
-    forecast_wind = 3.2
-    forecast_solar = 18.5
-    
+def route_model(zone_id: int):
+    """(model, features, version) of the zone's region model, falling back to the global model"""
+    return registry.model_for_zone(zone_id) or (model, features_order, model_version)
+
+def routed_version(zone_id: int):
+    """Version of the model route_model picks, without loading it"""
+    region = registry.routes.get(zone_id)
+    return registry.regions[region]["model_version"] if region is not None else model_version
+
+def overloaded_error(e: Overloaded):
+    return HTTPException(
+        status_code=503, detail=f"Server busy ({e.reason}); retry later.", headers={"Retry-After": str(e.retry_after)}
+    )
+
+async def degraded_prediction(zone_id: int, target_date, cache_key):
+    """Last cached (even expired) or materialized prediction for a shed request, or None"""
+    for key in (cache_key, cache_key[:-1] + (False,)):
+        cached = prediction_cache.peek(key, allow_stale=True)
+        if cached is not None:
+            return {**cached, "degraded": "cache"}
+
+    async def latest():
+        async with read_engine.connect() as conn:
+            return (await conn.execute(LATEST_PREDICTION_QUERY, {
+                "z_id": zone_id, "target_date": target_date, "version": routed_version(zone_id)
+            })).fetchone()
+
+    try:
+        row = await asyncio.wait_for(latest(), timeout=DEGRADED_LOOKUP_SECONDS)
+    except Exception:
+        # No predictions table, or the database is what's overloaded
+        return None
+    if row is None:
+        return None
+    return {"predicted_consumption_mld": row[0], "risk_level": row[1], "degraded": "materialized", "target_date": row[2]}
+
+def compute_prediction(zone_id: int, tomorrow, forecast, routed, intervals=False):
+    """Materialized prediction for tomorrow, or score the zone on demand"""
+    from batch_score import (
+        ZONE_ATTRIBUTE_COLUMNS, FALLBACK_ZONE_ATTRIBUTES, RISK_LEVELS, RISK_THRESHOLDS, classify_risk
+    )
+    from feature_engine import compute_features, feature_frame
+    from forest_intervals import DEFAULT_QUANTILES, predict_with_uncertainty
+    zone_model, zone_features, zone_version = routed
+    # Serve the materialized prediction from batch_score.py when available
+    # (intervals need the per-tree outputs, so they are always scored on demand)
+    with engine.connect() as conn:
+        materialized_query = text("""
+            SELECT mld, risk_level
+            FROM predictions
+            WHERE zone_id = :z_id AND target_date = :target_date AND model_version = :version
+        """)
+        try:
+            materialized = None if intervals else conn.execute(materialized_query, {
+                "z_id": zone_id, "target_date": tomorrow, "version": zone_version
+            }).fetchone()
+        except Exception:
+            # predictions table not created yet
+            materialized = None
+        if materialized:
+            return {"predicted_consumption_mld": materialized[0], "risk_level": materialized[1]}
+
+    # Fall back to on-demand scoring
     # Get latest data for this zone
     with engine.connect() as conn:
         latest_query = text("""
@@ -147,60 +432,267 @@ def predict_live(zone_id: int):
         
         if not latest_data:
             # Fallback defaults
-            latest_data = (55000, 2500, 75.0, 4000, 5.5, 0.65, 15.0, 5.0, 8.0, 20.0)
-
-    # Calculate drought risk index
-    drought_risk = max(0, min(10, 
-        (forecast_temp - 25) * 0.1 +
-        (40 - forecast_rain) * 0.02 +
-        latest_data[5] * 2 +  # monsoon_dependency
-        (100 - forecast_humidity) * 0.01
-    ))
-
-    # Prepare enhanced input data
-    input_data = {
-        'zone_id': zone_id,
-        'rainfall_mm': forecast_rain,
-        'avg_temp_celsius': forecast_temp,
-        'population': latest_data[0],
-        'month': tomorrow.month,
-        'day_of_year': tomorrow.dayofyear,
-        'season': {12: 0, 1: 0, 2: 0, 3: 1, 4: 1, 5: 1, 6: 2, 7: 2, 8: 2, 9: 2, 10: 3, 11: 3}[tomorrow.month],
-        'gdp_per_capita': latest_data[1],
-        'literacy_rate': latest_data[2],
-        'urban_density': latest_data[3],
-        'infrastructure_score': latest_data[4],
-        'monsoon_dependency': latest_data[5],
-        'groundwater_level': latest_data[6],
-        'industrial_demand': latest_data[7],
-        'agricultural_demand': latest_data[8],
-        'water_recycling_rate': latest_data[9],
-        'drought_risk_index': drought_risk,
-        'humidity': forecast_humidity,
-        'wind_speed': forecast_wind,
-        'solar_radiation': forecast_solar
+            latest_data = FALLBACK_ZONE_ATTRIBUTES
+
+    # Derived features (season, drought risk index, ...) from the shared feature engine
+    columns = {
+        'zone_id': [zone_id],
+        **{name: [value] for name, value in zip(ZONE_ATTRIBUTE_COLUMNS, latest_data)},
+        **{name: [value] for name, value in forecast.items()}
     }
+    columns = compute_features(columns, dates=[tomorrow])
+    df = feature_frame(columns, zone_features)
     
-    # Load feature order
+    if not intervals:
+        prediction = zone_model.predict(df)[0]
+        # Enhanced risk assessment based on Indian water scarcity thresholds
+        risk = str(classify_risk(prediction))
+        return {"predicted_consumption_mld": round(prediction, 2), "risk_level": risk}
+
+    # Point estimate and intervals from the same pass over the trees
+    summary = predict_with_uncertainty(zone_model, df, RISK_THRESHOLDS)
+    prediction = float(summary["mean"][0])
+    return {
+        "predicted_consumption_mld": round(prediction, 2),
+        "risk_level": str(classify_risk(prediction)),
+        "std_mld": round(float(summary["std"][0]), 2),
+        "quantiles_mld": {
+            f"p{round(q * 100)}": round(float(v), 2) for q, v in zip(DEFAULT_QUANTILES, summary["quantiles"][0])
+        },
+        "risk_probabilities": {
+            str(level): round(float(p), 3) for level, p in zip(RISK_LEVELS, summary["band_probabilities"][0])
+        }
+    }
+
+@app.get("/api/predict/live/{zone_id}", response_model=PredictionOutput, response_model_exclude_none=True)
+async def predict_live(
+    request: Request, zone_id: int,
+    intervals: bool = Query(False, description="Add std, quantiles and risk band probabilities")
+):
+    """Enhanced prediction with real Indian factors"""
+    await require_model()
+    require_database()
+    from batch_score import FORECAST_DEFAULTS
+    tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+
+    # Get real weather forecast (placeholder - in production use weather API)
+    forecast = FORECAST_DEFAULTS
+
+    cache_key = (zone_id, tomorrow, forecast_key(forecast), routed_version(zone_id), intervals)
+    limiter = admission["predict"]
+
+    async def compute():
+        # Only the single-flight leader takes a slot and a thread; concurrent
+        # requests for the same key await its result on the event loop
+        async with limiter.slot(request_timeout(request)):
+            # route_model may load a region model from disk, so it runs in the threadpool too
+            return await run_in_threadpool(lambda: compute_prediction(
+                zone_id, tomorrow, forecast, route_model(zone_id), intervals
+            ))
+
     try:
-        features_order = joblib.load("model_features.joblib")
-    except:
-        # Fallback to basic features if enhanced model not available
-        features_order = ['zone_id', 'rainfall_mm', 'avg_temp_celsius', 'population', 'month', 'day_of_year']
-    
-    # Create DataFrame with available features
-    df = pd.DataFrame([input_data])
-    available_features = [f for f in features_order if f in df.columns]
-    df = df[available_features]
-    
-    prediction = model.predict(df)[0]
-    
-    # Enhanced risk assessment based on Indian water scarcity thresholds
-    risk = "Low"
-    if prediction > 18: risk = "Moderate"
-    if prediction > 25: risk = "High" 
-    if prediction > 35: risk = "Severe"
-    if prediction > 50: risk = "Critical"
-    
-    return {"predicted_consumption_mld": round(prediction, 2), "risk_level": risk}
+        return await prediction_cache.get_or_compute_async(cache_key, compute)
+    except Overloaded as e:
+        degraded = await degraded_prediction(zone_id, tomorrow, cache_key) if ADMISSION_DEGRADED else None
+        if degraded is None:
+            raise overloaded_error(e)
+        limiter.degraded += 1
+        return degraded
+
+@app.post("/api/scenarios")
+async def run_scenarios(scenario: ScenarioInput, request: Request):
+    """Score the Cartesian grid of zones x weather/groundwater adjustments in one call"""
+    await require_model()
+    require_database()
+    from scenarios import MAX_SCENARIO_ROWS, SCENARIO_AXES, axis_length, axis_values
+    zone_ids = sorted(set(scenario.zone_ids))
+    ranges = {name: getattr(scenario, name) for name in SCENARIO_AXES}
+    # Size the grid from the ranges before building any axis, so a tiny step can't allocate a huge array
+    total = len(zone_ids)
+    for r in ranges.values():
+        total *= axis_length(r.start, r.stop, r.step)
+    if total > MAX_SCENARIO_ROWS:
+        raise HTTPException(status_code=413, detail=f"Scenario grid has {total} rows; the limit is {MAX_SCENARIO_ROWS}.")
+    axes = {name: axis_values(r.start, r.stop, r.step) for name, r in ranges.items()}
+
+    try:
+        async with admission["scenarios"].slot(request_timeout(request)):
+            return await run_in_threadpool(score_scenarios, request, scenario, zone_ids, axes)
+    except Overloaded as e:
+        raise overloaded_error(e)
+
+def score_scenarios(request: Request, scenario: ScenarioInput, zone_ids, axes):
+    """Threadpool side of run_scenarios: load the zones and score the grid"""
+    import numpy as np
+    from batch_score import FORECAST_DEFAULTS, RISK_LEVELS, load_latest_zone_attributes
+    from scenarios import SCENARIO_AXES, run_scenario_grid
+    with engine.connect() as conn:
+        zones = load_latest_zone_attributes(conn, zone_ids)
+    if len(zones) != len(zone_ids):
+        missing = sorted(set(zone_ids) - set(zones['zone_id']))
+        raise HTTPException(status_code=404, detail=f"Zones not found: {missing}")
+
+    target_date = scenario.target_date or (datetime.date.today() + datetime.timedelta(days=1))
+    predictions, risk_codes = run_scenario_grid(zones, axes, target_date, FORECAST_DEFAULTS, route_model)
+
+    # Array-encoded result: values are in C order over `shape` (zone_id first, then each axis)
+    return json_response(request, {
+        "target_date": target_date,
+        "axes": {"zone_id": zones['zone_id'].to_numpy(dtype=np.int64), **axes},
+        "shape": [len(zones)] + [len(axes[name]) for name in SCENARIO_AXES],
+        "predicted_consumption_mld": np.round(predictions, 2),
+        "risk_level_codes": risk_codes,
+        "risk_levels": RISK_LEVELS.tolist()
+    })
+
+async def aggregate_response(request: Request, region, target_date, include_zones):
+    """Cached rollup of region for target_date (tomorrow by default)"""
+    from batch_score import FORECAST_DEFAULTS
+    from aggregation import region_key, aggregate_region
+    target_date = target_date or (datetime.date.today() + datetime.timedelta(days=1))
+    forecast = FORECAST_DEFAULTS
+    default_model = (model, features_order, model_version)
+    versions = (model_version, tuple(sorted(entry["model_version"] for entry in registry.regions.values())))
+    cache_key = (region_key(region), target_date, forecast_key(forecast), versions)
+
+    limiter = admission["aggregate"]
+
+    def rollup():
+        with engine.connect() as conn:
+            return aggregate_region(conn, region, target_date, forecast, default_model, registry)
+
+    async def compute():
+        # Only the single-flight leader takes a slot and a thread
+        async with limiter.slot(request_timeout(request)):
+            return await run_in_threadpool(rollup)
+
+    try:
+        result = await aggregate_cache.get_or_compute_async(cache_key, compute)
+    except Overloaded as e:
+        stale = aggregate_cache.peek(cache_key, allow_stale=True) if ADMISSION_DEGRADED else None
+        if stale is None:
+            raise overloaded_error(e)
+        limiter.degraded += 1
+        result = {**stale, "degraded": "cache"}
+    if not include_zones:
+        result = {key: value for key, value in result.items() if key != "zones"}
+    return json_response(request, result)
+
+@app.get("/api/aggregate")
+async def aggregate_bbox(
+    request: Request,
+    bbox: str = Query(..., description="min_lon,min_lat,max_lon,max_lat"),
+    target_date: Optional[datetime.date] = None,
+    include_zones: bool = False
+):
+    """Total predicted demand and risk distribution of the zones inside a bounding box"""
+    await require_model()
+    require_database()
+    from aggregation import parse_bbox
+    try:
+        region = parse_bbox(bbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await aggregate_response(request, region, target_date, include_zones)
+
+@app.post("/api/aggregate")
+async def aggregate_polygon(body: AggregateInput, request: Request):
+    """Total predicted demand and risk distribution of the zones inside a (multi)polygon"""
+    await require_model()
+    require_database()
+    from aggregation import parse_region
+    try:
+        region = parse_region(body.geometry)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await aggregate_response(request, region, body.target_date, body.include_zones)
+
+@app.get("/api/stream/risk")
+async def stream_risk(
+    request: Request,
+    zones: Optional[str] = Query(None, description="Comma-separated zone ids"),
+    bbox: Optional[str] = Query(None, description="Map viewport: min_lon,min_lat,max_lon,max_lat")
+):
+    """Server-Sent Events: a snapshot of the zones' risk, then only the zones whose prediction changes"""
+    if (zones is None) == (bbox is None):
+        raise HTTPException(status_code=400, detail="Pass either zones or bbox.")
+    await require_model()
+    require_database()
+    from aggregation import ZONES_IN_REGION_QUERY, parse_bbox
+    try:
+        if bbox is not None:
+            region = orjson.dumps(parse_bbox(bbox)).decode()
+            async with read_engine.connect() as conn:
+                zone_ids = [row[0] for row in await conn.execute(ZONES_IN_REGION_QUERY, {"region": region})]
+        else:
+            requested = sorted({int(z) for z in zones.split(",") if z.strip()})
+            async with read_engine.connect() as conn:
+                zone_ids = [row[0] for row in await conn.execute(EXISTING_ZONES_QUERY, {"zone_ids": requested})]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not zone_ids:
+        raise HTTPException(status_code=404, detail="No zones to subscribe to.")
+    if len(zone_ids) > MAX_STREAM_ZONES:
+        raise HTTPException(status_code=413, detail=f"{len(zone_ids)} zones; the limit is {MAX_STREAM_ZONES}.")
+
+    subscriber = await risk_broadcaster.subscribe(zone_ids)
+    return StreamingResponse(
+        risk_broadcaster.events(subscriber, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# --- Health ---
+@app.get("/api/health")
+async def health():
+    """Liveness: the process is serving requests"""
+    return {"status": "ok"}
+
+@app.get("/api/ready")
+async def ready():
+    """Readiness: 200 once the model is loaded, 503 while warming up or if loading failed"""
+    body = {
+        "status": "ready" if model is not None else warmup["status"],
+        "model_version": model_version,
+        "model_path": model_path,
+        "warmup_seconds": warmup["seconds"],
+        "database": engine is not None,
+    }
+    if model is None:
+        body["error"] = warmup["error"]
+        return JSONResponse(body, status_code=503, headers={"Retry-After": "5"})
+    return body
+
+# --- Cache and Model Management ---
+@app.get("/api/cache/stats")
+def get_cache_stats():
+    return {
+        "model_version": model_version,
+        "model_path": model_path,
+        "region_models": {region: entry["model_version"] for region, entry in registry.regions.items()},
+        "disabled_region_models": {region: entry["disabled_reason"] for region, entry in registry.disabled.items()},
+        "predictions": prediction_cache.stats(),
+        "aggregates": aggregate_cache.stats(),
+        "risk_stream": risk_broadcaster.stats(),
+        "admission": {name: limiter.stats() for name, limiter in admission.items()}
+    }
+
+@app.post("/api/cache/invalidate")
+def invalidate_cache():
+    """Called after a data ingest so stale predictions and zone lists are not served"""
+    global zones_payload
+    zones_payload = None
+    prediction_cache.invalidate()
+    aggregate_cache.invalidate()
+    risk_broadcaster.notify("ingest")
+    return {"message": "Prediction and zone caches invalidated."}
 
+@app.post("/api/model/reload")
+def reload_model():
+    """Load the latest trained models from disk and drop cached predictions"""
+    load_models()
+    warmup.update(status="ready", error=None)
+    prediction_cache.invalidate()
+    aggregate_cache.invalidate()
+    risk_broadcaster.notify("model")
+    return {"message": "Model reloaded.", "model_version": model_version, "model_path": model_path}
@@ -0,0 +1,179 @@
+"""
+MODEL COMPACTION
+Post-training search for a smaller serving artifact than the full forest:
+the smallest subset of its trees (ranked by greedy ordered aggregation) and,
+optionally, depth-limited forests distilled from its predictions. The smallest
+candidate whose holdout MAE stays within a tolerance of the full forest's is
+saved next to it; serving loads it unless MODEL_VARIANT=full.
+"""
+
+import os
+import copy
+import json
+import time
+import pickle
+import numpy as np
+import joblib
+from forest_intervals import tree_predictions
+
+COMPACT_MODEL_FILENAME = "water_model_compact.joblib"
+COMPACTION_REPORT_FILENAME = "model_compaction.json"
+# Allowed holdout MAE increase over the full forest, as a fraction of its MAE
+COMPACT_MAE_TOLERANCE = float(os.getenv("COMPACT_MAE_TOLERANCE", "0.02"))
+# max_depth of the distilled surrogates to try (empty disables distillation)
+COMPACT_DISTILL_DEPTHS = tuple(int(d) for d in os.getenv("COMPACT_DISTILL_DEPTHS", "").split(",") if d.strip())
+# Holdout rows used to rank trees (the ranking is O(rows x trees^2))
+SELECTION_ROWS = 20000
+# Floor on subset size, so forest_intervals still has trees to take quantiles over
+MIN_TREES = 25
+
+def forest_subset(model, indices):
+    """The forest restricted to the given trees (shares the tree objects)"""
+    compact = copy.copy(model)
+    compact.estimators_ = [model.estimators_[i] for i in indices]
+    compact.n_estimators = len(compact.estimators_)
+    return compact
+
+def order_trees(per_tree, y, y_check=None, per_tree_check=None, target_mae=None):
+    """Greedy ordered aggregation: each step adds the tree that most lowers the ensemble's MAE on y.
+
+    With a check split and target_mae, stops at the first prefix whose check MAE
+    is within target. Returns (tree order, check MAE of each prefix).
+    """
+    n_rows, n_trees = per_tree.shape
+    remaining = list(range(n_trees))
+    order, check_mae = [], []
+    running = np.zeros(n_rows)
+    running_check = np.zeros(len(y_check)) if y_check is not None else None
+    for k in range(1, n_trees + 1):
+        candidates = per_tree[:, remaining]
+        errors = np.abs((running[:, None] + candidates) / k - y[:, None]).mean(axis=0)
+        best = remaining.pop(int(np.argmin(errors)))
+        order.append(best)
+        running += per_tree[:, best]
+        if running_check is not None:
+            running_check += per_tree_check[:, best]
+            check_mae.append(float(np.abs(running_check / k - y_check).mean()))
+            if target_mae is not None and k >= MIN_TREES and check_mae[-1] <= target_mae:
+                break
+    return order, check_mae
+
+def pickled_size(model):
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+def compact_forest(model, X_train, X_test, y_test, tolerance=COMPACT_MAE_TOLERANCE,
+                   distill_depths=COMPACT_DISTILL_DEPTHS, seed=42):
+    """(compact model or None, full forest MAE, candidate summaries) for the given holdout MAE tolerance.
+
+    The holdout is split in two: trees are ranked on one half and the subset size
+    is chosen on the other, so the chosen subset isn't scored on the rows it was
+    fit to. Distilled surrogates never see the holdout and are scored on all of it.
+    """
+    y_test = np.asarray(y_test, dtype=float)
+    rng = np.random.default_rng(seed)
+    rows = rng.permutation(len(y_test))
+    select, check = rows[: len(rows) // 2][:SELECTION_ROWS], rows[len(rows) // 2:]
+
+    X_test = np.asarray(X_test, dtype=np.float32)
+    per_tree = tree_predictions(model, X_test)
+    full_mae = float(np.abs(per_tree.mean(axis=1, dtype=np.float64) - y_test).mean())
+    full_check_mae = float(np.abs(per_tree[check].mean(axis=1, dtype=np.float64) - y_test[check]).mean())
+
+    order, check_mae = order_trees(
+        per_tree[select], y_test[select], y_test[check], per_tree[check],
+        target_mae=full_check_mae * (1 + tolerance)
+    )
+    n_trees = len(order)
+    subset = forest_subset(model, sorted(order))
+    subset_mae = float(np.abs(per_tree[:, order].mean(axis=1, dtype=np.float64) - y_test).mean())
+    candidates = [{
+        "kind": "subset", "n_trees": n_trees, "max_depth": model.max_depth,
+        "mae": subset_mae, "check_mae": check_mae[-1], "size_bytes": pickled_size(subset),
+        "within_tolerance": check_mae[-1] <= full_check_mae * (1 + tolerance) and n_trees < len(model.estimators_),
+        "model": subset,
+    }]
+
+    if distill_depths:
+        # Students learn the forest's (noise-free) predictions, so shallower trees can suffice
+        from sklearn.ensemble import RandomForestRegressor  # only needed here; keeps serving imports light
+        X_train = np.asarray(X_train, dtype=np.float32)
+        teacher = model.predict(X_train)
+        for depth in distill_depths:
+            student = RandomForestRegressor(
+                n_estimators=max(n_trees, MIN_TREES), max_depth=depth,
+                min_samples_leaf=model.min_samples_leaf, random_state=seed, n_jobs=model.n_jobs
+            ).fit(X_train, teacher)
+            mae = float(np.abs(student.predict(X_test) - y_test).mean())
+            candidates.append({
+                "kind": "distilled", "n_trees": student.n_estimators, "max_depth": depth,
+                "mae": mae, "check_mae": None, "size_bytes": pickled_size(student),
+                "within_tolerance": mae <= full_mae * (1 + tolerance), "model": student,
+            })
+
+    accepted = [c for c in candidates if c["within_tolerance"]]
+    chosen = min(accepted, key=lambda c: c["size_bytes"]) if accepted else None
+    for candidate in candidates:
+        candidate["chosen"] = candidate is chosen
+    summaries = [{k: v for k, v in c.items() if k != "model"} for c in candidates]
+    return (chosen["model"] if chosen else None), full_mae, summaries
+
+def measure_artifact(path, X_sample, repeats=5):
+    """Size on disk, load time and single-row / batch predict latency of a saved model"""
+    load_times = []
+    for _ in range(3):
+        started = time.perf_counter()
+        model = joblib.load(path)
+        load_times.append(time.perf_counter() - started)
+    X_sample = np.asarray(X_sample, dtype=np.float32)
+
+    def latency(X):
+        times = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            model.predict(X)
+            times.append(time.perf_counter() - started)
+        return float(np.median(times)) * 1000
+
+    return {
+        "size_bytes": os.path.getsize(path),
+        "n_trees": len(model.estimators_),
+        "load_s": float(np.median(load_times)),
+        "predict_1_ms": latency(X_sample[:1]),
+        "predict_batch_ms": latency(X_sample),
+        "batch_rows": len(X_sample),
+    }
+
+def compact_and_save(model, full_path, X_train, X_test, y_test, compact_path=COMPACT_MODEL_FILENAME,
+                     report_path=COMPACTION_REPORT_FILENAME, tolerance=COMPACT_MAE_TOLERANCE,
+                     distill_depths=COMPACT_DISTILL_DEPTHS):
+    """Run the compaction search, save the chosen artifact and a JSON report, and print the reductions"""
+    started = time.perf_counter()
+    compact, full_mae, candidates = compact_forest(model, X_train, X_test, y_test, tolerance, distill_depths)
+    report = {
+        "tolerance": tolerance, "full_mae": full_mae, "candidates": candidates,
+        "search_seconds": round(time.perf_counter() - started, 2),
+    }
+    if compact is None:
+        # Serving falls back to the full forest
+        if os.path.exists(compact_path):
+            os.remove(compact_path)
+        print(f"No compact model within {tolerance:.0%} of the full forest's MAE; serving the full model.")
+    else:
+        joblib.dump(compact, compact_path)
+        X_sample = np.asarray(X_test, dtype=np.float32)[:1000]
+        full, small = measure_artifact(full_path, X_sample), measure_artifact(compact_path, X_sample)
+        chosen = next(c for c in candidates if c["chosen"])
+        report.update({"chosen": chosen, "full": full, "compact": small, "reduction": {
+            key: 1 - small[key] / full[key] for key in ("size_bytes", "load_s", "predict_1_ms", "predict_batch_ms")
+        }})
+        print(f"Compact model ({chosen['kind']}, {chosen['n_trees']} trees, depth {chosen['max_depth']}) "
+              f"saved as '{compact_path}': MAE {chosen['mae']:.3f} vs {full_mae:.3f} MLD")
+        print(f"  {'':<18} {'full':>12} {'compact':>12} {'reduction':>10}")
+        for key, label, scale in (("size_bytes", "size MB", 1e-6), ("load_s", "load s", 1),
+                                  ("predict_1_ms", "predict 1 row ms", 1),
+                                  ("predict_batch_ms", f"predict {small['batch_rows']} ms", 1)):
+            print(f"  {label:<18} {full[key] * scale:>12.3f} {small[key] * scale:>12.3f} "
+                  f"{report['reduction'][key]:>10.1%}")
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    return report
@@ -0,0 +1,126 @@
+"""
+MODEL REGISTRY
+Per-region models (zones grouped by monsoon dependency band) stored next to the
+global model. registry.json records each region's artifact, feature list,
+metrics and zones, and serving routes every zone to its region's model. Regions
+can be disabled (kept on record, not routed), e.g. when the global model is
+retrained without them, or cleared.
+"""
+
+import os
+import json
+import hashlib
+import datetime
+import threading
+import joblib
+
+REGISTRY_DIR = "models"
+REGISTRY_FILENAME = os.path.join(REGISTRY_DIR, "registry.json")
+
+# Monsoon dependency bands produced by calculate_monsoon_dependency in setup_and_train.py
+MONSOON_BANDS = [
+    (0.625, "central"),        # 0.60
+    (0.725, "eastern"),        # 0.65 / 0.70
+    (0.80, "western"),         # 0.75
+    (float("inf"), "south_western"),  # 0.85
+]
+
+def get_model_version(model_path):
+    """Short content hash identifying a trained model artifact"""
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+def region_for(monsoon_dependency):
+    """Region name for a zone's monsoon dependency"""
+    for upper, name in MONSOON_BANDS:
+        if monsoon_dependency < upper:
+            return name
+
+class ModelRegistry:
+    """Region -> model metadata, with zone routing and lazily loaded models"""
+
+    def __init__(self, path=REGISTRY_FILENAME, regions=None, disabled=None):
+        self.path = path
+        self.regions = regions or {}
+        # Region -> entry plus "disabled_reason"/"disabled_at"; never routed
+        self.disabled = disabled or {}
+        self._models = {}
+        self._lock = threading.Lock()
+        self._rebuild_routes()
+
+    @classmethod
+    def load(cls, path=REGISTRY_FILENAME):
+        """Registry from disk, or an empty one if none was trained yet"""
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path) as f:
+            document = json.load(f)
+        return cls(path, document["regions"], document.get("disabled"))
+
+    def _rebuild_routes(self):
+        self.routes = {
+            zone_id: region
+            for region, entry in self.regions.items()
+            for zone_id in entry["zone_ids"]
+        }
+
+    def register(self, region, model_path, features, metrics, zone_ids):
+        """Record a trained region model and persist the registry"""
+        self.regions[region] = {
+            "model_path": model_path,
+            "model_version": get_model_version(model_path),
+            "features": list(features),
+            "metrics": metrics,
+            "zone_ids": sorted(int(z) for z in zone_ids),
+            "trained_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        self.disabled.pop(region, None)
+        with self._lock:
+            self._models.pop(region, None)
+        self._rebuild_routes()
+        self.save()
+
+    def disable(self, reason, regions=None):
+        """Stop routing zones to the regions (all by default) and persist; returns the regions disabled"""
+        names = [r for r in (regions or list(self.regions)) if r in self.regions]
+        disabled_at = datetime.datetime.now().isoformat(timespec="seconds")
+        for region in names:
+            self.disabled[region] = {**self.regions.pop(region), "disabled_reason": reason, "disabled_at": disabled_at}
+        with self._lock:
+            for region in names:
+                self._models.pop(region, None)
+        self._rebuild_routes()
+        self.save()
+        return names
+
+    def clear(self):
+        """Unregister every region model, active or disabled (artifacts stay on disk)"""
+        self.regions, self.disabled = {}, {}
+        with self._lock:
+            self._models.clear()
+        self._rebuild_routes()
+        self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"regions": self.regions, "disabled": self.disabled}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def region_model(self, region):
+        """(model, features, model_version) of a registered region"""
+        entry = self.regions[region]
+        with self._lock:
+            model = self._models.get(region)
+            if model is None:
+                model = self._models[region] = joblib.load(entry["model_path"])
+        return model, entry["features"], entry["model_version"]
+
+    def model_for_zone(self, zone_id):
+        """Region model for the zone, or None if the zone isn't routed to one"""
+        region = self.routes.get(zone_id)
+        return self.region_model(region) if region is not None else None
@@ -0,0 +1,226 @@
+"""
+PIPELINE PROFILING
+Stage-level instrumentation for setup_and_train.py: wall time, CPU time, peak
+RSS and row counts per stage (and per zone), a printed summary table and a JSON
+run report. Optionally cProfiles the top-level stages (or every execution of
+one named stage, merged) and keeps the profile of the slowest one.
+
+    with profiler.stage("fit") as stage:
+        model = fit_forest(X_train, y_train)
+        stage["rows"] = len(X_train)
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import pstats
+import cProfile
+import datetime
+import platform
+import threading
+from contextlib import contextmanager
+
+RSS_SAMPLE_SECONDS = 0.02
+PROFILE_TOP_FUNCTIONS = 25
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+def current_rss():
+    """Resident set size in bytes (Linux /proc; elsewhere the process peak from getrusage)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+class _RssSampler(threading.Thread):
+    """Samples RSS in the background so each stage's peak can be read back from its time window"""
+
+    def __init__(self, interval=RSS_SAMPLE_SECONDS):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples = []  # (perf_counter, rss)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.samples.append((time.perf_counter(), current_rss()))
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def peak(self, start, end):
+        # samples are appended in time order; only the stage's window is scanned
+        peak = 0
+        for t, rss in reversed(self.samples):
+            if t < start:
+                break
+            if t <= end:
+                peak = max(peak, rss)
+        return peak
+
+class StageProfiler:
+    """Collects one record per stage execution; stages may nest and run in worker threads.
+
+    CPU time is process-wide for main-thread stages (so it includes the threads a
+    stage fans out to, e.g. forest fitting) and thread-local in worker threads.
+    """
+
+    def __init__(self, run_name="setup_and_train", profile=False, profile_stage=None):
+        self.run_name = run_name
+        self.profile = profile or profile_stage is not None
+        self.profile_stage = profile_stage
+        self.records = []
+        self.started_at = datetime.datetime.now()
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profiles = {}  # stage name -> pstats.Stats merged over its executions
+        self._profiling = False
+        self._sampler = _RssSampler()
+        self._sampler.start()
+
+    @contextmanager
+    def stage(self, name, zone=None):
+        depth = getattr(self._local, "depth", 0)
+        main_thread = threading.current_thread() is threading.main_thread()
+        cpu_clock = time.process_time if main_thread else time.thread_time
+        profiler = None
+        # cProfile only sees the thread it runs on, and only one can be active
+        wanted = name == self.profile_stage if self.profile_stage else depth == 0
+        if self.profile and wanted and main_thread and not self._profiling:
+            profiler = cProfile.Profile()
+            self._profiling = True
+
+        record = {"stage": name, "zone": zone, "rows": None, "depth": depth,
+                  "thread": threading.current_thread().name}
+        self._local.depth = depth + 1
+        rss_before = current_rss()
+        cpu_start, wall_start = cpu_clock(), time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._profiling = False
+            wall_end = time.perf_counter()
+            record["wall_s"] = wall_end - wall_start
+            record["cpu_s"] = cpu_clock() - cpu_start
+            record["rss_start_mb"] = rss_before / 2**20
+            record["peak_rss_mb"] = max(self._sampler.peak(wall_start, wall_end), rss_before, current_rss()) / 2**20
+            record["offset_s"] = wall_start - self._started
+            self._local.depth = depth
+            with self._lock:
+                if profiler is not None:
+                    if name in self._profiles:
+                        self._profiles[name].add(profiler)
+                    else:
+                        self._profiles[name] = pstats.Stats(profiler)
+                self.records.append(record)
+
+    def summary(self):
+        """Per-stage totals, in the order stages first started"""
+        stages = {}
+        for record in sorted(self.records, key=lambda r: r["offset_s"]):
+            entry = stages.setdefault(record["stage"], {
+                "stage": record["stage"], "depth": record["depth"], "calls": 0, "zones": set(),
+                "wall_s": 0.0, "cpu_s": 0.0, "peak_rss_mb": 0.0, "rows": 0, "max_wall_s": 0.0
+            })
+            entry["calls"] += 1
+            entry["wall_s"] += record["wall_s"]
+            entry["cpu_s"] += record["cpu_s"]
+            entry["max_wall_s"] = max(entry["max_wall_s"], record["wall_s"])
+            entry["peak_rss_mb"] = max(entry["peak_rss_mb"], record["peak_rss_mb"])
+            entry["rows"] += record["rows"] or 0
+            if record["zone"] is not None:
+                entry["zones"].add(record["zone"])
+        for entry in stages.values():
+            entry["zones"] = len(entry["zones"])
+            entry["rows_per_s"] = entry["rows"] / entry["wall_s"] if entry["rows"] and entry["wall_s"] else None
+        return list(stages.values())
+
+    def slowest_profile(self):
+        """(stage summary, pstats.Stats, top functions text) of the slowest profiled stage, or None"""
+        profiled = [entry for entry in self.summary() if entry["stage"] in self._profiles]
+        if not profiled:
+            return None
+        entry = max(profiled, key=lambda e: e["wall_s"])
+        out = io.StringIO()
+        stats = self._profiles[entry["stage"]]
+        stats.stream = out
+        stats.sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+        return entry, stats, out.getvalue()
+
+    def print_summary(self):
+        total = time.perf_counter() - self._started
+        print("=" * 100)
+        print(f"📊 PIPELINE PROFILE: {self.run_name} ({total:.1f}s total)")
+        print("=" * 100)
+        print(f"{'Stage':<28} {'Calls':>6} {'Wall s':>9} {'% run':>6} {'CPU s':>9} {'Peak RSS MB':>12} {'Rows':>11} {'Rows/s':>10}")
+        print("-" * 100)
+        for entry in self.summary():
+            name = "  " * entry["depth"] + entry["stage"]
+            rate = f"{entry['rows_per_s']:,.0f}" if entry["rows_per_s"] else "-"
+            rows = f"{entry['rows']:,}" if entry["rows"] else "-"
+            print(f"{name:<28} {entry['calls']:>6} {entry['wall_s']:>9.2f} {entry['wall_s'] / total:>6.1%} "
+                  f"{entry['cpu_s']:>9.2f} {entry['peak_rss_mb']:>12.1f} {rows:>11} {rate:>10}")
+        slowest = self.slowest_profile()
+        if slowest:
+            entry, _, text = slowest
+            print(f"\n🔬 cProfile of slowest stage '{entry['stage']}' ({entry['calls']} calls, {entry['wall_s']:.2f}s):")
+            print(text)
+
+    def write_report(self, path):
+        """JSON run report (plus <path>.prof with the slowest stage's cProfile, if profiling)"""
+        self._sampler.stop()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        report = {
+            "run": self.run_name,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "total_wall_s": time.perf_counter() - self._started,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "summary": self.summary(),
+            "stages": self.records,
+        }
+        slowest = self.slowest_profile()
+        if slowest:
+            entry, stats, text = slowest
+            profile_path = os.path.splitext(path)[0] + ".prof"
+            stats.dump_stats(profile_path)
+            report["profile"] = {"stage": entry["stage"], "calls": entry["calls"], "wall_s": entry["wall_s"],
+                                 "pstats_file": profile_path, "top_functions": text}
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        return path
+
+class _NullProfiler:
+    """Stand-in when nothing is being profiled (e.g. setup_and_train imported as a library)"""
+
+    @contextmanager
+    def stage(self, name, zone=None):
+        yield {}
+
+_profiler = _NullProfiler()
+
+def get_profiler():
+    return _profiler
+
+def start_profiling(run_name="setup_and_train", profile=False, profile_stage=None):
+    global _profiler
+    _profiler = StageProfiler(run_name, profile, profile_stage)
+    return _profiler
+
+def default_report_path(run_name="setup_and_train"):
+    return os.path.join("reports", f"{run_name}_{datetime.datetime.now():%Y%m%d_%H%M%S}.json")
@@ -0,0 +1,94 @@
+"""
+NASA POWER ARCHIVE
+Record/replay of raw NASA POWER responses so ingest can run offline and
+deterministically. Responses are stored byte for byte, one LZMA-compressed
+member per (point, date range) in a single zip archive; replay hands them to
+the same parsing code as a live fetch, at local disk speed.
+
+    python setup_and_train.py --power-mode record   # live fetch, archive every response
+    python setup_and_train.py --power-mode replay --fresh --ingest-only
+    python power_archive.py --list power_archive.zip
+"""
+
+import os
+import argparse
+import threading
+import zipfile
+
+POWER_ARCHIVE = os.getenv("POWER_ARCHIVE", "power_archive.zip")
+POWER_MODES = ("live", "record", "replay")
+
+class ArchiveMiss(KeyError):
+    """Replay asked for a response that was never recorded"""
+
+def archive_key(latitude, longitude, start_date, end_date):
+    """Member name for one request; coordinates rounded like the zones' stored centroids"""
+    return f"power/{float(latitude):.5f}_{float(longitude):.5f}_{start_date}_{end_date}.json"
+
+class PowerArchive:
+    """Thread-safe zip of raw responses (fetches run in a thread pool)"""
+
+    def __init__(self, path=POWER_ARCHIVE, mode="r"):
+        if mode == "a":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._zip = zipfile.ZipFile(path, mode, compression=zipfile.ZIP_LZMA)
+        self._names = set(self._zip.namelist())
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        return key in self._names
+
+    def get(self, key):
+        if key not in self._names:
+            raise ArchiveMiss(f"{key} is not in {self.path}")
+        with self._lock:
+            return self._zip.read(key)
+
+    def put(self, key, body):
+        with self._lock:
+            if key not in self._names:
+                self._zip.writestr(key, body)
+                self._names.add(key)
+
+    def close(self):
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def make_fetcher(fetch_live, mode="live", archive=None):
+    """fetch(latitude, longitude, start_date, end_date) -> raw bytes for the given mode.
+
+    record fetches live and archives each response; replay serves only the archive.
+    """
+    if mode == "live":
+        return fetch_live
+    if mode == "replay":
+        return lambda latitude, longitude, start_date, end_date: archive.get(
+            archive_key(latitude, longitude, start_date, end_date))
+
+    def record(latitude, longitude, start_date, end_date):
+        body = fetch_live(latitude, longitude, start_date, end_date)
+        archive.put(archive_key(latitude, longitude, start_date, end_date), body)
+        return body
+    return record
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect a NASA POWER response archive")
+    parser.add_argument("archive", nargs="?", default=POWER_ARCHIVE)
+    parser.add_argument("--list", action="store_true", help="List recorded requests")
+    args = parser.parse_args()
+
+    with zipfile.ZipFile(args.archive) as archive:
+        members = archive.infolist()
+        raw = sum(m.file_size for m in members)
+        stored = sum(m.compress_size for m in members)
+        if args.list:
+            for m in members:
+                print(f"{m.filename:<60} {m.file_size:>10,} -> {m.compress_size:>8,} bytes")
+        print(f"{len(members)} responses, {raw / 1e6:,.1f} MB raw, {stored / 1e6:,.1f} MB stored "
+              f"({raw / max(stored, 1):.1f}x)")
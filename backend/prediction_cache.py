@@ -0,0 +1,196 @@
+"""
+PREDICTION CACHE
+In-process LRU/TTL cache of prediction results with single-flight coalescing:
+concurrent requests for the same key wait for one computation instead of each
+querying the database and running the model. Async callers wait on the event
+loop, so followers hold no thread or admission slot while they wait.
+"""
+
+import time
+import json
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+
+def forecast_key(forecast):
+    """Stable short hash of the forecast inputs used for a prediction"""
+    payload = json.dumps(forecast, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+class _InFlight:
+    """A computation other callers can wait on, from a thread or from the event loop"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        # The async leader was cancelled before finishing; async followers start over
+        self.abandoned = False
+        self._lock = threading.Lock()
+        self._waiters = []  # (loop, future) of async followers
+
+    def finish(self, value=None, error=None, abandoned=False):
+        self.value, self.error, self.abandoned = value, error, abandoned
+        with self._lock:
+            self.done.set()
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+
+    def result(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    async def wait(self):
+        """Wait for finish() on the event loop, without holding a thread"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            if self.done.is_set():
+                return
+            self._waiters.append((loop, future))
+        await future
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+class PredictionCache:
+    """Thread-safe LRU cache with per-entry TTL and in-flight request coalescing"""
+
+    def __init__(self, maxsize=4096, ttl_seconds=3600):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _begin(self, key):
+        """(None, ..., value) on a fresh hit, else (call, leader, generation, None) for key's computation"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return None, False, None, entry[1]
+                del self._entries[key]
+
+            call = self._inflight.get(key)
+            if call is not None:
+                self.coalesced += 1
+                return call, False, None, None
+            call = _InFlight()
+            self._inflight[key] = call
+            self.misses += 1
+            return call, True, self._generation, None
+
+    def _finish(self, key, call, generation, value=None, error=None, abandoned=False):
+        with self._lock:
+            # Don't store results computed against data that was invalidated meanwhile
+            if error is None and not abandoned and generation == self._generation:
+                self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            if self._inflight.get(key) is call:
+                del self._inflight[key]
+        call.finish(value, error, abandoned)
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, computing it at most once across concurrent callers"""
+        call, leader, generation, value = self._begin(key)
+        if call is None:
+            return value
+        if not leader:
+            return call.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            self._finish(key, call, generation, error=e)
+            raise
+        self._finish(key, call, generation, value)
+        return value
+
+    async def get_or_compute_async(self, key, compute):
+        """get_or_compute for the event loop; compute is an async callable.
+
+        Only the leader runs compute (and whatever it acquires: an admission slot, a
+        threadpool thread); concurrent callers for the same key await its result, and
+        get its exception if it fails. If the leader is cancelled, a follower takes over.
+        """
+        while True:
+            call, leader, generation, value = self._begin(key)
+            if call is None:
+                return value
+            if leader:
+                break
+            await call.wait()
+            if not call.abandoned:
+                return call.result()
+
+        try:
+            value = await compute()
+        except asyncio.CancelledError as e:
+            self._finish(key, call, generation, error=e, abandoned=True)
+            raise
+        except BaseException as e:
+            self._finish(key, call, generation, error=e)
+            raise
+        self._finish(key, call, generation, value)
+        return value
+
+    def get(self, key):
+        """Fresh cached value for key (counted as a hit), or None; never computes"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def peek(self, key, allow_stale=False):
+        """Cached value for key without computing, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if allow_stale or entry[0] > time.monotonic():
+                return entry[1]
+            return None
+
+    def invalidate(self):
+        """Drop every entry, e.g. after a model reload or data ingest"""
+        with self._lock:
+            self._entries.clear()
+            self._inflight.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl_seconds,
+                "in_flight": len(self._inflight),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0
+            }
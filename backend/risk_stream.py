@@ -0,0 +1,190 @@
+"""
+RISK STREAM
+Server-Sent Events push of zone risk changes. Clients subscribe to zone ids (or
+the zones in a map viewport) and get one snapshot, then batched diffs. Work is
+event-driven: a model reload, cache invalidation after an ingest, or the date
+rolling over wakes the broadcaster, which rescores the subscribed zones once per
+tick and pushes only the zones whose prediction changed. With no notifications,
+or no subscribers, it does no DB or model work.
+"""
+
+import os
+import asyncio
+import datetime
+import orjson
+from fastapi.concurrency import run_in_threadpool
+
+STREAM_TICK_SECONDS = float(os.getenv("STREAM_TICK_SECONDS", "1.0"))
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "32"))
+MAX_STREAM_ZONES = int(os.getenv("MAX_STREAM_ZONES", "5000"))
+
+# Queued in place of diffs when a slow client overflows its queue
+RESYNC = object()
+
+def tomorrow():
+    return datetime.date.today() + datetime.timedelta(days=1)
+
+def seconds_until_midnight():
+    now = datetime.datetime.now()
+    midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time())
+    return max((midnight - now).total_seconds(), 1.0)
+
+def sse_event(event, data, event_id=None):
+    """One text/event-stream frame"""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+class Subscriber:
+    def __init__(self, zone_ids, queue_size=STREAM_QUEUE_SIZE):
+        self.zone_ids = frozenset(zone_ids)
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+    def send(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # Diffs were lost; replace the backlog with a full resync
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+class RiskBroadcaster:
+    """Tracks the last pushed prediction of every subscribed zone and pushes diffs.
+
+    compute(zone_ids, target_date) -> {zone_id: (predicted_mld, risk_level)} is
+    synchronous (DB + model) and runs in the threadpool.
+    """
+
+    def __init__(self, compute, tick_seconds=STREAM_TICK_SECONDS):
+        self.compute = compute
+        self.tick_seconds = tick_seconds
+        self.subscribers = set()
+        self.state = {}
+        self.target_date = None
+        self.tick = 0
+        self.refreshes = 0
+        self.pushed_changes = 0
+        self._reasons = set()
+        self._wake = None
+        self._loop = None
+        self._task = None
+        self._lock = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    def notify(self, reason):
+        """Something that can change predictions happened; safe to call from any thread"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._signal, reason)
+
+    def _signal(self, reason):
+        self._reasons.add(reason)
+        self._wake.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=seconds_until_midnight())
+            except asyncio.TimeoutError:
+                self._reasons.add("date")
+            # Coalesce every notification that lands within one tick
+            await asyncio.sleep(self.tick_seconds)
+            self._wake.clear()
+            reasons, self._reasons = sorted(self._reasons), set()
+            if not self.subscribers:
+                self.state.clear()
+                continue
+            try:
+                await self._refresh(reasons)
+            except Exception as e:
+                print(f"Risk stream refresh failed: {e}")
+
+    def _subscribed_zones(self):
+        return sorted(set().union(*(s.zone_ids for s in self.subscribers)))
+
+    async def _refresh(self, reasons):
+        async with self._lock:
+            zone_ids = self._subscribed_zones()
+            target_date = tomorrow()
+            current = await run_in_threadpool(self.compute, zone_ids, target_date)
+            self.refreshes += 1
+            changes = {
+                zone_id: value for zone_id, value in current.items()
+                if self.state.get(zone_id) != value or self.target_date != target_date
+            }
+            self.state, self.target_date = current, target_date
+            if not changes:
+                return
+            self.tick += 1
+            for subscriber in list(self.subscribers):
+                mine = [(z, v) for z, v in changes.items() if z in subscriber.zone_ids]
+                if mine:
+                    subscriber.send(("risk", self._payload(mine, reasons)))
+                    self.pushed_changes += len(mine)
+
+    def _payload(self, items, reasons=None):
+        payload = {
+            "target_date": self.target_date,
+            "zones": [
+                {"zone_id": zone_id, "predicted_consumption_mld": mld, "risk_level": risk}
+                for zone_id, (mld, risk) in sorted(items)
+            ]
+        }
+        if reasons:
+            payload["reasons"] = reasons
+        return payload
+
+    async def subscribe(self, zone_ids):
+        """Register a subscriber and queue its snapshot; only zones not already tracked are scored"""
+        subscriber = Subscriber(zone_ids)
+        async with self._lock:
+            if self.target_date != tomorrow():
+                self.state, self.target_date = {}, tomorrow()
+            missing = sorted(z for z in subscriber.zone_ids if z not in self.state)
+            if missing:
+                self.state.update(await run_in_threadpool(self.compute, missing, self.target_date))
+            self.subscribers.add(subscriber)
+            subscriber.send(("snapshot", self._snapshot(subscriber)))
+        return subscriber
+
+    def _snapshot(self, subscriber):
+        return self._payload([(z, self.state[z]) for z in subscriber.zone_ids if z in self.state])
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+
+    async def events(self, subscriber, request):
+        """text/event-stream frames for one subscriber until the client disconnects"""
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscriber.queue.get(), timeout=STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                if item is RESYNC:
+                    item = ("snapshot", self._snapshot(subscriber))
+                event, payload = item
+                yield sse_event(event, payload, self.tick)
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self):
+        return {
+            "subscribers": len(self.subscribers),
+            "tracked_zones": len(self.state),
+            "refreshes": self.refreshes,
+            "ticks_with_changes": self.tick,
+            "pushed_zone_changes": self.pushed_changes,
+        }
@@ -0,0 +1,72 @@
+"""
+WHAT-IF SCENARIOS
+Expands zones x temperature x rainfall x humidity x groundwater adjustments into a
+Cartesian grid and scores it chunk by chunk. Only the current chunk's feature
+matrix exists at any time; the result is one float32 prediction per grid cell.
+"""
+
+import os
+import math
+import numpy as np
+from batch_score import RISK_THRESHOLDS
+from feature_engine import compute_features, feature_frame
+
+MAX_SCENARIO_ROWS = int(os.getenv("MAX_SCENARIO_ROWS", "500000"))
+SCENARIO_CHUNK_ROWS = int(os.getenv("SCENARIO_CHUNK_ROWS", "50000"))
+
+# Adjustment axes in grid order (after zone_id)
+SCENARIO_AXES = ["temperature_delta", "rainfall_pct", "humidity_delta", "groundwater_delta"]
+
+def axis_length(start, stop, step):
+    """Number of values axis_values(start, stop, step) returns, without building them"""
+    if step <= 0 or stop <= start:
+        return 1
+    # Tolerance so a stop that is a whole number of steps away isn't lost to float error
+    return math.floor((stop - start) / step + 1e-9) + 1
+
+def axis_values(start, stop, step):
+    """Inclusive range of adjustment values; a zero step gives just `start`"""
+    return np.round(start + step * np.arange(axis_length(start, stop, step), dtype=float), 6)
+
+def grid_size(n_zones, axes):
+    return n_zones * int(np.prod([len(values) for values in axes.values()]))
+
+def scenario_features(zones, axes, rows, target_date, forecast):
+    """Feature columns for flat grid positions `rows` (C order: zone, then SCENARIO_AXES)"""
+    shape = [len(zones)] + [len(axes[name]) for name in SCENARIO_AXES]
+    zone_idx, temp_idx, rain_idx, humidity_idx, groundwater_idx = np.unravel_index(rows, shape)
+
+    columns = {column: zones[column].to_numpy()[zone_idx] for column in zones.columns}
+    columns['avg_temp_celsius'] = forecast['avg_temp_celsius'] + axes['temperature_delta'][temp_idx]
+    columns['rainfall_mm'] = np.clip(forecast['rainfall_mm'] * (1 + axes['rainfall_pct'][rain_idx] / 100), 0, None)
+    columns['humidity'] = np.clip(forecast['humidity'] + axes['humidity_delta'][humidity_idx], 0, 100)
+    columns['groundwater_level'] = columns['groundwater_level'] + axes['groundwater_delta'][groundwater_idx]
+    columns['wind_speed'] = np.full(len(rows), forecast['wind_speed'])
+    columns['solar_radiation'] = np.full(len(rows), forecast['solar_radiation'])
+    return compute_features(columns, dates=np.full(len(rows), np.datetime64(target_date, 'D')))
+
+def run_scenario_grid(zones, axes, target_date, forecast, route_model, chunk_rows=SCENARIO_CHUNK_ROWS):
+    """Predicted MLD (float32) and risk band codes (int8) for every grid cell, in C order"""
+    total = grid_size(len(zones), axes)
+    per_zone = total // len(zones)
+    zone_ids = zones['zone_id'].to_numpy()
+    routes = [route_model(int(zone_id)) for zone_id in zone_ids]
+
+    predictions = np.empty(total, dtype=np.float32)
+    for start in range(0, total, chunk_rows):
+        rows = np.arange(start, min(start + chunk_rows, total))
+        columns = scenario_features(zones, axes, rows, target_date, forecast)
+        chunk_zone_idx = rows // per_zone
+
+        # A chunk can span zones routed to different models
+        by_version = {}
+        for zone_index in np.unique(chunk_zone_idx):
+            by_version.setdefault(routes[zone_index][2], []).append(zone_index)
+        for zone_indexes in by_version.values():
+            zone_model, zone_features, _ = routes[zone_indexes[0]]
+            mask = np.isin(chunk_zone_idx, zone_indexes)
+            subset = {name: values[mask] for name, values in columns.items()}
+            predictions[rows[mask]] = zone_model.predict(feature_frame(subset, zone_features))
+
+    risk_codes = np.digitize(predictions, RISK_THRESHOLDS, right=True).astype(np.int8)
+    return predictions, risk_codes
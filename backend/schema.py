@@ -0,0 +1,234 @@
+"""
+DATABASE SCHEMA
+Managed schema for zones and water_data. water_data is range-partitioned by year
+on "timestamp", with a BRIN index on "timestamp" and a (zone_id, "timestamp")
+btree declared on the parent so every partition gets them. Partitions are created
+ahead of the data, and old years are retired by dropping their partition. A
+DEFAULT partition takes rows outside the yearly ones.
+
+    python schema.py                      # create/migrate schema, partitions through next year
+    python schema.py --retain-years 5     # also drop partitions older than 5 years
+"""
+
+import os
+import re
+import argparse
+import datetime
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+
+load_dotenv()
+
+FUTURE_YEARS = 1
+PARTITION_PREFIX = "water_data_y"
+# Catches rows outside every yearly partition (backfills, stray dates) so a COPY never fails
+DEFAULT_PARTITION = "water_data_default"
+
+# Precomputed centroid, the point the weather fetcher queries NASA POWER for
+ZONES_CENTROID_DDL = "ALTER TABLE zones ADD COLUMN IF NOT EXISTS centroid GEOMETRY(POINT, 4326);"
+
+ZONES_DDL = f"""
+CREATE TABLE IF NOT EXISTS zones (
+    zone_id SERIAL PRIMARY KEY,
+    zone_name VARCHAR(100),
+    geometry GEOMETRY(POLYGON, 4326)
+);
+{ZONES_CENTROID_DDL}
+CREATE INDEX IF NOT EXISTS idx_zones_geometry ON zones USING GIST (geometry);
+CREATE INDEX IF NOT EXISTS idx_zones_name ON zones (zone_name);
+"""
+
+WATER_DATA_COLUMNS_DDL = """
+    zone_id                INTEGER NOT NULL REFERENCES zones(zone_id),
+    "timestamp"            DATE NOT NULL,
+    rainfall_mm            FLOAT,
+    avg_temp_celsius       FLOAT,
+    water_consumption_mld  FLOAT,
+    population             INTEGER,
+    gdp_per_capita         FLOAT,
+    literacy_rate          FLOAT,
+    urban_density          FLOAT,
+    infrastructure_score   FLOAT,
+    monsoon_dependency     FLOAT,
+    groundwater_level      FLOAT,
+    industrial_demand      FLOAT,
+    agricultural_demand    FLOAT,
+    water_recycling_rate   FLOAT,
+    drought_risk_index     FLOAT,
+    humidity               FLOAT,
+    wind_speed             FLOAT,
+    solar_radiation        FLOAT
+"""
+
+WATER_DATA_INDEXES_DDL = """
+CREATE INDEX IF NOT EXISTS idx_water_data_timestamp_brin ON water_data USING BRIN ("timestamp");
+CREATE INDEX IF NOT EXISTS idx_water_data_zone_timestamp ON water_data (zone_id, "timestamp");
+"""
+
+# Ingest runs over a date range (completed_at stays NULL until every zone loaded; only
+# the latest unfinished run for a range is resumed), and completed ingest units: one
+# zone's rows for one date range, loaded and committed by run_id (NULL for checkpoints
+# written before runs were tracked, so they never cause a zone to be skipped)
+INGEST_CHECKPOINTS_DDL = """
+CREATE TABLE IF NOT EXISTS ingest_runs (
+    run_id        SERIAL PRIMARY KEY,
+    start_date    DATE NOT NULL,
+    end_date      DATE NOT NULL,
+    started_at    TIMESTAMP NOT NULL DEFAULT now(),
+    completed_at  TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+    zone_id       INTEGER NOT NULL REFERENCES zones(zone_id) ON DELETE CASCADE,
+    start_date    DATE NOT NULL,
+    end_date      DATE NOT NULL,
+    rows_loaded   INTEGER NOT NULL,
+    completed_at  TIMESTAMP NOT NULL DEFAULT now(),
+    PRIMARY KEY (zone_id, start_date, end_date)
+);
+ALTER TABLE ingest_checkpoints ADD COLUMN IF NOT EXISTS run_id INTEGER REFERENCES ingest_runs(run_id) ON DELETE SET NULL;
+"""
+
+def table_kind(conn, table_name):
+    """'p' for a partitioned table, 'r' for a plain heap table, None if missing"""
+    return conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"),
+                        {"name": table_name}).scalar()
+
+def ensure_default_partition(conn):
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF water_data DEFAULT"))
+
+def ensure_partitions(conn, first_year, last_year):
+    """Create yearly partitions for first_year..last_year if they don't exist.
+
+    Rows of a new year already in the default partition are moved into it (Postgres
+    refuses to create a partition whose range overlaps rows in the default one).
+    """
+    for year in range(int(first_year), int(last_year) + 1):
+        partition = f"{PARTITION_PREFIX}{year}"
+        if table_kind(conn, partition) is not None:
+            continue
+        bounds = f"\"timestamp\" >= '{year}-01-01' AND \"timestamp\" < '{year + 1}-01-01'"
+        stray = table_kind(conn, DEFAULT_PARTITION) is not None and conn.execute(
+            text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {bounds})")
+        ).scalar()
+        if stray:
+            conn.execute(text(f"CREATE TEMP TABLE water_data_moving AS SELECT * FROM {DEFAULT_PARTITION} WHERE {bounds}"))
+            conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {bounds}"))
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {partition} PARTITION OF water_data
+            FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')
+        """))
+        if stray:
+            moved = conn.execute(text("INSERT INTO water_data SELECT * FROM water_data_moving")).rowcount
+            conn.execute(text("DROP TABLE water_data_moving"))
+            print(f"Moved {moved} rows from {DEFAULT_PARTITION} into {partition}.")
+
+def list_partitions(conn):
+    """Years of the existing water_data partitions, ascending"""
+    rows = conn.execute(text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass('water_data')
+    """)).fetchall()
+    pattern = re.compile(rf"^{PARTITION_PREFIX}(\d{{4}})$")
+    return sorted(int(m.group(1)) for (name,) in rows if (m := pattern.match(name)))
+
+def drop_partitions_before(conn, year):
+    """Retention: drop whole partitions older than year (no row-by-row DELETE)"""
+    dropped = [y for y in list_partitions(conn) if y < year]
+    for y in dropped:
+        conn.execute(text(f"DROP TABLE IF EXISTS {PARTITION_PREFIX}{y}"))
+    return dropped
+
+def _migrate_legacy_table(conn):
+    """Move an unpartitioned water_data into the partitioned layout"""
+    print("Migrating water_data to a partitioned table...")
+    conn.execute(text("ALTER TABLE water_data RENAME TO water_data_legacy"))
+    conn.execute(text(f"CREATE TABLE water_data ({WATER_DATA_COLUMNS_DDL}) PARTITION BY RANGE (\"timestamp\")"))
+    first_year, last_year = conn.execute(text("""
+        SELECT EXTRACT(YEAR FROM MIN("timestamp"))::int, EXTRACT(YEAR FROM MAX("timestamp"))::int
+        FROM water_data_legacy
+    """)).fetchone()
+    ensure_default_partition(conn)
+    if first_year is not None:
+        ensure_partitions(conn, first_year, last_year)
+
+    # Copy the columns both tables share (older tables may lack the enhanced ones)
+    legacy_columns = {row[0] for row in conn.execute(text("""
+        SELECT column_name FROM information_schema.columns WHERE table_name = 'water_data_legacy'
+    """))}
+    new_columns = [row[0] for row in conn.execute(text("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_name = 'water_data' ORDER BY ordinal_position
+    """))]
+    shared = ", ".join(f'"{c}"' for c in new_columns if c in legacy_columns)
+    moved = conn.execute(text(f"""
+        INSERT INTO water_data ({shared})
+        SELECT {shared} FROM water_data_legacy
+        WHERE zone_id IS NOT NULL AND "timestamp" IS NOT NULL
+    """)).rowcount
+    conn.execute(text("DROP TABLE water_data_legacy"))
+    print(f"Moved {moved} rows into partitioned water_data.")
+
+def backfill_centroids(conn):
+    """Store centroids for zones inserted without one (seed_zones.sql, older rows)"""
+    return conn.execute(text("""
+        UPDATE zones SET centroid = ST_Centroid(geometry)
+        WHERE centroid IS NULL AND geometry IS NOT NULL
+    """)).rowcount
+
+def ensure_zone_centroid(conn):
+    """Add and backfill zones.centroid if it's missing; False if there is no zones table.
+
+    Checked first so API start-up doesn't take an ALTER TABLE lock when nothing changes.
+    """
+    columns = {row[0] for row in conn.execute(text(
+        "SELECT column_name FROM information_schema.columns WHERE table_name = 'zones'"
+    ))}
+    if not columns:
+        return False
+    if "centroid" not in columns:
+        conn.execute(text(ZONES_CENTROID_DDL))
+        backfill_centroids(conn)
+        conn.commit()
+        print("Added zones.centroid.")
+    return True
+
+def ensure_schema(conn, first_year=None, last_year=None, future_years=FUTURE_YEARS):
+    """Create or migrate zones/water_data, indexes and partitions through last_year + future_years"""
+    current_year = datetime.date.today().year
+    first_year = first_year or current_year
+    last_year = max(last_year or current_year, current_year) + future_years
+
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS postgis"))
+    conn.execute(text(ZONES_DDL))
+    backfill_centroids(conn)
+
+    kind = table_kind(conn, "water_data")
+    if kind is None:
+        conn.execute(text(f"CREATE TABLE water_data ({WATER_DATA_COLUMNS_DDL}) PARTITION BY RANGE (\"timestamp\")"))
+    elif kind == "r":
+        _migrate_legacy_table(conn)
+
+    ensure_default_partition(conn)
+    ensure_partitions(conn, first_year, last_year)
+    conn.execute(text(WATER_DATA_INDEXES_DDL))
+    conn.execute(text(INGEST_CHECKPOINTS_DDL))
+    conn.commit()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create or migrate the managed database schema")
+    parser.add_argument("--first-year", type=int, help="Earliest partition to create")
+    parser.add_argument("--future-years", type=int, default=FUTURE_YEARS)
+    parser.add_argument("--retain-years", type=int, help="Drop partitions older than this many years")
+    args = parser.parse_args()
+
+    engine = create_engine(os.getenv("DATABASE_URL"))
+    with engine.connect() as conn:
+        ensure_schema(conn, args.first_year, future_years=args.future_years)
+        if args.retain_years:
+            dropped = drop_partitions_before(conn, datetime.date.today().year - args.retain_years + 1)
+            conn.commit()
+            print(f"Dropped partitions: {dropped or 'none'}")
+        print(f"water_data partitions: {list_partitions(conn)}")
+    print("✅ Schema is up to date!")
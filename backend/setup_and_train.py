@@ -1,4 +1,6 @@
 import os
+import time
+import argparse
 import pandas as pd
 import numpy as np
 import joblib
@@ -11,6 +13,15 @@ from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_absolute_error, r2_score
 from dotenv import load_dotenv
+from schema import ensure_schema
+from power_archive import POWER_ARCHIVE, POWER_MODES, PowerArchive, make_fetcher
+from pipeline_profile import get_profiler, start_profiling, default_report_path
+from model_compaction import COMPACT_MODEL_FILENAME, COMPACT_MAE_TOLERANCE, compact_and_save
+from feature_engine import MODEL_FEATURES, calendar_features, drought_risk_index
+from model_registry import ModelRegistry, REGISTRY_DIR, REGISTRY_FILENAME, region_for
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from collections import deque
+from itertools import islice
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -18,10 +29,22 @@ load_dotenv()
 
 # --- Configuration ---
 DB_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DB_URL)
+# No engine without DATABASE_URL, so the feature functions can be imported offline
+engine = create_engine(DB_URL) if DB_URL else None
 MODEL_FILENAME = "water_model.joblib"
 START_DATE = "20210101"
 END_DATE = "20241231"
+# Zones fetched ahead of the loader (bounds buffered responses) and per-request timeout
+INGEST_MAX_IN_FLIGHT = int(os.getenv("INGEST_MAX_IN_FLIGHT", "4"))
+FETCH_TIMEOUT = 120
+
+# Columns loaded into water_data, in insert order
+WATER_DATA_COLUMNS = [
+    'zone_id', 'timestamp', 'rainfall_mm', 'avg_temp_celsius', 'water_consumption_mld', 
+    'population', 'gdp_per_capita', 'literacy_rate', 'urban_density', 'infrastructure_score',
+    'monsoon_dependency', 'groundwater_level', 'industrial_demand', 'agricultural_demand',
+    'water_recycling_rate', 'drought_risk_index', 'humidity', 'wind_speed', 'solar_radiation'
+]
 
 def get_indian_demographic_data(zone_name, year):
     """Get real Indian demographic and infrastructure data"""
@@ -81,193 +104,252 @@ def calculate_monsoon_dependency(latitude, longitude):
     else:  # Central regions
         return 0.60  # Lower monsoon dependency
 
-def update_data_and_retrain_model():
+def add_zone_features(df_api, zone_name, latitude, longitude):
+    """Add demographic, infrastructure and environmental features to a zone's daily weather frame"""
+    # Add enhanced features for each year
+    with get_profiler().stage("zone_features") as stage:
+        stage["rows"] = len(df_api)
+        _add_yearly_features(df_api, zone_name, latitude, longitude)
+
+    # Calculate drought risk index based on multiple factors
+    df_api['drought_risk_index'] = drought_risk_index(
+        df_api['avg_temp_celsius'].to_numpy(), df_api['rainfall_mm'].to_numpy(),
+        df_api['monsoon_dependency'].to_numpy(), df_api['humidity'].to_numpy()
+    )
+    return df_api
+
+def _add_yearly_features(df_api, zone_name, latitude, longitude):
+    for year in df_api['timestamp'].dt.year.unique():
+        year_mask = df_api['timestamp'].dt.year == year
+
+        # Get real Indian demographic data
+        demo_data = get_indian_demographic_data(zone_name, year)
+        df_api.loc[year_mask, 'population'] = demo_data['population']
+        df_api.loc[year_mask, 'gdp_per_capita'] = demo_data['gdp_per_capita']
+        df_api.loc[year_mask, 'literacy_rate'] = demo_data['literacy_rate']
+        df_api.loc[year_mask, 'urban_density'] = demo_data['urban_density']
+
+        # Infrastructure and geographic factors
+        df_api.loc[year_mask, 'infrastructure_score'] = get_water_infrastructure_score(zone_name)
+        df_api.loc[year_mask, 'monsoon_dependency'] = calculate_monsoon_dependency(latitude, longitude)
+
+        # Seasonal and environmental factors
+        df_api.loc[year_mask, 'groundwater_level'] = 15 + np.random.normal(0, 3)  # meters
+        df_api.loc[year_mask, 'industrial_demand'] = demo_data['gdp_per_capita'] * 0.002  # MLD
+        df_api.loc[year_mask, 'agricultural_demand'] = 8 + (latitude - 10) * 0.5  # MLD
+        df_api.loc[year_mask, 'water_recycling_rate'] = min(30, demo_data['literacy_rate'] * 0.3)  # %
+
+def calculate_water_consumption(df_api):
+    """Multi-factor water consumption model (MLD) used as the training target"""
+    # Enhanced water consumption calculation with real factors
+    base_consumption = 12 + (df_api['population'] / 100000) * 2
+    temp_factor = (df_api['avg_temp_celsius'] - 28) * 0.8
+    rain_factor = -df_api['rainfall_mm'] * 0.1
+    infrastructure_factor = (10 - df_api['infrastructure_score']) * 0.5
+    drought_factor = df_api['drought_risk_index'] * 0.3
+    industrial_factor = df_api['industrial_demand'] * 0.8
+    agricultural_factor = df_api['agricultural_demand'] * 0.6
+
+    return (
+        base_consumption + temp_factor + rain_factor + 
+        infrastructure_factor + drought_factor + 
+        industrial_factor + agricultural_factor +
+        np.random.normal(0, 1.2, len(df_api))
+    ).clip(5, 100).round(2)
+
+def fetch_power_raw(latitude, longitude, start_date=START_DATE, end_date=END_DATE):
+    """Raw NASA POWER daily response body (JSON bytes) for one point"""
+    # Get NASA weather data with additional parameters
+    api_url = (
+        "https://power.larc.nasa.gov/api/temporal/daily/point"
+        f"?parameters=T2M,PRECTOTCORR,RH2M,WS2M,ALLSKY_SFC_SW_DWN"
+        f"&start={start_date}&end={end_date}"
+        f"&latitude={latitude}&longitude={longitude}"
+        "&community=RE&format=JSON"
+    )
+    response = requests.get(api_url, timeout=FETCH_TIMEOUT)
+    response.raise_for_status()
+    return response.content
+
+def parse_power_response(json_data):
+    """Daily weather frame from a NASA POWER response (-999 gaps forward-filled)"""
+    params = json_data['properties']['parameter']
+    df_api = pd.DataFrame({
+        'timestamp': pd.to_datetime(list(params['T2M'].keys()), format='%Y%m%d'),
+        'avg_temp_celsius': list(params['T2M'].values()),
+        'rainfall_mm': list(params['PRECTOTCORR'].values()),
+        'humidity': list(params.get('RH2M', {}).values()) if 'RH2M' in params else [60] * len(params['T2M']),
+        'wind_speed': list(params.get('WS2M', {}).values()) if 'WS2M' in params else [3.5] * len(params['T2M']),
+        'solar_radiation': list(params.get('ALLSKY_SFC_SW_DWN', {}).values()) if 'ALLSKY_SFC_SW_DWN' in params else [18] * len(params['T2M'])
+    })
+    
+    df_api.replace(-999, np.nan, inplace=True)
+    df_api.ffill(inplace=True)
+    return df_api
+
+def transform_zone(df_api, zone_id, zone_name, latitude, longitude):
+    """water_data rows for one zone from its parsed weather"""
+    add_zone_features(df_api, zone_name, latitude, longitude)
+    df_api['water_consumption_mld'] = calculate_water_consumption(df_api)
+    df_api['zone_id'] = zone_id
+    
+    # Ensure proper data types
+    df_to_insert = df_api[WATER_DATA_COLUMNS].copy()
+    df_to_insert['zone_id'] = df_to_insert['zone_id'].astype(int)
+    df_to_insert['population'] = df_to_insert['population'].astype(int)
+    return df_to_insert
+
+def load_zone_unit(frame, zone_id, start_date, end_date, run_id=None):
+    """Replace the zone's rows for the range and checkpoint the unit for run_id, in one transaction"""
+    csv = io.StringIO()
+    frame.to_csv(csv, index=False, header=False)
+    csv.seek(0)
+    raw_conn = engine.raw_connection()
+    try:
+        cursor = raw_conn.cursor()
+        cursor.execute(
+            'DELETE FROM water_data WHERE zone_id = %s AND "timestamp" BETWEEN %s AND %s',
+            (zone_id, start_date, end_date)
+        )
+        cursor.copy_expert(f"COPY water_data ({', '.join(WATER_DATA_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", csv)
+        cursor.execute("""
+            INSERT INTO ingest_checkpoints (zone_id, start_date, end_date, rows_loaded, run_id)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (zone_id, start_date, end_date)
+            DO UPDATE SET rows_loaded = EXCLUDED.rows_loaded, run_id = EXCLUDED.run_id, completed_at = now()
+        """, (zone_id, start_date, end_date, len(frame), run_id))
+        raw_conn.commit()
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
+
+def open_ingest_run(conn, start_date, end_date, fresh=False):
+    """(run_id, resumed): the range's latest run if it never finished, else a new run.
+
+    A finished range is ingested again in full on the next run; only an interrupted
+    or partly failed run is resumed. fresh=True always starts a new run.
+    """
+    latest = None if fresh else conn.execute(text("""
+        SELECT run_id, completed_at FROM ingest_runs
+        WHERE start_date = :start AND end_date = :end
+        ORDER BY run_id DESC LIMIT 1
+    """), {"start": start_date, "end": end_date}).fetchone()
+    if latest is not None and latest[1] is None:
+        return latest[0], True
+    run_id = conn.execute(text("""
+        INSERT INTO ingest_runs (start_date, end_date) VALUES (:start, :end) RETURNING run_id
+    """), {"start": start_date, "end": end_date}).scalar_one()
+    conn.commit()
+    return run_id, False
+
+def finish_ingest_run(run_id):
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE ingest_runs SET completed_at = now() WHERE run_id = :run_id"), {"run_id": run_id})
+
+def completed_units(conn, run_id):
+    """zone_ids the run has already loaded and checkpointed"""
+    rows = conn.execute(text("SELECT zone_id FROM ingest_checkpoints WHERE run_id = :run_id"),
+                        {"run_id": run_id}).fetchall()
+    return {row[0] for row in rows}
+
+def update_data_and_retrain_model(fresh=False, max_in_flight=INGEST_MAX_IN_FLIGHT,
+                                  start_date=START_DATE, end_date=END_DATE, fetcher=fetch_power_raw):
+    """Streaming, resumable ingest: each zone is fetched, transformed and loaded on its own.
+
+    At most max_in_flight fetched responses are buffered, and each loaded zone is
+    checkpointed for the run in the same transaction as its rows. Restarting an
+    interrupted (or partly failed) run skips the zones it completed; once a run
+    finishes, the next one ingests every zone again. fresh=True starts a new run
+    even if the last one is unfinished.
+    fetcher returns the raw response body (live, or recorded/replayed via power_archive).
+    """
     print("Starting enhanced data update with real Indian factors...")
+    first, last = pd.Timestamp(start_date).date(), pd.Timestamp(end_date).date()
 
     with engine.connect() as conn:
-        # Update table structure to include new columns
-        try:
-            conn.execute(text("""
-                ALTER TABLE water_data 
-                ADD COLUMN IF NOT EXISTS gdp_per_capita FLOAT,
-                ADD COLUMN IF NOT EXISTS literacy_rate FLOAT,
-                ADD COLUMN IF NOT EXISTS urban_density FLOAT,
-                ADD COLUMN IF NOT EXISTS infrastructure_score FLOAT,
-                ADD COLUMN IF NOT EXISTS monsoon_dependency FLOAT,
-                ADD COLUMN IF NOT EXISTS groundwater_level FLOAT,
-                ADD COLUMN IF NOT EXISTS industrial_demand FLOAT,
-                ADD COLUMN IF NOT EXISTS agricultural_demand FLOAT,
-                ADD COLUMN IF NOT EXISTS water_recycling_rate FLOAT,
-                ADD COLUMN IF NOT EXISTS drought_risk_index FLOAT,
-                ADD COLUMN IF NOT EXISTS humidity FLOAT,
-                ADD COLUMN IF NOT EXISTS wind_speed FLOAT,
-                ADD COLUMN IF NOT EXISTS solar_radiation FLOAT
-            """))
-            conn.commit()
-        except Exception as e:
-            print(f"Table already has new columns or error: {e}")
-        
-        conn.execute(text("TRUNCATE water_data;"))
-        print("Cleared old water data.")
-
-        query = text("SELECT zone_id, zone_name, ST_AsGeoJSON(ST_Centroid(geometry)) as centroid FROM zones;")
+        # Managed schema: partitioned water_data with indexes, partitions for the ingest range
+        ensure_schema(conn, first.year, last.year)
+        query = text("SELECT zone_id, zone_name, ST_AsGeoJSON(COALESCE(centroid, ST_Centroid(geometry))) as centroid FROM zones;")
         zones = conn.execute(query).fetchall()
-
         if not zones:
             print("No zones found. Please draw a zone first.")
             return
+        run_id, resumed = open_ingest_run(conn, first, last, fresh)
+        done = completed_units(conn, run_id) if resumed else set()
+
+    pending = [zone for zone in zones if zone[0] not in done]
+    print(f"Found {len(zones)} zones in the database; "
+          + (f"resuming ingest run {run_id}: {len(zones) - len(pending)} already ingested, "
+             if resumed else f"starting ingest run {run_id}: ")
+          + f"{len(pending)} to fetch.")
 
-        print(f"Found {len(zones)} zones in the database. Fetching enhanced data for each...")
+    profiler = get_profiler()
 
-        all_zones_df = []
-        for zone_id, zone_name, centroid_geojson in zones:
-            centroid = json.loads(centroid_geojson)
-            longitude, latitude = centroid['coordinates']
-            print(f"Fetching enhanced data for zone: '{zone_name}' (Lat: {latitude:.2f}, Lon: {longitude:.2f})")
+    def fetch(zone):
+        zone_id, zone_name, centroid_geojson = zone
+        longitude, latitude = json.loads(centroid_geojson)['coordinates']
+        with profiler.stage("fetch", zone=zone_id) as stage:
+            body = fetcher(latitude, longitude, start_date, end_date)
+            stage["bytes"] = len(body)
+        return body
 
-            # Get NASA weather data with additional parameters
-            api_url = (
-                "https://power.larc.nasa.gov/api/temporal/daily/point"
-                f"?parameters=T2M,PRECTOTCORR,RH2M,WS2M,ALLSKY_SFC_SW_DWN"
-                f"&start={START_DATE}&end={END_DATE}"
-                f"&latitude={latitude}&longitude={longitude}"
-                "&community=RE&format=JSON"
-            )
+    loaded_zones, loaded_rows, failed = 0, 0, []
+    started = time.perf_counter()
+    # Network fetches run ahead in threads; transform and load stay on this thread
+    # (the feature functions use the global NumPy RNG) and release each frame once loaded
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        in_flight = deque()
+        zone_iter = iter(pending)
+        for zone in islice(zone_iter, max_in_flight):
+            in_flight.append((zone, executor.submit(fetch, zone)))
 
+        while in_flight:
+            zone, future = in_flight.popleft()
+            next_zone = next(zone_iter, None)
+            if next_zone is not None:
+                in_flight.append((next_zone, executor.submit(fetch, next_zone)))
+
+            zone_id, zone_name, centroid_geojson = zone
+            longitude, latitude = json.loads(centroid_geojson)['coordinates']
+            print(f"Ingesting enhanced data for zone: '{zone_name}' (Lat: {latitude:.2f}, Lon: {longitude:.2f})")
             try:
-                response = requests.get(api_url)
-                response.raise_for_status()
-                json_data = response.json()
-            except requests.exceptions.RequestException as e:
+                with profiler.stage("fetch_wait", zone=zone_id):
+                    body = future.result()
+                with profiler.stage("parse", zone=zone_id) as stage:
+                    df_api = parse_power_response(json.loads(body))
+                    stage["rows"] = len(df_api)
+            except (requests.exceptions.RequestException, KeyError, ValueError) as e:
                 print(f"  -> WARNING: Failed for '{zone_name}'. Skipping. Error: {e}")
+                failed.append(zone_name)
                 continue
 
-            params = json_data['properties']['parameter']
-            df_api = pd.DataFrame({
-                'timestamp': pd.to_datetime(list(params['T2M'].keys()), format='%Y%m%d'),
-                'avg_temp_celsius': list(params['T2M'].values()),
-                'rainfall_mm': list(params['PRECTOTCORR'].values()),
-                'humidity': list(params.get('RH2M', {}).values()) if 'RH2M' in params else [60] * len(params['T2M']),
-                'wind_speed': list(params.get('WS2M', {}).values()) if 'WS2M' in params else [3.5] * len(params['T2M']),
-                'solar_radiation': list(params.get('ALLSKY_SFC_SW_DWN', {}).values()) if 'ALLSKY_SFC_SW_DWN' in params else [18] * len(params['T2M'])
-            })
-            
-            df_api.replace(-999, np.nan, inplace=True)
-            df_api.ffill(inplace=True)
-            
-            # Add enhanced features for each year
-            for year in df_api['timestamp'].dt.year.unique():
-                year_mask = df_api['timestamp'].dt.year == year
-                
-                # Get real Indian demographic data
-                demo_data = get_indian_demographic_data(zone_name, year)
-                df_api.loc[year_mask, 'population'] = demo_data['population']
-                df_api.loc[year_mask, 'gdp_per_capita'] = demo_data['gdp_per_capita']
-                df_api.loc[year_mask, 'literacy_rate'] = demo_data['literacy_rate']
-                df_api.loc[year_mask, 'urban_density'] = demo_data['urban_density']
-                
-                # Infrastructure and geographic factors
-                df_api.loc[year_mask, 'infrastructure_score'] = get_water_infrastructure_score(zone_name)
-                df_api.loc[year_mask, 'monsoon_dependency'] = calculate_monsoon_dependency(latitude, longitude)
-                
-                # Seasonal and environmental factors
-                df_api.loc[year_mask, 'groundwater_level'] = 15 + np.random.normal(0, 3)  # meters
-                df_api.loc[year_mask, 'industrial_demand'] = demo_data['gdp_per_capita'] * 0.002  # MLD
-                df_api.loc[year_mask, 'agricultural_demand'] = 8 + (latitude - 10) * 0.5  # MLD
-                df_api.loc[year_mask, 'water_recycling_rate'] = min(30, demo_data['literacy_rate'] * 0.3)  # %
-            
-            # Calculate drought risk index based on multiple factors
-            df_api['drought_risk_index'] = (
-                (df_api['avg_temp_celsius'] - 25) * 0.1 +
-                (40 - df_api['rainfall_mm']) * 0.02 +
-                df_api['monsoon_dependency'] * 2 +
-                (100 - df_api['humidity']) * 0.01
-            ).clip(0, 10)
-            
-            # Enhanced water consumption calculation with real factors
-            base_consumption = 12 + (df_api['population'] / 100000) * 2
-            temp_factor = (df_api['avg_temp_celsius'] - 28) * 0.8
-            rain_factor = -df_api['rainfall_mm'] * 0.1
-            infrastructure_factor = (10 - df_api['infrastructure_score']) * 0.5
-            drought_factor = df_api['drought_risk_index'] * 0.3
-            industrial_factor = df_api['industrial_demand'] * 0.8
-            agricultural_factor = df_api['agricultural_demand'] * 0.6
-            
-            df_api['water_consumption_mld'] = (
-                base_consumption + temp_factor + rain_factor + 
-                infrastructure_factor + drought_factor + 
-                industrial_factor + agricultural_factor +
-                np.random.normal(0, 1.2, len(df_api))
-            ).clip(5, 100).round(2)
-            
-            df_api['zone_id'] = zone_id
-            all_zones_df.append(df_api)
-
-        if not all_zones_df:
-            print("No data fetched. Aborting.")
-            return
+            with profiler.stage("transform", zone=zone_id) as stage:
+                frame = transform_zone(df_api, zone_id, zone_name, latitude, longitude)
+                stage["rows"] = len(frame)
+            with profiler.stage("load", zone=zone_id) as stage:
+                load_zone_unit(frame, zone_id, first, last, run_id)
+                stage["rows"] = len(frame)
+            loaded_zones += 1
+            loaded_rows += len(frame)
+            print(f"  -> Loaded {len(frame)} rows ({loaded_rows / (time.perf_counter() - started):,.0f} rows/s)")
 
-        final_df = pd.concat(all_zones_df)
-        print(f"Total records to insert: {len(final_df)}")
-
-        # Insert enhanced data with proper data types
-        columns_to_insert = [
-            'zone_id', 'timestamp', 'rainfall_mm', 'avg_temp_celsius', 'water_consumption_mld', 
-            'population', 'gdp_per_capita', 'literacy_rate', 'urban_density', 'infrastructure_score',
-            'monsoon_dependency', 'groundwater_level', 'industrial_demand', 'agricultural_demand',
-            'water_recycling_rate', 'drought_risk_index', 'humidity', 'wind_speed', 'solar_radiation'
-        ]
-        
-        df_to_insert = final_df[columns_to_insert].copy()
-        
-        # Ensure proper data types
-        df_to_insert['zone_id'] = df_to_insert['zone_id'].astype(int)
-        df_to_insert['population'] = df_to_insert['population'].astype(int)
-        
-        # Insert row by row to handle data type issues
-        insert_query = text(f"""
-            INSERT INTO water_data ({', '.join(columns_to_insert)})
-            VALUES ({', '.join([':' + col for col in columns_to_insert])})
-        """)
-        
-        batch_size = 1000
-        total_rows = len(df_to_insert)
-        
-        for i in range(0, total_rows, batch_size):
-            batch = df_to_insert.iloc[i:i+batch_size]
-            batch_data = batch.to_dict('records')
-            
-            conn.execute(insert_query, batch_data)
-            conn.commit()
-            
-            print(f"Inserted batch {i//batch_size + 1}/{(total_rows-1)//batch_size + 1}")
-        
-        print("Successfully inserted enhanced data with real Indian factors.")
-
-def train_model():
-    print("Training enhanced prediction model with Indian factors...")
-    with engine.connect() as conn:
-        df = pd.read_sql("SELECT * FROM water_data", conn)
-
-    if df.empty:
-        print("No data in water_data. Aborting training.")
-        return
+    elapsed = time.perf_counter() - started
+    print(f"Successfully ingested {loaded_zones} zones ({loaded_rows} rows) with real Indian factors "
+          f"in {elapsed:.1f}s ({loaded_rows / max(elapsed, 1e-9):,.0f} rows/s).")
+    if failed:
+        print(f"{len(failed)} zones failed and will be retried on the next run: {', '.join(failed)}")
+    else:
+        finish_ingest_run(run_id)
 
+def prepare_training_frame(df):
+    """Add calendar features and return the frame with the available model features"""
     df['timestamp'] = pd.to_datetime(df['timestamp'])
-    df['month'] = df['timestamp'].dt.month
-    df['day_of_year'] = df['timestamp'].dt.dayofyear
-    df['season'] = df['month'].map({12: 0, 1: 0, 2: 0,  # Winter
-                                   3: 1, 4: 1, 5: 1,   # Summer  
-                                   6: 2, 7: 2, 8: 2, 9: 2,  # Monsoon
-                                   10: 3, 11: 3})      # Post-monsoon
+    for name, values in calendar_features(df['timestamp'].to_numpy()).items():
+        df[name] = values
     
-    # Enhanced feature set with real Indian factors
-    features = [
-        'zone_id', 'rainfall_mm', 'avg_temp_celsius', 'population', 'month', 'day_of_year', 'season',
-        'gdp_per_capita', 'literacy_rate', 'urban_density', 'infrastructure_score', 
-        'monsoon_dependency', 'groundwater_level', 'industrial_demand', 'agricultural_demand',
-        'water_recycling_rate', 'drought_risk_index', 'humidity', 'wind_speed', 'solar_radiation'
-    ]
+    features = MODEL_FEATURES
     
     # Handle missing columns gracefully
     available_features = [f for f in features if f in df.columns]
@@ -276,12 +358,9 @@ def train_model():
     if missing_features:
         print(f"Warning: Missing features {missing_features}, using available features only")
         features = available_features
-    
-    target = 'water_consumption_mld'
-
-    X, y = df[features], df[target]
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    return df, features
 
+def fit_forest(X_train, y_train, n_jobs=-1):
     # Enhanced Random Forest with better parameters for Indian data
     model = RandomForestRegressor(
         n_estimators=200,
@@ -289,16 +368,42 @@ def train_model():
         min_samples_split=5,
         min_samples_leaf=2,
         random_state=42,
-        n_jobs=-1
+        n_jobs=n_jobs
     )
     
     model.fit(X_train, y_train)
+    return model
+
+def train_model(compact=True, compact_tolerance=COMPACT_MAE_TOLERANCE):
+    print("Training enhanced prediction model with Indian factors...")
+    profiler = get_profiler()
+    with profiler.stage("read_sql") as stage, engine.connect() as conn:
+        df = pd.read_sql("SELECT * FROM water_data", conn)
+        stage["rows"] = len(df)
+
+    if df.empty:
+        print("No data in water_data. Aborting training.")
+        return
+
+    with profiler.stage("prepare_features") as stage:
+        df, features = prepare_training_frame(df)
+        target = 'water_consumption_mld'
+
+        X, y = df[features], df[target]
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        stage["rows"] = len(df)
+
+    with profiler.stage("fit") as stage:
+        model = fit_forest(X_train, y_train)
+        stage["rows"] = len(X_train)
     
     # Enhanced evaluation
-    train_score = model.score(X_train, y_train)
-    test_score = model.score(X_test, y_test)
-    y_pred = model.predict(X_test)
-    mae = mean_absolute_error(y_test, y_pred)
+    with profiler.stage("evaluate") as stage:
+        train_score = model.score(X_train, y_train)
+        test_score = model.score(X_test, y_test)
+        y_pred = model.predict(X_test)
+        mae = mean_absolute_error(y_test, y_pred)
+        stage["rows"] = len(X_train) + len(X_test)
     
     print(f"Enhanced Model Performance:")
     print(f"  Training R²: {train_score:.3f}")
@@ -316,13 +421,174 @@ def train_model():
         print(f"  {row['feature']}: {row['importance']:.3f}")
     
     # Save model and feature list
-    joblib.dump(model, MODEL_FILENAME)
-    joblib.dump(features, "model_features.joblib")
+    with profiler.stage("dump") as stage:
+        joblib.dump(model, MODEL_FILENAME)
+        joblib.dump(features, "model_features.joblib")
+        stage["bytes"] = os.path.getsize(MODEL_FILENAME)
     print(f"Enhanced model saved as '{MODEL_FILENAME}'.")
 
+    if compact:
+        # Smaller serving artifact within compact_tolerance of this model's holdout MAE
+        with profiler.stage("compact"):
+            compact_and_save(model, MODEL_FILENAME, X_train, X_test, y_test, tolerance=compact_tolerance)
+
+def _train_region(region, zone_ids, database_url, n_jobs):
+    """Process-pool worker: fit one region's model on that region's slice of water_data"""
+    started = time.perf_counter()
+    region_engine = create_engine(database_url)
+    with region_engine.connect() as conn:
+        df = pd.read_sql(text("SELECT * FROM water_data WHERE zone_id = ANY(:ids)"), conn,
+                         params={"ids": [int(z) for z in zone_ids]})
+    region_engine.dispose()
+    if df.empty:
+        return region, None, None, None
+
+    df, features = prepare_training_frame(df)
+    X, y = df[features], df['water_consumption_mld']
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    model = fit_forest(X_train, y_train, n_jobs)
+    y_pred = model.predict(X_test)
+
+    model_path = os.path.join(REGISTRY_DIR, f"{region}.joblib")
+    joblib.dump(model, model_path)
+    metrics = {
+        "mae": round(float(mean_absolute_error(y_test, y_pred)), 4),
+        "r2": round(float(r2_score(y_test, y_pred)), 4),
+        "train_rows": len(X_train),
+        "test_rows": len(X_test),
+        "fit_seconds": round(time.perf_counter() - started, 2),
+    }
+    return region, model_path, features, metrics
+
+def train_regional_models(regions=None, max_workers=None):
+    """Train one model per monsoon-dependency region in a process pool and register them"""
+    print("Training per-region models...")
+    with engine.connect() as conn:
+        zones = conn.execute(text(
+            "SELECT zone_id, ST_X(c), ST_Y(c) FROM zones, COALESCE(centroid, ST_Centroid(geometry)) AS c"
+        )).fetchall()
+
+    # Same region assignment as the monsoon_dependency feature, without scanning water_data
+    region_zones = {}
+    for zone_id, longitude, latitude in zones:
+        region = region_for(calculate_monsoon_dependency(latitude, longitude))
+        region_zones.setdefault(region, []).append(zone_id)
+    if regions:
+        region_zones = {r: z for r, z in region_zones.items() if r in regions}
+    if not region_zones:
+        print("No zones in the requested regions. Aborting regional training.")
+        return
+
+    os.makedirs(REGISTRY_DIR, exist_ok=True)
+    registry = ModelRegistry.load()
+    workers = max_workers or min(len(region_zones), os.cpu_count() or 1)
+    n_jobs = max(1, (os.cpu_count() or 1) // workers)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_train_region, region, zone_ids, DB_URL, n_jobs)
+                   for region, zone_ids in region_zones.items()]
+        for future in as_completed(futures):
+            region, model_path, features, metrics = future.result()
+            if model_path is None:
+                print(f"  {region}: no data, skipped")
+                continue
+            registry.register(region, model_path, features, metrics, region_zones[region])
+            print(f"  {region}: {len(region_zones[region])} zones, MAE {metrics['mae']:.2f} MLD, "
+                  f"R² {metrics['r2']:.3f}, {metrics['fit_seconds']}s")
+    print(f"Region models registered in '{REGISTRY_FILENAME}'.")
+
+def notify_api_reload():
+    """Ask a running API (API_URL) to reload the model and drop cached predictions"""
+    api_url = os.getenv("API_URL")
+    if not api_url:
+        return
+    try:
+        response = requests.post(f"{api_url.rstrip('/')}/api/model/reload", timeout=60)
+        response.raise_for_status()
+        print(f"API reloaded model version {response.json().get('model_version')}.")
+    except requests.exceptions.RequestException as e:
+        print(f"WARNING: Could not notify API to reload the model: {e}")
+
+def notify_api_ingest():
+    """Tell a running API (API_URL) new data landed: drops cached predictions and zones, wakes the risk stream"""
+    api_url = os.getenv("API_URL")
+    if not api_url:
+        return
+    try:
+        response = requests.post(f"{api_url.rstrip('/')}/api/cache/invalidate", timeout=60)
+        response.raise_for_status()
+        print("API caches invalidated after ingest.")
+    except requests.exceptions.RequestException as e:
+        print(f"WARNING: Could not notify API of the ingest: {e}")
+
 if __name__ == "__main__":
-    if os.path.exists(MODEL_FILENAME):
-        os.remove(MODEL_FILENAME)
-    update_data_and_retrain_model()
-    train_model()
-    print("✅ Dynamic retraining complete!")
+    parser = argparse.ArgumentParser(description="Ingest data and retrain the water consumption model")
+    parser.add_argument("--skip-ingest", action="store_true", help="Retrain on the data already in water_data")
+    parser.add_argument("--regional", action="store_true", help="Also train per-region models")
+    parser.add_argument("--regions", help="Comma-separated regions to retrain alone (e.g. western,central)")
+    parser.add_argument("--workers", type=int, help="Processes for regional training")
+    parser.add_argument("--clear-regions", action="store_true",
+                        help="Unregister all per-region models (zones fall back to the global model) and exit")
+    parser.add_argument("--fresh", action="store_true",
+                        help="Start a new ingest run even if the last one was interrupted")
+    parser.add_argument("--in-flight", type=int, default=INGEST_MAX_IN_FLIGHT,
+                        help="Zones fetched ahead of the loader")
+    parser.add_argument("--power-mode", choices=POWER_MODES, default="live",
+                        help="live NASA POWER, record responses to the archive, or replay them offline")
+    parser.add_argument("--power-archive", default=POWER_ARCHIVE, help="Archive for --power-mode record/replay")
+    parser.add_argument("--ingest-only", action="store_true", help="Ingest without retraining (e.g. to benchmark replay)")
+    parser.add_argument("--no-compact", action="store_true", help="Skip building the compact serving model")
+    parser.add_argument("--compact-tolerance", type=float, default=COMPACT_MAE_TOLERANCE,
+                        help="Allowed holdout MAE increase of the compact model, as a fraction")
+    parser.add_argument("--report", help="Path of the JSON run report (default reports/setup_and_train_<timestamp>.json)")
+    parser.add_argument("--cprofile", action="store_true",
+                        help="cProfile the top-level stages and save the slowest one's profile next to the report")
+    parser.add_argument("--cprofile-stage", help="cProfile only this stage (e.g. fit, read_sql, load)")
+    args = parser.parse_args()
+
+    if args.clear_regions:
+        ModelRegistry.load().clear()
+        print(f"Cleared per-region models from '{REGISTRY_FILENAME}'.")
+        notify_api_reload()
+        raise SystemExit(0)
+
+    profiler = start_profiling(profile=args.cprofile, profile_stage=args.cprofile_stage)
+    try:
+        if args.regions:
+            # Retrain only the named regions, on their own slices of water_data
+            with profiler.stage("regional_training"):
+                train_regional_models(args.regions.split(","), args.workers)
+        else:
+            if not args.skip_ingest:
+                archive = PowerArchive(args.power_archive, "a" if args.power_mode == "record" else "r") \
+                    if args.power_mode != "live" else None
+                try:
+                    fetcher = make_fetcher(fetch_power_raw, args.power_mode, archive)
+                    with profiler.stage("ingest"):
+                        update_data_and_retrain_model(args.fresh, args.in_flight, fetcher=fetcher)
+                finally:
+                    if archive is not None:
+                        archive.close()
+                notify_api_ingest()
+            if args.ingest_only:
+                print("✅ Ingest complete!")
+                raise SystemExit(0)
+            for path in (MODEL_FILENAME, COMPACT_MODEL_FILENAME):
+                if os.path.exists(path):
+                    os.remove(path)
+            with profiler.stage("train"):
+                train_model(not args.no_compact, args.compact_tolerance)
+            if args.regional:
+                with profiler.stage("regional_training"):
+                    train_regional_models(max_workers=args.workers)
+            else:
+                # Region models were trained against older data and a different global model
+                stale = ModelRegistry.load().disable("global model retrained without --regional")
+                if stale:
+                    print(f"WARNING: Disabled region models {', '.join(stale)}; their zones now use the "
+                          "global model. Retrain them with --regional or --regions.")
+        notify_api_reload()
+        print("✅ Dynamic retraining complete!")
+    finally:
+        profiler.print_summary()
+        print(f"Run report written to '{profiler.write_report(args.report or default_report_path())}'.")
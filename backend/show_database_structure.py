@@ -3,80 +3,193 @@ DATABASE STRUCTURE VISUALIZATION
 Shows the complete database schema and data flow for REAL TIME WATER SCARCITY PREDICTION
 """
 
-from sqlalchemy import create_engine, text, inspect
+from sqlalchemy import create_engine, text
+from psycopg2 import sql
 from dotenv import load_dotenv
 import os
+import json
+import argparse
 import pandas as pd
 
 load_dotenv()
 
-def show_database_structure():
+SAMPLE_ROWS = 3
+SAMPLE_PERCENT = 1.0
+TOP_ZONES = 10
+
+# Tables and partitioned tables in public, with partitions rolled up into their parent.
+# Sizes and estimates are summed over pg_partition_tree (a plain table is its own tree).
+CATALOG_TABLES_QUERY = text("""
+    SELECT c.relname,
+           c.relkind = 'p' AS partitioned,
+           (SELECT count(*) FROM pg_partition_tree(c.oid) t WHERE t.isleaf AND t.relid <> c.oid) AS partitions,
+           (SELECT sum(greatest(l.reltuples, 0))::bigint
+            FROM pg_partition_tree(c.oid) t JOIN pg_class l ON l.oid = t.relid WHERE t.isleaf) AS row_estimate,
+           (SELECT sum(pg_table_size(t.relid)) FROM pg_partition_tree(c.oid) t WHERE t.isleaf)::bigint AS table_bytes,
+           (SELECT sum(pg_indexes_size(t.relid)) FROM pg_partition_tree(c.oid) t WHERE t.isleaf)::bigint AS index_bytes,
+           (SELECT sum(s.n_live_tup) FROM pg_partition_tree(c.oid) t
+            JOIN pg_stat_user_tables s ON s.relid = t.relid)::bigint AS live_rows,
+           (SELECT sum(s.n_dead_tup) FROM pg_partition_tree(c.oid) t
+            JOIN pg_stat_user_tables s ON s.relid = t.relid)::bigint AS dead_rows,
+           (SELECT sum(s.seq_scan) FROM pg_partition_tree(c.oid) t
+            JOIN pg_stat_user_tables s ON s.relid = t.relid)::bigint AS seq_scans,
+           (SELECT sum(s.idx_scan) FROM pg_partition_tree(c.oid) t
+            JOIN pg_stat_user_tables s ON s.relid = t.relid)::bigint AS index_scans,
+           (SELECT max(greatest(s.last_analyze, s.last_autoanalyze)) FROM pg_partition_tree(c.oid) t
+            JOIN pg_stat_user_tables s ON s.relid = t.relid) AS last_analyzed
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p') AND NOT c.relispartition
+    ORDER BY c.relname
+""")
+
+COLUMNS_QUERY = text("""
+    SELECT column_name, data_type, is_nullable, column_default
+    FROM information_schema.columns
+    WHERE table_schema = 'public' AND table_name = :table_name
+    ORDER BY ordinal_position
+""")
+
+# Index sizes, summed over the per-partition indexes of partitioned indexes
+INDEXES_QUERY = text("""
+    SELECT i.relname, am.amname,
+           (SELECT sum(pg_relation_size(t.relid)) FROM pg_partition_tree(i.oid) t WHERE t.isleaf)::bigint AS bytes,
+           pg_get_indexdef(i.oid) AS definition
+    FROM pg_index x
+    JOIN pg_class i ON i.oid = x.indexrelid
+    JOIN pg_am am ON am.oid = i.relam
+    WHERE x.indrelid = to_regclass(:table_name)
+    ORDER BY i.relname
+""")
+
+# Planner statistics; partitioned tables carry theirs on the parent with inherited = true
+COLUMN_STATS_QUERY = text("""
+    SELECT attname, null_frac, n_distinct, avg_width, correlation,
+           (histogram_bounds::text::text[])[1] AS histogram_min,
+           (histogram_bounds::text::text[])[array_length(histogram_bounds::text::text[], 1)] AS histogram_max,
+           (most_common_vals::text::text[])[1:3] AS most_common
+    FROM pg_stats
+    WHERE schemaname = 'public' AND tablename = :table_name AND inherited = :inherited
+""")
+
+def _json_default(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+def _megabytes(n_bytes):
+    return f"{(n_bytes or 0) / 1024 / 1024:,.1f} MB"
+
+def _print_columns(columns):
+    print(f"\n📋 COLUMNS ({len(columns)} total):")
+    print(f"{'Column Name':<30} {'Type':<20} {'Nullable':<10} {'Default'}")
+    print("-" * 80)
+    for col in columns:
+        default_str = str(col["default"])[:20] if col["default"] else "-"
+        print(f"{col['name']:<30} {col['type']:<20} {col['nullable']:<10} {default_str}")
+
+def exact_table_info(engine, table_name):
+    """COUNT(*) and sample rows; table names are composed as identifiers, never formatted in"""
+    raw_conn = engine.raw_connection()
+    try:
+        cursor = raw_conn.cursor()
+        table = sql.Identifier(table_name)
+        cursor.execute(sql.SQL("SELECT COUNT(*) FROM {}").format(table))
+        count = cursor.fetchone()[0]
+        cursor.execute(sql.SQL("SELECT * FROM {} LIMIT %s").format(table), (SAMPLE_ROWS,))
+        sample = pd.DataFrame(cursor.fetchall(), columns=[d[0] for d in cursor.description])
+    finally:
+        raw_conn.close()
+    return count, sample
+
+def catalog_table_info(conn, table):
+    """Sizes, estimates, index and per-column planner stats from the catalogs (no table scans)"""
+    indexes = conn.execute(INDEXES_QUERY, {"table_name": table["name"]}).fetchall()
+    stats = conn.execute(COLUMN_STATS_QUERY, {
+        "table_name": table["name"], "inherited": table["partitioned"]
+    }).fetchall()
+    table["indexes"] = [
+        {"name": name, "method": method, "bytes": int(size or 0), "definition": definition}
+        for name, method, size, definition in indexes
+    ]
+    table["column_stats"] = {
+        row[0]: {
+            "null_frac": row[1], "n_distinct": row[2], "avg_width": row[3], "correlation": row[4],
+            "min": row[5], "max": row[6], "most_common": row[7],
+        }
+        for row in stats
+    }
+    return table
+
+def collect_structure(engine, fast=False):
+    """Tables, columns and sizes. fast reads only catalogs; otherwise COUNT(*) plus sample rows."""
+    with engine.connect() as conn:
+        tables = []
+        for row in conn.execute(CATALOG_TABLES_QUERY).fetchall():
+            table = dict(zip(
+                ["name", "partitioned", "partitions", "row_estimate", "table_bytes", "index_bytes",
+                 "live_rows", "dead_rows", "seq_scans", "index_scans", "last_analyzed"], row
+            ))
+            table["columns"] = [
+                {"name": name, "type": data_type, "nullable": nullable, "default": default}
+                for name, data_type, nullable, default in conn.execute(COLUMNS_QUERY, {"table_name": table["name"]})
+            ]
+            if fast:
+                catalog_table_info(conn, table)
+            tables.append(table)
+
+    if not fast:
+        for table in tables:
+            table["row_count"], table["sample"] = exact_table_info(engine, table["name"])
+    return {"database": engine.url.database, "host": engine.url.host, "port": engine.url.port,
+            "mode": "fast" if fast else "exact", "tables": tables}
+
+def show_database_structure(structure=None, fast=False):
     """Display complete database structure"""
+    structure = structure or collect_structure(create_engine(os.getenv("DATABASE_URL")), fast)
     
     print("=" * 80)
     print("🗄️  REAL TIME WATER SCARCITY PREDICTION DATABASE STRUCTURE")
     print("=" * 80)
     print()
     
-    engine = create_engine(os.getenv("DATABASE_URL"))
+    print(f"📊 DATABASE: {structure['database']} (PostgreSQL + PostGIS)")
+    print(f"📍 Location: {structure['host']}:{structure['port']}")
+    print(f"📋 Tables: {len(structure['tables'])}")
+    print()
     
-    # Get database info
-    with engine.connect() as conn:
-        # Check tables
-        tables_query = text("""
-            SELECT table_name 
-            FROM information_schema.tables 
-            WHERE table_schema = 'public' 
-            AND table_type = 'BASE TABLE'
-        """)
-        tables = conn.execute(tables_query).fetchall()
+    for table in structure["tables"]:
+        print(f"{'='*80}")
+        partitions = f" ({table['partitions']} partitions)" if table["partitioned"] else ""
+        print(f"📁 TABLE: {table['name']}{partitions}")
+        print(f"{'='*80}")
         
-        print(f"📊 DATABASE: water_db (PostgreSQL + PostGIS)")
-        print(f"📍 Location: localhost:5432")
-        print(f"📋 Tables: {len(tables)}")
-        print()
+        _print_columns(table["columns"])
         
-        for table in tables:
-            table_name = table[0]
-            print(f"{'='*80}")
-            print(f"📁 TABLE: {table_name}")
-            print(f"{'='*80}")
-            
-            # Get column information
-            columns_query = text(f"""
-                SELECT 
-                    column_name, 
-                    data_type, 
-                    is_nullable,
-                    column_default
-                FROM information_schema.columns 
-                WHERE table_name = '{table_name}'
-                ORDER BY ordinal_position
-            """)
-            columns = conn.execute(columns_query).fetchall()
-            
-            print(f"\n📋 COLUMNS ({len(columns)} total):")
-            print(f"{'Column Name':<30} {'Type':<20} {'Nullable':<10} {'Default'}")
-            print("-" * 80)
-            
-            for col in columns:
-                col_name, data_type, nullable, default = col
-                default_str = str(default)[:20] if default else "-"
-                print(f"{col_name:<30} {data_type:<20} {nullable:<10} {default_str}")
-            
-            # Get row count
-            count_query = text(f"SELECT COUNT(*) FROM {table_name}")
-            count = conn.execute(count_query).scalar()
-            print(f"\n📊 TOTAL RECORDS: {count:,}")
-            
+        print(f"\n💾 SIZE: table {_megabytes(table['table_bytes'])}, indexes {_megabytes(table['index_bytes'])}")
+        if "row_count" in table:
+            print(f"📊 TOTAL RECORDS: {table['row_count']:,}")
             # Show sample data
-            if count > 0:
-                sample_query = text(f"SELECT * FROM {table_name} LIMIT 3")
-                sample = pd.read_sql(sample_query, conn)
-                print(f"\n📝 SAMPLE DATA (first 3 rows):")
-                print(sample.to_string(index=False))
-            
-            print()
+            if table["row_count"] > 0:
+                print(f"\n📝 SAMPLE DATA (first {SAMPLE_ROWS} rows):")
+                print(table["sample"].to_string(index=False))
+        else:
+            print(f"📊 ESTIMATED RECORDS: {table['row_estimate'] or 0:,} "
+                  f"(live {table['live_rows'] or 0:,}, dead {table['dead_rows'] or 0:,}, "
+                  f"last analyzed {table['last_analyzed'] or 'never'})")
+            print(f"🔎 SCANS: {table['seq_scans'] or 0:,} sequential, {table['index_scans'] or 0:,} index")
+            for index in table["indexes"]:
+                print(f"  🗂️  {index['name']:<40} {index['method']:<6} {_megabytes(index['bytes'])}")
+            if table["column_stats"]:
+                print(f"\n📐 COLUMN STATISTICS (pg_stats):")
+                print(f"{'Column':<25} {'Null %':>7} {'Distinct':>10} {'Min':>14} {'Max':>14}")
+                for name, stat in table["column_stats"].items():
+                    distinct = stat["n_distinct"]
+                    distinct_str = f"{-distinct:.0%} rows" if distinct is not None and distinct < 0 else f"{distinct or 0:,.0f}"
+                    print(f"{name:<25} {(stat['null_frac'] or 0) * 100:>6.1f}% {distinct_str:>10} "
+                          f"{str(stat['min'] or '-')[:14]:>14} {str(stat['max'] or '-')[:14]:>14}")
+            else:
+                print("\n📐 No planner statistics yet (run ANALYZE)")
+        
+        print()
 
 def show_data_sources():
     """Show where each database column gets its data"""
@@ -203,74 +316,117 @@ def show_data_flow():
     
     print(flow)
 
-def show_statistics():
+# One scan of water_data (or a TABLESAMPLE of it): per-zone aggregates, rolled up for
+# the overall figures and ranked for the top zones
+STATISTICS_QUERY = """
+    WITH per_zone AS (
+        SELECT zone_id,
+               COUNT(*) AS n,
+               MIN("timestamp") AS earliest, MAX("timestamp") AS latest,
+               SUM(water_consumption_mld) AS consumption_sum,
+               COUNT(water_consumption_mld) AS consumption_n,
+               MIN(water_consumption_mld) AS consumption_min, MAX(water_consumption_mld) AS consumption_max,
+               SUM(population) AS population_sum, COUNT(population) AS population_n,
+               SUM(gdp_per_capita) AS gdp_sum, COUNT(gdp_per_capita) AS gdp_n,
+               SUM(infrastructure_score) AS infrastructure_sum, COUNT(infrastructure_score) AS infrastructure_n,
+               SUM(drought_risk_index) AS drought_sum, COUNT(drought_risk_index) AS drought_n
+        FROM water_data {sample}
+        GROUP BY zone_id
+    ),
+    overall AS (
+        SELECT SUM(n) AS total_records, COUNT(*) AS unique_zones,
+               MIN(earliest) AS earliest_date, MAX(latest) AS latest_date,
+               SUM(consumption_sum) / NULLIF(SUM(consumption_n), 0) AS avg_consumption,
+               MIN(consumption_min) AS min_consumption, MAX(consumption_max) AS max_consumption,
+               SUM(population_sum) / NULLIF(SUM(population_n), 0) AS avg_population,
+               SUM(gdp_sum) / NULLIF(SUM(gdp_n), 0) AS avg_gdp,
+               SUM(infrastructure_sum) / NULLIF(SUM(infrastructure_n), 0) AS avg_infrastructure,
+               SUM(drought_sum) / NULLIF(SUM(drought_n), 0) AS avg_drought_risk
+        FROM per_zone
+    ),
+    top_zones AS (
+        SELECT z.zone_name, p.consumption_sum / NULLIF(p.consumption_n, 0) AS avg_consumption
+        FROM per_zone p JOIN zones z ON z.zone_id = p.zone_id
+        ORDER BY avg_consumption DESC NULLS LAST
+        LIMIT %(top)s
+    )
+    SELECT row_to_json(overall), (SELECT json_agg(top_zones) FROM top_zones)
+    FROM overall
+"""
+
+def collect_statistics(engine, fast=False, sample_percent=SAMPLE_PERCENT, top=TOP_ZONES):
+    """Overall and top-zone statistics in one pass; fast aggregates a block sample and scales the count"""
+    sample = sql.SQL("TABLESAMPLE SYSTEM (%(percent)s)") if fast else sql.SQL("")
+    raw_conn = engine.raw_connection()
+    try:
+        cursor = raw_conn.cursor()
+        cursor.execute(sql.SQL(STATISTICS_QUERY).format(sample=sample), {"percent": sample_percent, "top": top})
+        overall, top_zones = cursor.fetchone()
+    finally:
+        raw_conn.close()
+
+    if fast and overall["total_records"] is not None:
+        overall["total_records"] = round(overall["total_records"] * 100 / sample_percent)
+    return {"mode": f"sampled {sample_percent}%" if fast else "exact", "overall": overall, "top_zones": top_zones or []}
+
+def show_statistics(statistics=None, fast=False, sample_percent=SAMPLE_PERCENT):
     """Show database statistics"""
+    statistics = statistics or collect_statistics(create_engine(os.getenv("DATABASE_URL")), fast, sample_percent)
+    stats = statistics["overall"]
     
     print("=" * 80)
-    print("📊 DATABASE STATISTICS")
+    print(f"📊 DATABASE STATISTICS ({statistics['mode']})")
     print("=" * 80)
     print()
     
-    engine = create_engine(os.getenv("DATABASE_URL"))
+    if not stats["total_records"]:
+        print("No water_data rows" + (" in the sample; try a larger --sample-percent" if fast else "."))
+        return
     
-    with engine.connect() as conn:
-        # Overall stats
-        stats_query = text("""
-            SELECT 
-                COUNT(*) as total_records,
-                COUNT(DISTINCT zone_id) as unique_zones,
-                MIN(timestamp) as earliest_date,
-                MAX(timestamp) as latest_date,
-                AVG(water_consumption_mld) as avg_consumption,
-                MIN(water_consumption_mld) as min_consumption,
-                MAX(water_consumption_mld) as max_consumption,
-                AVG(population) as avg_population,
-                AVG(gdp_per_capita) as avg_gdp,
-                AVG(infrastructure_score) as avg_infrastructure,
-                AVG(drought_risk_index) as avg_drought_risk
-            FROM water_data
-        """)
-        
-        stats = conn.execute(stats_query).fetchone()
-        
-        print("📈 OVERALL STATISTICS:")
-        print(f"  Total Records: {stats[0]:,}")
-        print(f"  Unique Zones: {stats[1]}")
-        print(f"  Date Range: {stats[2]} to {stats[3]}")
-        print(f"  Avg Water Consumption: {stats[4]:.2f} MLD")
-        print(f"  Min/Max Consumption: {stats[5]:.2f} / {stats[6]:.2f} MLD")
-        print(f"  Avg Population: {stats[7]:,.0f}")
-        print(f"  Avg GDP per capita: ₹{stats[8]:,.0f}")
-        print(f"  Avg Infrastructure Score: {stats[9]:.1f}/10")
-        print(f"  Avg Drought Risk: {stats[10]:.1f}/10")
-        print()
-        
-        # Top zones by consumption
-        top_zones_query = text("""
-            SELECT z.zone_name, AVG(wd.water_consumption_mld) as avg_consumption
-            FROM zones z
-            JOIN water_data wd ON z.zone_id = wd.zone_id
-            GROUP BY z.zone_name
-            ORDER BY avg_consumption DESC
-            LIMIT 10
-        """)
-        
-        top_zones = conn.execute(top_zones_query).fetchall()
-        
-        print("🏆 TOP 10 ZONES BY WATER CONSUMPTION:")
-        for i, (zone_name, avg_consumption) in enumerate(top_zones, 1):
-            print(f"  {i:2d}. {zone_name:<20} {avg_consumption:>6.2f} MLD")
+    print("📈 OVERALL STATISTICS:")
+    print(f"  Total Records: {stats['total_records']:,}")
+    print(f"  Unique Zones: {stats['unique_zones']}")
+    print(f"  Date Range: {stats['earliest_date']} to {stats['latest_date']}")
+    print(f"  Avg Water Consumption: {stats['avg_consumption']:.2f} MLD")
+    print(f"  Min/Max Consumption: {stats['min_consumption']:.2f} / {stats['max_consumption']:.2f} MLD")
+    print(f"  Avg Population: {stats['avg_population']:,.0f}")
+    print(f"  Avg GDP per capita: ₹{stats['avg_gdp']:,.0f}")
+    print(f"  Avg Infrastructure Score: {stats['avg_infrastructure']:.1f}/10")
+    print(f"  Avg Drought Risk: {stats['avg_drought_risk']:.1f}/10")
+    print()
+    
+    print(f"🏆 TOP {len(statistics['top_zones'])} ZONES BY WATER CONSUMPTION:")
+    for i, zone in enumerate(statistics["top_zones"], 1):
+        print(f"  {i:2d}. {zone['zone_name']:<20} {zone['avg_consumption'] or 0:>6.2f} MLD")
 
 if __name__ == "__main__":
-    show_database_structure()
-    print()
-    show_data_sources()
-    print()
-    show_data_flow()
-    print()
-    show_statistics()
+    parser = argparse.ArgumentParser(description="Show the database structure, data sources and statistics")
+    parser.add_argument("--fast", action="store_true",
+                        help="Catalog estimates and sizes, pg_stats and sampled aggregates instead of full scans")
+    parser.add_argument("--sample-percent", type=float, default=SAMPLE_PERCENT,
+                        help="Share of water_data blocks aggregated in --fast mode")
+    parser.add_argument("--json", action="store_true", help="Print structure and statistics as JSON")
+    args = parser.parse_args()
     
-    print()
-    print("=" * 80)
-    print("✅ DATABASE OVERVIEW COMPLETE")
-    print("=" * 80)
\ No newline at end of file
+    engine = create_engine(os.getenv("DATABASE_URL"))
+    structure = collect_structure(engine, args.fast)
+    statistics = collect_statistics(engine, args.fast, args.sample_percent)
+    
+    if args.json:
+        for table in structure["tables"]:
+            if "sample" in table:
+                table["sample"] = table["sample"].to_dict(orient="records")
+        print(json.dumps({"structure": structure, "statistics": statistics}, default=_json_default, indent=2))
+    else:
+        show_database_structure(structure, args.fast)
+        print()
+        show_data_sources()
+        print()
+        show_data_flow()
+        print()
+        show_statistics(statistics, args.fast, args.sample_percent)
+        
+        print()
+        print("=" * 80)
+        print("✅ DATABASE OVERVIEW COMPLETE")
+        print("=" * 80)
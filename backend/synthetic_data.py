@@ -0,0 +1,247 @@
+"""
+SYNTHETIC DATA GENERATOR
+Generates arbitrary numbers of zones (irregular polygons across India) with daily
+histories, using the same feature functions and consumption formula as
+setup_and_train.py. Zones are generated and written in chunks and each zone's
+history is flushed once the buffer fills, so memory stays bounded at any scale.
+
+    python synthetic_data.py --zones 10000 --years 4 --target db
+    python synthetic_data.py --zones 10000 --years 4 --target parquet --output synthetic/
+"""
+
+import os
+import io
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+from setup_and_train import WATER_DATA_COLUMNS, add_zone_features, calculate_water_consumption
+from schema import ensure_schema, ensure_partitions
+
+# Rough bounding box of mainland India
+LON_RANGE = (68.5, 92.0)
+LAT_RANGE = (8.5, 31.5)
+
+# Cities with real demographic/infrastructure profiles in setup_and_train.py.
+# Other zones get the default district profile.
+CITY_PROFILES = [
+    'Mumbai', 'Delhi', 'Bengaluru', 'Hyderabad', 'Ahmedabad', 'Chennai', 'Kolkata', 'Pune',
+    'Jaipur', 'Lucknow', 'Coimbatore', 'Madurai', 'Vellore', 'Tiruchirappalli',
+    'Visakhapatnam', 'Mysuru', 'Thiruvananthapuram', 'Bhopal', 'Nagpur'
+]
+CITY_PROFILE_SHARE = 0.3
+
+ZONE_CHUNK_SIZE = 1000
+FLUSH_ROWS = 200000
+
+def generate_zones(n_zones, seed=42, start_index=1, zone_size=0.02):
+    """Yield (zone_name, profile_name, longitude, latitude, polygon_wkt) for n_zones zones"""
+    rng = np.random.default_rng(seed)
+    for index in range(start_index, start_index + n_zones):
+        lon, lat = rng.uniform(*LON_RANGE), rng.uniform(*LAT_RANGE)
+        profile = rng.choice(CITY_PROFILES) if rng.random() < CITY_PROFILE_SHARE else None
+
+        # Irregular star-shaped polygon around the centre point
+        n_vertices = rng.integers(6, 13)
+        angles = np.sort(rng.uniform(0, 2 * np.pi, n_vertices))
+        radii = zone_size * rng.uniform(0.6, 1.0, n_vertices)
+        xs, ys = lon + radii * np.cos(angles), lat + radii * np.sin(angles)
+        ring = ", ".join(f"{x:.5f} {y:.5f}" for x, y in zip(xs, ys))
+        wkt = f"POLYGON(({ring}, {xs[0]:.5f} {ys[0]:.5f}))"
+
+        name = f"{profile or 'District'} Ward {index}"
+        yield name, profile, lon, lat, wkt
+
+def synthesize_weather(latitude, dates, rng):
+    """Daily weather with the shape of NASA POWER data: hot summers, a monsoon rain peak"""
+    n_days = len(dates)
+    day = dates.dayofyear.values
+    monsoon = np.exp(-((day - 200) / 45.0) ** 2)
+    summer = np.sin(2 * np.pi * (day - 30) / 365)
+
+    temp = 27 + (20 - latitude) * 0.15 + 5 * summer - 2 * monsoon + rng.normal(0, 1.5, n_days)
+    wet_day = rng.random(n_days) < 0.15 + 0.6 * monsoon
+    rain = np.where(wet_day, rng.gamma(0.7, 4 + 20 * monsoon), 0.0)
+    humidity = np.clip(50 + 35 * monsoon + rain * 0.3 + rng.normal(0, 6, n_days), 10, 100)
+    wind = np.clip(2.5 + 1.5 * monsoon + rng.normal(0, 0.8, n_days), 0.2, None)
+    solar = np.clip(20 + 3 * summer - 6 * monsoon + rng.normal(0, 2, n_days), 4, 30)
+
+    return pd.DataFrame({
+        'timestamp': dates,
+        'avg_temp_celsius': temp.round(2),
+        'rainfall_mm': rain.round(2),
+        'humidity': humidity.round(2),
+        'wind_speed': wind.round(2),
+        'solar_radiation': solar.round(2)
+    })
+
+def generate_zone_history(zone_id, zone_name, longitude, latitude, dates, rng, profile=None):
+    """One zone's daily water_data rows, built like the NASA ingest in setup_and_train.py"""
+    df = synthesize_weather(latitude, dates, rng)
+    add_zone_features(df, profile or zone_name, latitude, longitude)
+    df['water_consumption_mld'] = calculate_water_consumption(df)
+    df['zone_id'] = zone_id
+    df['population'] = df['population'].astype(int)
+    return df[WATER_DATA_COLUMNS]
+
+class PostgresSink:
+    """Inserts zones and COPYs buffered history rows into the database"""
+
+    def __init__(self, engine, flush_rows=FLUSH_ROWS):
+        self.engine = engine
+        self.flush_rows = flush_rows
+        self.buffer = []
+        self.buffered_rows = 0
+        self.rows_written = 0
+        with engine.connect() as conn:
+            ensure_schema(conn)
+
+    def write_zones(self, zones):
+        """Insert zones, returning their zone_ids in input order"""
+        with self.engine.connect() as conn:
+            rows = conn.execute(text("""
+                INSERT INTO zones (zone_name, geometry, centroid)
+                SELECT t.name, ST_GeomFromText(t.wkt, 4326), ST_Centroid(ST_GeomFromText(t.wkt, 4326))
+                FROM unnest(CAST(:names AS text[]), CAST(:wkts AS text[])) WITH ORDINALITY AS t(name, wkt, ord)
+                ORDER BY t.ord
+                RETURNING zone_id, zone_name
+            """), {"names": [z[0] for z in zones], "wkts": [z[4] for z in zones]}).fetchall()
+            conn.commit()
+        ids = dict((name, zone_id) for zone_id, name in rows)
+        return [ids[z[0]] for z in zones]
+
+    def write(self, frame):
+        self.buffer.append(frame)
+        self.buffered_rows += len(frame)
+        if self.buffered_rows >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        rows = pd.concat(self.buffer)
+        years = rows['timestamp'].dt.year
+        with self.engine.connect() as conn:
+            ensure_partitions(conn, years.min(), years.max())
+            conn.commit()
+        csv = io.StringIO()
+        rows.to_csv(csv, index=False, header=False)
+        csv.seek(0)
+        raw_conn = self.engine.raw_connection()
+        try:
+            raw_conn.cursor().copy_expert(
+                f"COPY water_data ({', '.join(WATER_DATA_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", csv)
+            raw_conn.commit()
+        finally:
+            raw_conn.close()
+        self.rows_written += self.buffered_rows
+        self.buffer, self.buffered_rows = [], 0
+
+    def close(self):
+        self.flush()
+        with self.engine.connect() as conn:
+            conn.execute(text("ANALYZE zones"))
+            conn.execute(text("ANALYZE water_data"))
+            conn.commit()
+
+class ParquetSink:
+    """Writes zones.parquet and water_data.parquet (row group per flush) for offline profiling"""
+
+    def __init__(self, output_dir, flush_rows=FLUSH_ROWS):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa, self.pq = pa, pq
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.flush_rows = flush_rows
+        self.buffer = []
+        self.buffered_rows = 0
+        self.rows_written = 0
+        self.next_zone_id = 1
+        self.zone_writer = None
+        self.data_writer = None
+
+    def write_zones(self, zones):
+        ids = list(range(self.next_zone_id, self.next_zone_id + len(zones)))
+        self.next_zone_id += len(zones)
+        table = self.pa.table({
+            'zone_id': ids,
+            'zone_name': [z[0] for z in zones],
+            'longitude': [z[2] for z in zones],
+            'latitude': [z[3] for z in zones],
+            'geometry_wkt': [z[4] for z in zones],
+        })
+        if self.zone_writer is None:
+            self.zone_writer = self.pq.ParquetWriter(os.path.join(self.output_dir, "zones.parquet"), table.schema)
+        self.zone_writer.write_table(table)
+        return ids
+
+    def write(self, frame):
+        self.buffer.append(frame)
+        self.buffered_rows += len(frame)
+        if self.buffered_rows >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        table = self.pa.Table.from_pandas(pd.concat(self.buffer), preserve_index=False)
+        if self.data_writer is None:
+            self.data_writer = self.pq.ParquetWriter(os.path.join(self.output_dir, "water_data.parquet"), table.schema)
+        self.data_writer.write_table(table)
+        self.rows_written += self.buffered_rows
+        self.buffer, self.buffered_rows = [], 0
+
+    def close(self):
+        self.flush()
+        for writer in (self.zone_writer, self.data_writer):
+            if writer is not None:
+                writer.close()
+
+def stream_histories(zones, sink, dates, seed=42):
+    """Generate and write the daily history of each (zone_id, name, lon, lat, profile) zone"""
+    rng = np.random.default_rng(seed)
+    np.random.seed(seed)  # add_zone_features / calculate_water_consumption use the global RNG
+    for zone_id, zone_name, longitude, latitude, profile in zones:
+        sink.write(generate_zone_history(zone_id, zone_name, longitude, latitude, dates, rng, profile))
+
+def generate(sink, n_zones, years, seed=42, zone_chunk_size=ZONE_CHUNK_SIZE, end_year=2024):
+    """Stream n_zones zones x years of daily history into sink, chunk by chunk"""
+    dates = pd.date_range(f"{end_year - years + 1}-01-01", f"{end_year}-12-31", freq='D')
+    zones = generate_zones(n_zones, seed)
+    started = time.perf_counter()
+    done = 0
+    while done < n_zones:
+        chunk = [next(zones) for _ in range(min(zone_chunk_size, n_zones - done))]
+        zone_ids = sink.write_zones(chunk)
+        stream_histories(
+            ((zone_id, name, lon, lat, profile) for zone_id, (name, profile, lon, lat, _) in zip(zone_ids, chunk)),
+            sink, dates, seed + done
+        )
+        done += len(chunk)
+        elapsed = time.perf_counter() - started
+        print(f"Generated {done}/{n_zones} zones ({done * len(dates) / elapsed:,.0f} rows/s)")
+    sink.close()
+    return done * len(dates)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic zones and daily water_data at scale")
+    parser.add_argument("--zones", type=int, default=5300)
+    parser.add_argument("--years", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--target", choices=["db", "parquet"], default="db")
+    parser.add_argument("--output", default="synthetic", help="Output directory for --target parquet")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--flush-rows", type=int, default=FLUSH_ROWS, help="Rows buffered before each write")
+    args = parser.parse_args()
+
+    if args.target == "db":
+        sink = PostgresSink(create_engine(args.database_url), args.flush_rows)
+    else:
+        try:
+            sink = ParquetSink(args.output, args.flush_rows)
+        except ImportError:  # pyarrow is optional; only --target parquet needs it
+            raise SystemExit("--target parquet needs pyarrow: pip install pyarrow")
+    total = generate(sink, args.zones, args.years, args.seed)
+    print(f"✅ Generated {args.zones} zones and {total:,} water_data rows.")
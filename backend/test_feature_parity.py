@@ -0,0 +1,89 @@
+"""
+Training/serving feature parity: the same rows fed through the training path
+(ingest transform_zone + prepare_training_frame) and the serving paths
+(compute_features/feature_frame as /api/predict/live and batch_score.py use them)
+must give the same feature columns, in the same order, with identical values.
+
+    python -m pytest -q test_feature_parity.py
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from feature_engine import MODEL_FEATURES, compute_features, feature_frame
+from setup_and_train import parse_power_response, prepare_training_frame, transform_zone
+from batch_score import FORECAST_DEFAULTS, ZONE_ATTRIBUTE_COLUMNS, build_scoring_frame
+
+WEATHER_COLUMNS = ['avg_temp_celsius', 'rainfall_mm', 'humidity', 'wind_speed', 'solar_radiation']
+
+def power_response(dates, weather):
+    """NASA POWER daily JSON for the given dates and {column: values} weather"""
+    keys = [d.strftime('%Y%m%d') for d in dates]
+    parameters = {'T2M': 'avg_temp_celsius', 'PRECTOTCORR': 'rainfall_mm', 'RH2M': 'humidity',
+                  'WS2M': 'wind_speed', 'ALLSKY_SFC_SW_DWN': 'solar_radiation'}
+    return {'properties': {'parameter': {
+        code: dict(zip(keys, (float(v) for v in weather[column]))) for code, column in parameters.items()
+    }}}
+
+def ingest(dates, weather, zone_id=7, zone_name="Chennai", latitude=13.08, longitude=80.27):
+    """water_data rows as the ingest writes them, and the training feature frame built from them"""
+    np.random.seed(0)
+    rows = transform_zone(parse_power_response(power_response(dates, weather)), zone_id, zone_name, latitude, longitude)
+    df, features = prepare_training_frame(rows.copy())
+    return rows, df[features]
+
+def assert_same_features(serving, training):
+    assert list(serving.columns) == list(training.columns) == MODEL_FEATURES
+    for name in MODEL_FEATURES:
+        np.testing.assert_array_equal(
+            serving[name].to_numpy(dtype=float), training[name].to_numpy(dtype=float), err_msg=name
+        )
+
+@pytest.fixture
+def history():
+    """Five years of varied daily weather, across leap years and every season"""
+    dates = pd.date_range('2020-01-01', '2024-12-31', freq='D')
+    rng = np.random.default_rng(42)
+    weather = {
+        'avg_temp_celsius': rng.uniform(10, 48, len(dates)).round(2),
+        'rainfall_mm': rng.gamma(0.7, 10, len(dates)).round(2),
+        'humidity': rng.uniform(10, 100, len(dates)).round(2),
+        'wind_speed': rng.uniform(0.2, 8, len(dates)).round(2),
+        'solar_radiation': rng.uniform(4, 30, len(dates)).round(2),
+    }
+    return dates, weather
+
+def test_live_prediction_path_matches_training(history):
+    rows, training = ingest(*history)
+    sample = np.random.default_rng(1).choice(len(rows), 200, replace=False)
+
+    # One row at a time, exactly as predict_live builds its input
+    serving = []
+    for i in sample:
+        row = rows.iloc[i]
+        columns = {
+            'zone_id': [row['zone_id']],
+            **{name: [row[name]] for name in ZONE_ATTRIBUTE_COLUMNS},
+            **{name: [row[name]] for name in WEATHER_COLUMNS},
+        }
+        columns = compute_features(columns, dates=[row['timestamp'].date()])
+        serving.append(feature_frame(columns, MODEL_FEATURES))
+    serving = pd.concat(serving, ignore_index=True)
+
+    assert_same_features(serving, training.iloc[sample].reset_index(drop=True))
+
+def test_vectorized_path_matches_training(history):
+    rows, training = ingest(*history)
+    columns = {name: rows[name].to_numpy() for name in ['zone_id'] + ZONE_ATTRIBUTE_COLUMNS + WEATHER_COLUMNS}
+    serving = feature_frame(compute_features(columns, dates=rows['timestamp'].to_numpy()), MODEL_FEATURES)
+    assert_same_features(serving, training.reset_index(drop=True))
+
+def test_batch_scoring_path_matches_training():
+    # Forecast weather every day, within one year so the zone attributes are constant
+    dates = pd.date_range('2024-01-01', '2024-12-31', freq='D')
+    weather = {name: np.full(len(dates), FORECAST_DEFAULTS[name]) for name in WEATHER_COLUMNS}
+    rows, training = ingest(dates, weather)
+
+    zones = rows.iloc[[0]][['zone_id'] + ZONE_ATTRIBUTE_COLUMNS].reset_index(drop=True)
+    frame = build_scoring_frame(zones, pd.Series(dates), FORECAST_DEFAULTS)
+    assert_same_features(feature_frame(frame, MODEL_FEATURES), training.reset_index(drop=True))
@@ -0,0 +1,88 @@
+"""
+API start-up without a database or model file: the app must import, run its
+lifespan, answer liveness, and report not-ready (503) on readiness, on the
+model endpoints (after waiting at most MODEL_WAIT_SECONDS for the warm-up) and
+on the database endpoints.
+
+    python -m pytest -q test_startup.py
+"""
+
+import sys
+import time
+import importlib
+import threading
+import pytest
+from fastapi.testclient import TestClient
+
+MODEL_WAIT_SECONDS = 0.5
+
+@pytest.fixture
+def main_module(monkeypatch, tmp_path):
+    """A fresh import of main with no DATABASE_URL, run from a directory with no model files"""
+    # Blank rather than delete: load_dotenv() would fill a missing variable from backend/.env
+    monkeypatch.setenv("DATABASE_URL", "")
+    monkeypatch.setenv("MODEL_WAIT_SECONDS", str(MODEL_WAIT_SECONDS))
+    monkeypatch.setenv("MODEL_WARMUP", "background")
+    monkeypatch.chdir(tmp_path)
+    sys.modules.pop("main", None)
+    module = importlib.import_module("main")
+    yield module
+    sys.modules.pop("main", None)
+
+def wait_for_warmup(client, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get("/api/ready")
+        if response.json()["status"] in ("ready", "failed"):
+            return response
+        time.sleep(0.01)
+    raise AssertionError("warm-up did not finish")
+
+def test_starts_without_database_or_model(main_module):
+    with TestClient(main_module.app) as client:
+        assert client.get("/api/health").status_code == 200
+
+        ready = wait_for_warmup(client)
+        assert ready.status_code == 503
+        assert ready.headers["retry-after"]
+        body = ready.json()
+        assert body["status"] == "failed"
+        assert body["database"] is False
+        assert "FileNotFoundError" in body["error"]
+
+        predict = client.get("/api/predict/live/1")
+        assert predict.status_code == 503
+        assert predict.headers["retry-after"]
+
+def test_predict_waits_for_warmup_then_503(main_module, monkeypatch):
+    release = threading.Event()
+
+    def slow_load_models():
+        # Still loading when the request's wait runs out
+        release.wait(10)
+        raise FileNotFoundError("water_model.joblib")
+
+    monkeypatch.setattr(main_module, "load_models", slow_load_models)
+    with TestClient(main_module.app) as client:
+        try:
+            assert client.get("/api/health").status_code == 200
+            loading = client.get("/api/ready")
+            assert loading.status_code == 503
+            assert loading.json()["status"] == "loading"
+
+            started = time.monotonic()
+            predict = client.get("/api/predict/live/1")
+            waited = time.monotonic() - started
+            assert predict.status_code == 503
+            assert predict.headers["retry-after"]
+            assert "warming up" in predict.json()["detail"]
+            assert MODEL_WAIT_SECONDS <= waited < MODEL_WAIT_SECONDS + 5
+        finally:
+            release.set()
+
+def test_database_endpoints_503_without_database(main_module):
+    with TestClient(main_module.app) as client:
+        zones = client.get("/api/zones")
+        assert zones.status_code == 503
+        assert "database not configured" in zones.json()["detail"].lower()
+        assert client.get("/api/history/1").status_code == 503
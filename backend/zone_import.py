@@ -0,0 +1,251 @@
+"""
+BULK ZONE IMPORT
+Validates GeoJSON features (from a FeatureCollection or NDJSON, one feature per
+line) and loads them into zones in one transaction: COPY into a temporary
+staging table, PostGIS validity check, then a single INSERT ... SELECT of the
+new names. Every input feature gets a result entry; zones' centroids are stored
+on insert for the weather fetcher.
+"""
+
+import io
+import os
+import csv
+import orjson
+
+MAX_BULK_ZONES = int(os.getenv("MAX_BULK_ZONES", "10000"))
+# Request body cap, enforced while reading so an oversized body is never held in memory
+MAX_BULK_BYTES = int(os.getenv("MAX_BULK_BYTES", str(64 * 1024 * 1024)))
+ZONE_NAME_MAX_LENGTH = 100  # zones.zone_name is VARCHAR(100)
+NAME_PROPERTIES = ("name", "zone_name")
+
+class BulkImportError(ValueError):
+    """The request body as a whole can't be imported"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+def check_content_length(header, limit=MAX_BULK_BYTES):
+    """Reject up front when the declared Content-Length is over limit"""
+    if header and header.isdigit() and int(header) > limit:
+        raise BulkImportError(f"Body is {header} bytes; the limit is {limit}", status_code=413)
+
+def _too_large(limit):
+    return BulkImportError(f"Body is larger than {limit} bytes; the limit is {limit}", status_code=413)
+
+async def read_body(chunks, limit=MAX_BULK_BYTES):
+    """Whole streamed body, stopping as soon as it exceeds limit bytes"""
+    body = bytearray()
+    async for chunk in chunks:
+        body += chunk
+        if len(body) > limit:
+            raise _too_large(limit)
+    return bytes(body)
+
+def parse_feature_collection(body):
+    """Features of a FeatureCollection (or a bare Feature) JSON document"""
+    try:
+        document = orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        raise BulkImportError(f"Invalid JSON: {e}")
+    if isinstance(document, dict) and document.get("type") == "Feature":
+        return [document]
+    if not isinstance(document, dict) or document.get("type") != "FeatureCollection":
+        raise BulkImportError("Expected a GeoJSON FeatureCollection")
+    features = document.get("features")
+    if not isinstance(features, list):
+        raise BulkImportError("FeatureCollection has no 'features' array")
+    return features
+
+async def read_ndjson(chunks, limit=MAX_BULK_ZONES, max_bytes=MAX_BULK_BYTES):
+    """Decoded lines of a streamed NDJSON body, stopping once it exceeds limit features or max_bytes.
+
+    Lines that aren't valid JSON are kept as their error text so they get a result entry.
+    """
+    features, pending, received = [], b"", 0
+    async for chunk in chunks:
+        received += len(chunk)
+        if received > max_bytes:
+            raise _too_large(max_bytes)
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        features.extend(_decode_line(line) for line in lines if line.strip())
+        if len(features) > limit:
+            raise BulkImportError(f"More than {limit} features; the limit is {limit}", status_code=413)
+    if pending.strip():
+        features.append(_decode_line(pending))
+    return features
+
+def _decode_line(line):
+    try:
+        return orjson.loads(line.strip(b"\x1e \t\r"))  # RFC 8142 records start with RS
+    except orjson.JSONDecodeError as e:
+        return f"Invalid JSON: {e}"
+
+def _validate_ring(ring):
+    if not isinstance(ring, list) or len(ring) < 4:
+        return "Polygon rings need at least 4 positions"
+    for position in ring:
+        if (not isinstance(position, list) or len(position) < 2
+                or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in position[:2])):
+            return "Positions must be [longitude, latitude] numbers"
+        if not (-180 <= position[0] <= 180 and -90 <= position[1] <= 90):
+            return "Coordinates must be WGS84 longitude/latitude"
+    if ring[0][:2] != ring[-1][:2]:
+        return "Polygon rings must be closed"
+    return None
+
+def validate_feature(feature):
+    """(zone_name, geometry) of a feature, or raise ValueError with the reason"""
+    if isinstance(feature, str):
+        raise ValueError(feature)
+    if not isinstance(feature, dict) or feature.get("type") != "Feature":
+        raise ValueError("Not a GeoJSON Feature")
+
+    properties = feature.get("properties") or {}
+    name = next((properties[key] for key in NAME_PROPERTIES if properties.get(key)), None)
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("Feature needs a 'name' property")
+    name = name.strip()
+    if len(name) > ZONE_NAME_MAX_LENGTH:
+        raise ValueError(f"Name longer than {ZONE_NAME_MAX_LENGTH} characters")
+
+    geometry = feature.get("geometry")
+    coordinates = geometry.get("coordinates") if isinstance(geometry, dict) else None
+    if isinstance(geometry, dict) and geometry.get("type") == "MultiPolygon" and isinstance(coordinates, list) and len(coordinates) == 1:
+        geometry = {"type": "Polygon", "coordinates": coordinates[0]}
+    return name, validate_polygon(geometry)
+
+def _validate_polygon_rings(rings):
+    if not isinstance(rings, list) or not rings:
+        raise ValueError("Polygon has no rings")
+    for ring in rings:
+        error = _validate_ring(ring)
+        if error:
+            raise ValueError(error)
+    # zones.geometry is 2D; drop any altitude
+    return [[position[:2] for position in ring] for ring in rings]
+
+def validate_polygon(geometry, allow_multi=False):
+    """2D copy of a GeoJSON Polygon (or MultiPolygon if allow_multi), or raise ValueError"""
+    kind = geometry.get("type") if isinstance(geometry, dict) else None
+    coordinates = geometry.get("coordinates") if isinstance(geometry, dict) else None
+    if kind == "Polygon":
+        return {"type": "Polygon", "coordinates": _validate_polygon_rings(coordinates)}
+    if kind == "MultiPolygon" and allow_multi:
+        if not isinstance(coordinates, list) or not coordinates:
+            raise ValueError("MultiPolygon has no polygons")
+        return {"type": "MultiPolygon", "coordinates": [_validate_polygon_rings(p) for p in coordinates]}
+    raise ValueError("Geometry must be a Polygon" + (" or MultiPolygon" if allow_multi else ""))
+
+def prepare_features(features):
+    """Validate and dedupe by name (first occurrence wins).
+
+    Returns (results, rows): a result dict per input feature, and staging rows
+    (index, name, geometry JSON) for the features still to be loaded.
+    """
+    results, rows, seen = [], [], {}
+    for index, feature in enumerate(features):
+        try:
+            name, geometry = validate_feature(feature)
+        except ValueError as e:
+            results.append({"index": index, "status": "invalid", "error": str(e)})
+            continue
+        if name in seen:
+            results.append({"index": index, "name": name, "status": "duplicate", "duplicate_of": seen[name]})
+            continue
+        seen[name] = index
+        results.append({"index": index, "name": name, "status": "pending"})
+        rows.append((index, name, orjson.dumps(geometry).decode()))
+    return results, rows
+
+def load_zones(engine, rows):
+    """COPY rows into a staging table and insert the valid, new names in one transaction.
+
+    Returns {index: (status, zone_id, error)} for every staged row.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+
+    raw_conn = engine.raw_connection()
+    try:
+        cursor = raw_conn.cursor()
+        # Serialize bulk imports so two concurrent requests can't both insert a name
+        cursor.execute("LOCK TABLE zones IN SHARE ROW EXCLUSIVE MODE")
+        cursor.execute("""
+            CREATE TEMPORARY TABLE zones_staging (
+                idx INTEGER PRIMARY KEY,
+                zone_name VARCHAR(100) NOT NULL,
+                geojson TEXT NOT NULL,
+                geometry GEOMETRY(POLYGON, 4326),
+                error TEXT
+            ) ON COMMIT DROP
+        """)
+        cursor.copy_expert("COPY zones_staging (idx, zone_name, geojson) FROM STDIN WITH (FORMAT csv)", buffer)
+        cursor.execute("""
+            UPDATE zones_staging
+            SET geometry = ST_SetSRID(ST_GeomFromGeoJSON(geojson), 4326)
+        """)
+        cursor.execute("""
+            UPDATE zones_staging
+            SET error = ST_IsValidReason(geometry)
+            WHERE NOT ST_IsValid(geometry)
+        """)
+        cursor.execute("""
+            SELECT s.idx, z.zone_id
+            FROM zones_staging s
+            JOIN zones z ON z.zone_name = s.zone_name
+            WHERE s.error IS NULL
+        """)
+        existing = dict(cursor.fetchall())
+        cursor.execute("""
+            INSERT INTO zones (zone_name, geometry, centroid)
+            SELECT s.zone_name, s.geometry, ST_Centroid(s.geometry)
+            FROM zones_staging s
+            WHERE s.error IS NULL
+              AND NOT EXISTS (SELECT 1 FROM zones z WHERE z.zone_name = s.zone_name)
+            ORDER BY s.idx
+            RETURNING zone_id, zone_name
+        """)
+        created = {name: zone_id for zone_id, name in cursor.fetchall()}
+        cursor.execute("SELECT idx, zone_name, error FROM zones_staging")
+        staged = cursor.fetchall()
+        raw_conn.commit()
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
+
+    outcome = {}
+    for index, name, error in staged:
+        if error is not None:
+            outcome[index] = ("invalid", None, error)
+        elif index in existing:
+            outcome[index] = ("exists", existing[index], None)
+        else:
+            outcome[index] = ("created", created[name], None)
+    return outcome
+
+def import_features(engine, features):
+    """Validate, dedupe and load features; per-feature results and status counts"""
+    if len(features) > MAX_BULK_ZONES:
+        raise BulkImportError(f"{len(features)} features; the limit is {MAX_BULK_ZONES}", status_code=413)
+    results, rows = prepare_features(features)
+    outcome = load_zones(engine, rows) if rows else {}
+
+    for result in results:
+        if result["status"] != "pending":
+            continue
+        status, zone_id, error = outcome[result["index"]]
+        result["status"] = status
+        if zone_id is not None:
+            result["zone_id"] = zone_id
+        if error is not None:
+            result["error"] = error
+
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    return {"total": len(results), "counts": counts, "results": results}